@@ -0,0 +1,279 @@
+from typing import List, Dict, Any, Optional
+from array import array
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+# 큰 처리 결과를 세션 밖(디스크)으로 빼두는 내용 주소(content-addressed) 저장소
+#
+# 키는 내용의 sha256이라 같은 표 이미지나 같은 임베딩은 한 번만 저장됩니다.
+# slim_result는 Upstage 응답의 base64 이미지와 임베딩 벡터를 저장소로 옮기고
+# 결과에는 참조만 남기므로, Streamlit 세션에는 가벼운 결과만 유지됩니다.
+# 저장/다운로드처럼 원본이 필요할 때만 load_result_embeddings / hydrate_result로 다시 읽습니다.
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bom_search", "blobs")
+
+# 참조로 바꾼 값의 표식 키
+BLOB_REF_KEY = "blob_ref"
+
+# 이보다 짧은 base64 값은 옮기지 않음
+_MIN_SPILL_BYTES = 1024
+
+_store_lock = threading.Lock()
+_shared_store: Optional["BlobStore"] = None
+
+
+class BlobStore:
+    """
+    sha256 이름의 파일로 바이트를 저장하는 저장소 (스레드/프로세스 간 공유 가능).
+
+    Args:
+        directory: 저장 디렉터리
+        max_bytes: 저장 파일 크기 합의 상한 (넘으면 가장 오래 사용하지 않은 항목부터 삭제)
+        min_age_seconds: 마지막 사용 후 이 시간이 지나지 않은 항목은 상한을 넘어도 지우지 않음
+            (살아 있는 세션이 참조하는 결과가 정리되지 않도록)
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_STORE_DIR,
+        max_bytes: int = 1024 * 1024 * 1024,
+        min_age_seconds: float = 0
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_age_seconds = min_age_seconds
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, ref: str) -> str:
+        return os.path.join(self.directory, ref[:2], ref)
+
+    def put(self, data: bytes) -> str:
+        """바이트를 저장하고 참조(sha256)를 반환합니다. 이미 있으면 다시 쓰지 않습니다."""
+        ref = hashlib.sha256(data).hexdigest()
+        path = self._path(ref)
+        if os.path.exists(path):
+            os.utime(path, None)
+            return ref
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        # 저장할 때마다 디렉터리를 훑지 않도록 일정 횟수마다 정리
+        with self._lock:
+            self._puts_since_evict += 1
+            should_evict = self._puts_since_evict >= 32
+            if should_evict:
+                self._puts_since_evict = 0
+        if should_evict:
+            self.evict()
+        return ref
+
+    def get(self, ref: str) -> bytes:
+        """참조로 바이트를 읽습니다. 없으면 FileNotFoundError."""
+        path = self._path(ref)
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def _entries(self):
+        entries = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self) -> int:
+        """
+        크기 상한을 넘는 만큼 가장 오래 사용하지 않은 항목을 지우고 삭제 수를 반환합니다.
+
+        min_age_seconds 안에 사용한 항목은 남기므로 그동안은 상한을 넘을 수 있습니다.
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            pinned_after = time.time() - self.min_age_seconds
+            for mtime, size, path in entries:
+                # 사용 시각 순으로 정렬되어 있으므로 최근 항목에 닿으면 멈춤
+                if total <= self.max_bytes or mtime > pinned_after:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "directory": self.directory
+        }
+
+
+def get_blob_store() -> BlobStore:
+    """
+    환경변수 설정으로 공유 저장소를 반환합니다.
+
+    환경변수:
+        RESULT_STORE_DIR: 저장 디렉터리 (기본 ~/.cache/bom_search/blobs)
+        RESULT_STORE_MAX_BYTES: 크기 상한 (기본 1GB)
+        RESULT_STORE_MIN_AGE_SECONDS: 마지막 사용 후 이 시간 안의 항목은 정리하지 않음
+            (기본 86400, 세션이 살아 있는 동안 결과가 지워지지 않도록)
+    """
+    global _shared_store
+    if _shared_store is not None:
+        return _shared_store
+    with _store_lock:
+        if _shared_store is None:
+            _shared_store = BlobStore(
+                directory=os.getenv("RESULT_STORE_DIR", DEFAULT_STORE_DIR),
+                max_bytes=int(os.getenv("RESULT_STORE_MAX_BYTES", str(1024 * 1024 * 1024))),
+                min_age_seconds=float(os.getenv("RESULT_STORE_MIN_AGE_SECONDS", "86400"))
+            )
+    return _shared_store
+
+def slim_results_enabled() -> bool:
+    """SLIM_RESULTS=false면 세션에 전체 결과를 그대로 둡니다 (기본 true)."""
+    return os.getenv("SLIM_RESULTS", "true").lower() == "true"
+
+def _is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_REF_KEY in value
+
+def _pack_embeddings(embeddings: List[Optional[List[float]]]) -> bytes:
+    """임베딩 목록을 float32 배열로 묶습니다 (None인 청크는 NaN 행)."""
+    dimension = next((len(embedding) for embedding in embeddings if embedding is not None), 0)
+    header = json.dumps({"count": len(embeddings), "dimension": dimension}).encode("utf-8")
+    values = array("f")
+    for embedding in embeddings:
+        values.extend(embedding if embedding is not None else [math.nan] * dimension)
+    return header + b"\n" + values.tobytes()
+
+def _unpack_embeddings(data: bytes) -> List[Optional[List[float]]]:
+    header, _, body = data.partition(b"\n")
+    meta = json.loads(header)
+    values = array("f")
+    values.frombytes(body)
+    dimension = meta["dimension"]
+    embeddings = []
+    for i in range(meta["count"]):
+        row = values[i * dimension:(i + 1) * dimension].tolist()
+        embeddings.append(None if not row or math.isnan(row[0]) else row)
+    return embeddings
+
+def store_embeddings(embeddings: List[Optional[List[float]]], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """임베딩 목록을 저장소에 넣고 참조 {"blob_ref", "count", "dimension"}를 반환합니다."""
+    dimension = next((len(embedding) for embedding in embeddings if embedding is not None), 0)
+    return {
+        BLOB_REF_KEY: (store or get_blob_store()).put(_pack_embeddings(embeddings)),
+        "count": len(embeddings),
+        "dimension": dimension
+    }
+
+def load_embeddings(ref: Dict[str, Any], store: Optional[BlobStore] = None) -> List[Optional[List[float]]]:
+    """store_embeddings 참조로 임베딩 목록을 읽습니다. 저장소에서 지워졌으면 FileNotFoundError."""
+    return _unpack_embeddings((store or get_blob_store()).get(ref[BLOB_REF_KEY]))
+
+def slim_result(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """
+    base64 이미지와 임베딩을 저장소로 옮긴 가벼운 결과를 반환합니다 (원본은 바꾸지 않음).
+
+    - elements[*].base64_encoding → {"blob_ref", "bytes"}
+    - embeddings → embeddings_ref {"blob_ref", "count", "dimension"} (embeddings 키는 빈 목록)
+    - result_id: 다운로드 파일 등을 결과별로 한 번만 만들기 위한 식별자
+    """
+    store = store or get_blob_store()
+    slim = dict(result)
+    slim.setdefault("result_id", uuid.uuid4().hex)
+
+    elements = result.get("elements")
+    if isinstance(elements, list):
+        slim_elements = []
+        for element in elements:
+            encoded = element.get("base64_encoding") if isinstance(element, dict) else None
+            if isinstance(encoded, str) and len(encoded) >= _MIN_SPILL_BYTES:
+                data = encoded.encode("ascii")
+                element = {**element, "base64_encoding": {BLOB_REF_KEY: store.put(data), "bytes": len(data)}}
+            slim_elements.append(element)
+        slim["elements"] = slim_elements
+
+    embeddings = result.get("embeddings")
+    if embeddings:
+        slim["embeddings_ref"] = store_embeddings(embeddings, store)
+        slim["embeddings"] = []
+    return slim
+
+def load_result_embeddings(result: Dict[str, Any], store: Optional[BlobStore] = None) -> List[Optional[List[float]]]:
+    """결과의 임베딩 목록을 반환합니다 (slim 결과면 저장소에서 읽음)."""
+    if result.get("embeddings"):
+        return result["embeddings"]
+    ref = result.get("embeddings_ref")
+    if not ref:
+        return []
+    return load_embeddings(ref, store)
+
+def hydrate_result(result: Dict[str, Any], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """slim_result로 옮긴 값을 모두 되돌린 전체 결과를 반환합니다 (다운로드용)."""
+    store = store or get_blob_store()
+    full = copy.copy(result)
+
+    if isinstance(result.get("elements"), list):
+        full["elements"] = [
+            {**element, "base64_encoding": store.get(element["base64_encoding"][BLOB_REF_KEY]).decode("ascii")}
+            if isinstance(element, dict) and _is_ref(element.get("base64_encoding")) else element
+            for element in result["elements"]
+        ]
+
+    if result.get("embeddings_ref"):
+        full["embeddings"] = load_result_embeddings(result, store)
+        del full["embeddings_ref"]
+    full.pop("result_id", None)
+    return full
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="처리 결과 저장소 관리")
+    parser.add_argument("command", choices=["stats", "evict"])
+    args = parser.parse_args()
+
+    blob_store = get_blob_store()
+    if args.command == "evict":
+        print(f"🗑️ {blob_store.evict()}개 항목을 정리했습니다.")
+    stats = blob_store.stats()
+    print(f"📦 {stats['directory']}: {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f} MB")
@@ -0,0 +1,270 @@
+from typing import List, Dict, Any, Optional, Tuple
+import argparse
+import json
+import os
+from file.embedding_scheduler import count_tokens, truncate_to_tokens
+from file.html_chunker import ChunkRecord, chunk_html
+
+# 헤더 기준 청크를 토큰 예산에 맞추는 후처리 단계
+#
+# extract_chunks_from_html(as_records=True) 결과에서
+# - max_tokens를 넘는 섹션은 문단(줄) 경계로 나누고, 조각마다 섹션 헤더를 앞에 다시 붙이며
+#   앞 조각의 마지막 문단을 overlap_tokens만큼 겹쳐 넣습니다.
+# - min_tokens보다 작은 섹션은 합쳐도 max_tokens를 넘지 않으면 앞 청크에 합칩니다.
+# 나뉜 조각은 원래 섹션의 페이지 범위/원본 위치를 그대로 가집니다 (문단별 페이지는 추적하지 않음).
+
+DEFAULT_MIN_TOKENS = 64
+DEFAULT_MAX_TOKENS = 800
+DEFAULT_OVERLAP_TOKENS = 80
+
+# 토큰 분포 히스토그램 구간 경계 (마지막 구간은 상한 없음)
+_HISTOGRAM_BOUNDS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def get_budget_settings() -> Dict[str, int]:
+    """
+    환경변수로 토큰 예산을 읽습니다.
+
+    환경변수:
+        CHUNK_MIN_TOKENS: 이보다 작은 청크는 인접 청크와 합침 (기본 64)
+        CHUNK_MAX_TOKENS: 이보다 큰 청크는 나눔 (기본 800)
+        CHUNK_OVERLAP_TOKENS: 나눈 조각 사이에 겹쳐 넣을 토큰 수 (기본 80)
+    """
+    return {
+        "min_tokens": int(os.getenv("CHUNK_MIN_TOKENS", str(DEFAULT_MIN_TOKENS))),
+        "max_tokens": int(os.getenv("CHUNK_MAX_TOKENS", str(DEFAULT_MAX_TOKENS))),
+        "overlap_tokens": int(os.getenv("CHUNK_OVERLAP_TOKENS", str(DEFAULT_OVERLAP_TOKENS)))
+    }
+
+def chunk_budget_enabled() -> bool:
+    """CHUNK_TOKEN_BUDGET=true면 청크 분할 뒤 토큰 예산 조정을 적용합니다 (기본 false)."""
+    return os.getenv("CHUNK_TOKEN_BUDGET", "false").lower() == "true"
+
+def _percentile(sorted_values: List[int], fraction: float) -> int:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def token_distribution(
+    token_counts: List[int],
+    min_tokens: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    청크 토큰 수 분포를 요약합니다.
+
+    Returns:
+        {"count", "total", "min", "max", "mean", "p50", "p90", "p99",
+         "under_min", "over_max", "histogram": {"<64": n, "64-127": n, ..., ">=8192": n}}
+    """
+    histogram = {}
+    lower = 0
+    for bound in _HISTOGRAM_BOUNDS:
+        label = f"<{bound}" if lower == 0 else f"{lower}-{bound - 1}"
+        histogram[label] = sum(1 for tokens in token_counts if lower <= tokens < bound)
+        lower = bound
+    histogram[f">={lower}"] = sum(1 for tokens in token_counts if tokens >= lower)
+
+    if not token_counts:
+        return {
+            "count": 0, "total": 0, "min": 0, "max": 0, "mean": 0, "p50": 0, "p90": 0, "p99": 0,
+            "under_min": 0, "over_max": 0, "histogram": histogram
+        }
+
+    ordered = sorted(token_counts)
+    return {
+        "count": len(ordered),
+        "total": sum(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p50": _percentile(ordered, 0.5),
+        "p90": _percentile(ordered, 0.9),
+        "p99": _percentile(ordered, 0.99),
+        "under_min": sum(1 for tokens in ordered if min_tokens is not None and tokens < min_tokens),
+        "over_max": sum(1 for tokens in ordered if max_tokens is not None and tokens > max_tokens),
+        "histogram": histogram
+    }
+
+def _split_paragraph(paragraph: str, budget: int) -> List[str]:
+    """budget 토큰보다 긴 문단을 가능하면 공백 위치에서 끊어 여러 조각으로 나눕니다."""
+    pieces = []
+    rest = paragraph
+    while rest and count_tokens(rest) > budget:
+        piece = truncate_to_tokens(rest, budget)
+        cut = piece.rfind(" ")
+        if cut > len(piece) // 2:
+            piece = piece[:cut]
+        if not piece:
+            # 한 글자도 예산에 들어가지 않는 경우에도 진행은 보장
+            piece = rest[:1]
+        pieces.append(piece.strip())
+        rest = rest[len(piece):].strip()
+    if rest:
+        pieces.append(rest)
+    return [piece for piece in pieces if piece]
+
+def split_record(record: ChunkRecord, max_tokens: int, overlap_tokens: int = 0) -> List[ChunkRecord]:
+    """
+    max_tokens를 넘는 청크를 문단 경계로 나눕니다.
+
+    조각마다 첫 줄에 섹션 헤더를 다시 붙이고, 앞 조각 끝의 문단을 overlap_tokens 이하만큼
+    다음 조각 앞에 겹쳐 넣습니다. 예산 안에 들어가면 원래 레코드를 그대로 반환합니다.
+    """
+    if count_tokens(record.text) <= max_tokens:
+        return [record]
+
+    lines = record.text.split("\n")
+    header, body = lines[0], lines[1:]
+    # 헤더가 예산 대부분을 차지해도 본문이 들어갈 공간은 남김
+    budget = max(max_tokens - count_tokens(header) - 1, max_tokens // 2, 1)
+
+    paragraphs: List[Tuple[str, int]] = []
+    for line in body:
+        for piece in (_split_paragraph(line, budget) if count_tokens(line) > budget else [line]):
+            paragraphs.append((piece, count_tokens(piece) + 1))
+
+    groups: List[List[Tuple[str, int]]] = []
+    current: List[Tuple[str, int]] = []
+    current_tokens = 0
+    fresh = 0  # current에서 겹침이 아닌 새 문단 수
+    for paragraph in paragraphs:
+        if fresh and current_tokens + paragraph[1] > budget:
+            groups.append(current)
+            # 앞 조각 끝 문단을 overlap_tokens 이하, 새 문단과 합쳐 예산 이하만큼 이어받음
+            overlap: List[Tuple[str, int]] = []
+            overlap_total = 0
+            for previous in reversed(current):
+                if overlap_total + previous[1] > min(overlap_tokens, budget - paragraph[1]):
+                    break
+                overlap.insert(0, previous)
+                overlap_total += previous[1]
+            current, current_tokens, fresh = overlap, overlap_total, 0
+        current.append(paragraph)
+        current_tokens += paragraph[1]
+        fresh += 1
+    if fresh or not groups:
+        groups.append(current)
+
+    return [
+        ChunkRecord(
+            section_id=record.section_id,
+            header=record.header,
+            start_page=record.start_page,
+            end_page=record.end_page,
+            start_offset=record.start_offset,
+            end_offset=record.end_offset,
+            text="\n".join([header] + [text for text, _ in group])
+        )
+        for group in groups
+    ]
+
+def _merge_pair(first: ChunkRecord, second: ChunkRecord) -> ChunkRecord:
+    pages = [page for page in (first.start_page, first.end_page, second.start_page, second.end_page) if page is not None]
+    return ChunkRecord(
+        section_id=first.section_id,
+        header=first.header,
+        start_page=min(pages) if pages else None,
+        end_page=max(pages) if pages else None,
+        start_offset=first.start_offset,
+        end_offset=second.end_offset,
+        text=f"{first.text}\n{second.text}"
+    )
+
+def merge_small_records(records: List[ChunkRecord], min_tokens: int, max_tokens: int) -> List[ChunkRecord]:
+    """
+    min_tokens보다 작은 청크를 앞 청크와 합칩니다 (합친 크기가 max_tokens 이하일 때만).
+
+    앞 청크가 작고 현재 청크가 클 때도 같은 조건으로 합치므로 문서 첫 부분의 짧은 섹션도 정리됩니다.
+    """
+    merged: List[ChunkRecord] = []
+    merged_tokens: List[int] = []
+    for record in records:
+        tokens = count_tokens(record.text)
+        if merged and (tokens < min_tokens or merged_tokens[-1] < min_tokens):
+            combined = merged_tokens[-1] + tokens + 1
+            if combined <= max_tokens:
+                merged[-1] = _merge_pair(merged[-1], record)
+                merged_tokens[-1] = combined
+                continue
+        merged.append(record)
+        merged_tokens.append(tokens)
+    return merged
+
+def budget_chunk_records(
+    records: List[ChunkRecord],
+    min_tokens: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: Optional[int] = None
+) -> Tuple[List[ChunkRecord], Dict[str, Any]]:
+    """
+    청크를 토큰 예산에 맞게 나누고 합칩니다 (값이 없으면 get_budget_settings()의 환경변수 값).
+
+    Returns:
+        (조정된 레코드 목록,
+         {"settings", "before": 조정 전 token_distribution, "after": 조정 후 분포,
+          "split_sections": 나눈 섹션 수, "merged": 합쳐서 줄어든 청크 수})
+    """
+    settings = get_budget_settings()
+    if min_tokens is not None:
+        settings["min_tokens"] = min_tokens
+    if max_tokens is not None:
+        settings["max_tokens"] = max_tokens
+    if overlap_tokens is not None:
+        settings["overlap_tokens"] = overlap_tokens
+
+    before = [count_tokens(record.text) for record in records]
+
+    split: List[ChunkRecord] = []
+    split_sections = 0
+    for record in records:
+        pieces = split_record(record, settings["max_tokens"], settings["overlap_tokens"])
+        if len(pieces) > 1:
+            split_sections += 1
+        split.extend(pieces)
+
+    budgeted = merge_small_records(split, settings["min_tokens"], settings["max_tokens"])
+    after = [count_tokens(record.text) for record in budgeted]
+
+    return budgeted, {
+        "settings": settings,
+        "before": token_distribution(before, settings["min_tokens"], settings["max_tokens"]),
+        "after": token_distribution(after, settings["min_tokens"], settings["max_tokens"]),
+        "split_sections": split_sections,
+        "merged": len(split) - len(budgeted)
+    }
+
+def format_chunk_text(record: ChunkRecord) -> str:
+    """레코드를 기존 문자열 청크 형식(본문 + "[페이지 N]")으로 만듭니다."""
+    if record.end_page is None:
+        return record.text
+    return f"{record.text}\n[페이지 {record.end_page}]"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="청크 토큰 분포 확인 및 예산 조정 시뮬레이션")
+    parser.add_argument("path", help="processed_*.json (content.html 포함) 또는 HTML 파일")
+    parser.add_argument("--min-tokens", type=int, default=None)
+    parser.add_argument("--max-tokens", type=int, default=None)
+    parser.add_argument("--overlap-tokens", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    html = json.loads(raw)["content"]["html"] if args.path.endswith(".json") else raw
+
+    _, stats = budget_chunk_records(
+        chunk_html(html)["records"],
+        min_tokens=args.min_tokens,
+        max_tokens=args.max_tokens,
+        overlap_tokens=args.overlap_tokens
+    )
+    print(f"⚙️ 설정: {stats['settings']}")
+    for label in ("before", "after"):
+        dist = stats[label]
+        print(
+            f"📊 {label:<6} 청크 {dist['count']}개, 총 {dist['total']} 토큰, "
+            f"평균 {dist['mean']} / p50 {dist['p50']} / p90 {dist['p90']} / 최대 {dist['max']}, "
+            f"작음 {dist['under_min']} / 큼 {dist['over_max']}"
+        )
+        print("    " + ", ".join(f"{bucket}: {count}" for bucket, count in dist["histogram"].items()))
+    print(f"✂️ 나눈 섹션 {stats['split_sections']}개, 합쳐서 줄어든 청크 {stats['merged']}개")
@@ -0,0 +1,368 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Callable
+from array import array
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# 임베딩 벡터 영구 캐시 (SQLite)
+#
+# 키는 (임베딩 배포/모델, 요청 차원, 텍스트 sha256)이고 벡터는 float32 BLOB으로 저장합니다.
+# 같은 텍스트의 임베딩은 embed_query/embed_documents 어느 쪽으로 만들어도 같으므로
+# 질문 임베딩과 배치 검색 임베딩이 같은 캐시를 공유합니다.
+# 전체 BLOB 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "bom_search", "embeddings.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dimension INTEGER NOT NULL,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, dimension, text_hash)
+);
+CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used);
+"""
+
+_cache_lock = threading.Lock()
+_shared_cache: Optional["EmbeddingCache"] = None
+_shared_cache_failed = False
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+def _unpack_vector(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+def embedding_model_key(embeddings_client) -> Tuple[str, int]:
+    """
+    임베딩 클라이언트에서 캐시 키에 쓸 (배포/모델 이름, 요청 차원)을 꺼냅니다.
+
+    차원을 지정하지 않은 클라이언트는 0(모델 기본 차원)으로 기록합니다.
+    """
+    deployment = getattr(embeddings_client, "deployment", None) or ""
+    model = getattr(embeddings_client, "model", None) or ""
+    dimension = getattr(embeddings_client, "dimensions", None) or 0
+    return f"{deployment}/{model}", int(dimension)
+
+
+class EmbeddingCache:
+    """
+    SQLite 파일에 임베딩을 저장하는 캐시 (스레드 안전).
+
+    Args:
+        path: SQLite 파일 경로
+        max_bytes: 저장할 벡터 BLOB 크기의 합 상한
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def get_many(self, model: str, dimension: int, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """캐시에 있는 텍스트의 벡터를 {텍스트: 벡터}로 반환합니다."""
+        hashes = {_text_hash(text): text for text in dict.fromkeys(texts)}
+        if not hashes:
+            return {}
+
+        found = {}
+        with self._lock:
+            keys = list(hashes)
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimension = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model, dimension, *batch]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[hashes[text_hash]] = _unpack_vector(blob)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimension = ? AND text_hash = ?",
+                    [(now, model, dimension, _text_hash(text)) for text in found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def get(self, model: str, dimension: int, text: str) -> Optional[List[float]]:
+        return self.get_many(model, dimension, [text]).get(text)
+
+    def put_many(self, model: str, dimension: int, items: Dict[str, Sequence[float]]):
+        """{텍스트: 벡터}를 저장하고 크기 상한을 넘으면 오래된 항목을 지웁니다."""
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for text, vector in items.items():
+            blob = _pack_vector(vector)
+            rows.append((model, dimension, _text_hash(text), blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, dimension, text_hash, vector, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, model: str, dimension: int, text: str, vector: Sequence[float]):
+        self.put_many(model, dimension, {text: vector})
+
+    def _evict(self):
+        """전체 크기가 max_bytes를 넘으면 상한의 90%가 될 때까지 LRU 순서로 지웁니다."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = total - int(self.max_bytes * 0.9)
+        removed = 0
+        rows = self._conn.execute(
+            "SELECT rowid, size FROM embeddings ORDER BY last_used"
+        ).fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if removed >= target:
+                break
+            doomed.append((rowid,))
+            removed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", doomed)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패 횟수와 저장된 항목 수, 크기를 반환합니다."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "path": self.path
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    프로세스에서 공유하는 임베딩 캐시를 반환합니다.
+
+    환경변수:
+        EMBEDDING_CACHE_ENABLED: false면 캐시를 사용하지 않음 (기본 true)
+        EMBEDDING_CACHE_PATH: SQLite 파일 경로 (기본 ~/.cache/bom_search/embeddings.sqlite3)
+        EMBEDDING_CACHE_MAX_BYTES: 벡터 저장 크기 상한 (기본 256MB)
+
+    캐시 파일을 열 수 없으면 경고를 한 번 출력하고 None을 반환합니다 (캐시 없이 동작).
+    """
+    global _shared_cache, _shared_cache_failed
+
+    if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _shared_cache is not None or _shared_cache_failed:
+        return _shared_cache
+
+    with _cache_lock:
+        if _shared_cache is None and not _shared_cache_failed:
+            try:
+                _shared_cache = EmbeddingCache(
+                    path=os.getenv("EMBEDDING_CACHE_PATH", DEFAULT_CACHE_PATH),
+                    max_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+                )
+            except Exception as e:
+                print(f"⚠️ 임베딩 캐시를 열 수 없어 캐시 없이 진행합니다: {e}")
+                _shared_cache_failed = True
+        return _shared_cache
+
+def embed_query_cached(embeddings_client, text: str) -> List[float]:
+    """캐시를 먼저 확인하고, 없으면 embed_query로 만든 벡터를 저장한 뒤 반환합니다."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return embeddings_client.embed_query(text)
+
+    model, dimension = embedding_model_key(embeddings_client)
+    vector = cache.get(model, dimension, text)
+    if vector is None:
+        vector = embeddings_client.embed_query(text)
+        cache.put(model, dimension, text, vector)
+    return vector
+
+async def aembed_query_cached(embeddings_client, text: str) -> List[float]:
+    """embed_query_cached의 비동기 버전입니다 (aembed_query 사용)."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return await embeddings_client.aembed_query(text)
+
+    model, dimension = embedding_model_key(embeddings_client)
+    vector = cache.get(model, dimension, text)
+    if vector is None:
+        vector = await embeddings_client.aembed_query(text)
+        cache.put(model, dimension, text, vector)
+    return vector
+
+def embed_documents_cached(
+    embeddings_client,
+    texts: Sequence[str],
+    embed_fn: Optional[Callable[[List[str]], List[Optional[List[float]]]]] = None
+) -> Tuple[List[Optional[List[float]]], Dict[str, int]]:
+    """
+    여러 텍스트의 임베딩을 반환합니다. 캐시에 없는 텍스트만 한 번에 임베딩합니다.
+
+    Args:
+        embeddings_client: 임베딩 클라이언트 (캐시 키의 모델 정보, 기본 embed_documents)
+        texts: 임베딩할 텍스트 목록
+        embed_fn: 캐시에 없는 텍스트를 임베딩할 함수 (기본 embeddings_client.embed_documents).
+            실패한 위치에 None을 돌려주면 그 텍스트는 캐시하지 않고 결과에도 None으로 남깁니다.
+
+    Returns:
+        (texts 순서대로의 벡터 리스트,
+         {"hits": 캐시에서 가져온 텍스트 수, "misses": 새로 만든 텍스트 수, "embedded": 임베딩 요청한 고유 텍스트 수})
+    """
+    embed_fn = embed_fn or embeddings_client.embed_documents
+    cache = get_embedding_cache()
+    if cache is None:
+        unique_texts = list(dict.fromkeys(texts))
+        vectors = dict(zip(unique_texts, embed_fn(unique_texts))) if unique_texts else {}
+        return [vectors[text] for text in texts], {"hits": 0, "misses": len(texts), "embedded": len(unique_texts)}
+
+    model, dimension = embedding_model_key(embeddings_client)
+    found = cache.get_many(model, dimension, texts)
+    hits = sum(1 for text in texts if text in found)
+    missing = [text for text in dict.fromkeys(texts) if text not in found]
+    if missing:
+        created = dict(zip(missing, embed_fn(missing)))
+        cache.put_many(model, dimension, {text: vector for text, vector in created.items() if vector is not None})
+        found.update(created)
+    return [found[text] for text in texts], {"hits": hits, "misses": len(texts) - hits, "embedded": len(missing)}
+
+def embed_texts_cached(embeddings_client, texts: Sequence[str]) -> List[List[float]]:
+    """embed_documents_cached에서 벡터 리스트만 반환합니다."""
+    return embed_documents_cached(embeddings_client, texts)[0]
+
+def checklist_texts() -> List[str]:
+    """check/check_data.py의 체크리스트 항목 텍스트 목록 (중복 제거)."""
+    from check.check_data import tech_sections, QA_sections
+
+    texts = []
+    for sections in (tech_sections, QA_sections):
+        for items in sections.values():
+            texts.extend(items)
+    return list(dict.fromkeys(texts))
+
+def prewarm_embedding_cache(embeddings_client=None, texts: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """
+    자주 묻는 텍스트의 임베딩을 미리 캐시에 채웁니다.
+
+    Args:
+        embeddings_client: 임베딩 클라이언트 (없으면 새로 생성)
+        texts: 미리 임베딩할 텍스트 (없으면 체크리스트 항목)
+
+    Returns:
+        {"requested": 텍스트 수, "cached": 이미 있던 수, "embedded": 새로 만든 수}
+    """
+    texts = list(dict.fromkeys(texts if texts is not None else checklist_texts()))
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return {"requested": len(texts), "cached": 0, "embedded": 0}
+
+    if embeddings_client is None:
+        from file.upstage import create_embeddings_client
+        embeddings_client = create_embeddings_client()
+        if embeddings_client is None:
+            return {"requested": len(texts), "cached": 0, "embedded": 0}
+
+    model, dimension = embedding_model_key(embeddings_client)
+    cached = len(cache.get_many(model, dimension, texts))
+    embed_texts_cached(embeddings_client, texts)
+    return {"requested": len(texts), "cached": cached, "embedded": len(texts) - cached}
+
+_prewarm_started = False
+
+def prewarm_on_startup() -> bool:
+    """
+    EMBEDDING_CACHE_PREWARM=true면 체크리스트 임베딩 프리웜을 백그라운드 스레드로 한 번 시작합니다.
+
+    Returns:
+        이번 호출에서 프리웜을 시작했으면 True
+    """
+    global _prewarm_started
+
+    if os.getenv("EMBEDDING_CACHE_PREWARM", "false").lower() != "true":
+        return False
+    with _cache_lock:
+        if _prewarm_started:
+            return False
+        _prewarm_started = True
+
+    def run():
+        try:
+            result = prewarm_embedding_cache()
+            print(f"🔥 임베딩 캐시 프리웜 완료: {result['embedded']}개 생성, {result['cached']}개 기존")
+        except Exception as e:
+            print(f"⚠️ 임베딩 캐시 프리웜 실패: {e}")
+
+    threading.Thread(target=run, name="embedding-cache-prewarm", daemon=True).start()
+    return True
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="임베딩 캐시 관리")
+    parser.add_argument("command", choices=["prewarm", "stats", "clear"])
+    args = parser.parse_args()
+
+    cache = get_embedding_cache()
+    if cache is None:
+        raise SystemExit("❌ 임베딩 캐시가 비활성화되어 있거나 열 수 없습니다.")
+
+    if args.command == "prewarm":
+        result = prewarm_embedding_cache()
+        print(f"✅ 체크리스트 {result['requested']}개 중 {result['embedded']}개 임베딩 생성 (기존 {result['cached']}개)")
+    elif args.command == "clear":
+        cache.clear()
+        print("🗑️ 임베딩 캐시를 비웠습니다.")
+
+    stats = cache.stats()
+    print(f"📦 {stats['path']}: {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f} MB / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
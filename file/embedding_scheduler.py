@@ -0,0 +1,344 @@
+from typing import List, Dict, Any, Optional, Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import os
+import random
+import threading
+import time
+import requests
+
+# 임베딩 요청 스케줄러
+#
+# 청크를 토큰 수 기준 배치로 묶고, Azure TPM/RPM 할당량에 맞춘 토큰 버킷 아래에서
+# 여러 배치를 동시에 보냅니다. 429/5xx는 배치 단위로 백오프 재시도하고,
+# 재시도할 수 없는 오류(400 등)는 배치를 반으로 나눠 문제 청크만 실패로 표시합니다.
+# 임베딩 함수(embed_fn)는 주입할 수 있으므로 make_http_embed_fn으로 로컬 가짜 서버에 붙여 테스트할 수 있습니다.
+
+EmbedFunction = Callable[[List[str]], List[List[float]]]
+
+# 모델 입력 하나의 최대 토큰 수 (text-embedding-ada-002 / text-embedding-3-*)
+MAX_INPUT_TOKENS = 8191
+
+# 재시도할 HTTP 상태 코드
+RETRY_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """tiktoken cl100k_base 인코딩 (tiktoken이 없거나 로드에 실패하면 None)."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = None
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수를 셉니다.
+
+    tiktoken이 없으면 UTF-8 바이트 수 / 3으로 추정합니다
+    (한글은 글자당 대략 1토큰이므로 글자 수 / 4보다 보수적인 값).
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text.encode("utf-8")) // 3 + 1
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """텍스트를 max_tokens 이하로 자릅니다."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    limit = max(0, (max_tokens - 1) * 3)
+    return text.encode("utf-8")[:limit].decode("utf-8", errors="ignore")
+
+def pack_token_batches(
+    token_counts: Sequence[int],
+    max_batch_tokens: int,
+    max_batch_size: int
+) -> List[List[int]]:
+    """
+    입력 순서를 유지하면서 토큰 합과 개수 상한을 넘지 않도록 위치 목록을 배치로 묶습니다.
+
+    한 입력이 max_batch_tokens보다 크면 단독 배치가 됩니다.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for position, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > max_batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(position)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TokenBucket:
+    """
+    분당 한도(rate_per_minute)를 일정 속도로 채우는 토큰 버킷 (스레드 안전).
+
+    Azure OpenAI는 분당 할당량을 10초 단위로도 검사하므로 버스트 크기(capacity)는
+    기본적으로 분당 한도의 1/6입니다.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_minute / 6.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """amount만큼 사용할 수 있을 때까지 기다립니다. 기다린 시간(초)을 반환합니다."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate_per_second
+            time.sleep(delay)
+            waited += delay
+
+
+def _error_status(error: Exception) -> Optional[int]:
+    """openai/requests 예외에서 HTTP 상태 코드를 꺼냅니다."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """응답의 Retry-After 헤더(초)를 읽습니다."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name in ("retry-after-ms", "retry-after"):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) / 1000.0 if name.endswith("ms") else float(value)
+            except ValueError:
+                pass
+    return None
+
+def _is_retryable(error: Exception) -> bool:
+    status = _error_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    # 상태 코드가 없는 연결 오류/타임아웃 (requests, openai 공통)
+    name = type(error).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class EmbeddingScheduler:
+    """
+    토큰 배치, 속도 제한, 동시 실행, 배치별 재시도를 담당하는 임베딩 스케줄러.
+
+    Args:
+        embed_fn: 텍스트 리스트를 받아 같은 순서의 벡터 리스트를 반환하는 함수
+            (예: embeddings_client.embed_documents, make_http_embed_fn(...))
+        tokens_per_minute: 임베딩 배포의 TPM 할당량
+        requests_per_minute: 임베딩 배포의 RPM 할당량
+        max_batch_tokens: 요청 하나에 담을 최대 토큰 수
+        max_batch_size: 요청 하나에 담을 최대 입력 수
+        max_workers: 동시에 보낼 요청 수
+        max_retries: 배치별 재시도 횟수
+        backoff: 재시도 백오프 기본 초 (재시도마다 2배, 최대 60초)
+        max_input_tokens: 입력 하나의 최대 토큰 수 (넘으면 잘라서 임베딩하고 truncated에 기록)
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFunction,
+        tokens_per_minute: int = 120_000,
+        requests_per_minute: int = 720,
+        max_batch_tokens: int = 8_000,
+        max_batch_size: int = 64,
+        max_workers: int = 4,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        max_input_tokens: int = MAX_INPUT_TOKENS
+    ):
+        self.embed_fn = embed_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_input_tokens = max_input_tokens
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, embed_fn: EmbedFunction, **overrides) -> "EmbeddingScheduler":
+        """
+        환경변수로 설정한 스케줄러를 만듭니다.
+
+        환경변수:
+            AZURE_OPENAI_EMBEDDING_TPM / AZURE_OPENAI_EMBEDDING_RPM: 배포 할당량 (기본 120000 / 720)
+            EMBEDDING_BATCH_TOKENS / EMBEDDING_BATCH_SIZE: 배치 상한 (기본 8000 / 64)
+            EMBEDDING_MAX_WORKERS: 동시 요청 수 (기본 4)
+            EMBEDDING_MAX_RETRIES: 배치별 재시도 횟수 (기본 5)
+        """
+        config = {
+            "tokens_per_minute": int(os.getenv("AZURE_OPENAI_EMBEDDING_TPM", "120000")),
+            "requests_per_minute": int(os.getenv("AZURE_OPENAI_EMBEDDING_RPM", "720")),
+            "max_batch_tokens": int(os.getenv("EMBEDDING_BATCH_TOKENS", "8000")),
+            "max_batch_size": int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+            "max_workers": int(os.getenv("EMBEDDING_MAX_WORKERS", "4")),
+            "max_retries": int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+        }
+        config.update(overrides)
+        return cls(embed_fn, **config)
+
+    def embed(self, texts: Sequence[str]) -> Dict[str, Any]:
+        """
+        텍스트 목록을 임베딩합니다. 일부가 실패해도 나머지 결과는 반환합니다.
+
+        Returns:
+            {
+                "embeddings": 입력 순서대로의 벡터 (실패한 위치는 None),
+                "failures": [{"index", "status", "error"}] 실패한 입력 목록,
+                "truncated": 잘라서 임베딩한 입력 위치 목록,
+                "requests": 보낸 요청 수(재시도, 분할 포함), "retries": 재시도 횟수,
+                "throttled_seconds": 속도 제한으로 기다린 시간 합, "elapsed": 전체 소요 시간(초)
+            }
+        """
+        started = time.time()
+        texts = list(texts)
+        outcome = {
+            "embeddings": [None] * len(texts),
+            "failures": [],
+            "truncated": [],
+            "requests": 0,
+            "retries": 0,
+            "throttled_seconds": 0.0,
+            "elapsed": 0.0
+        }
+        if not texts:
+            return outcome
+
+        inputs = []
+        token_counts = []
+        for position, text in enumerate(texts):
+            tokens = count_tokens(text)
+            if tokens > self.max_input_tokens:
+                text = truncate_to_tokens(text, self.max_input_tokens)
+                tokens = count_tokens(text)
+                outcome["truncated"].append(position)
+            inputs.append(text)
+            token_counts.append(tokens)
+
+        batches = pack_token_batches(token_counts, self.max_batch_tokens, self.max_batch_size)
+
+        def run(batch):
+            self._run_batch(batch, inputs, token_counts, outcome)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            list(executor.map(run, batches))
+
+        outcome["failures"].sort(key=lambda failure: failure["index"])
+        outcome["elapsed"] = round(time.time() - started, 3)
+        return outcome
+
+    def _run_batch(
+        self,
+        batch: List[int],
+        inputs: List[str],
+        token_counts: List[int],
+        outcome: Dict[str, Any]
+    ):
+        """배치 하나를 재시도하며 실행하고, 재시도할 수 없는 오류면 반으로 나눠 다시 시도합니다."""
+        batch_tokens = sum(token_counts[position] for position in batch)
+
+        for attempt in range(self.max_retries + 1):
+            throttled = self.request_bucket.acquire(1) + self.token_bucket.acquire(batch_tokens)
+            with self._stats_lock:
+                outcome["requests"] += 1
+                outcome["throttled_seconds"] += throttled
+
+            try:
+                vectors = self.embed_fn([inputs[position] for position in batch])
+                if len(vectors) != len(batch):
+                    raise ValueError(f"임베딩 수({len(vectors)})가 입력 수({len(batch)})와 다릅니다.")
+                for position, vector in zip(batch, vectors):
+                    outcome["embeddings"][position] = vector
+                return
+            except Exception as e:
+                if _is_retryable(e) and attempt < self.max_retries:
+                    delay = _retry_after(e)
+                    if delay is None:
+                        delay = min(60.0, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                    with self._stats_lock:
+                        outcome["retries"] += 1
+                    time.sleep(delay)
+                    continue
+
+                if len(batch) > 1 and not _is_retryable(e):
+                    # 입력 하나 때문에 배치 전체가 거부된 경우 문제 입력만 골라냄
+                    middle = len(batch) // 2
+                    self._run_batch(batch[:middle], inputs, token_counts, outcome)
+                    self._run_batch(batch[middle:], inputs, token_counts, outcome)
+                    return
+
+                with self._stats_lock:
+                    for position in batch:
+                        outcome["failures"].append({
+                            "index": position,
+                            "status": _error_status(e),
+                            "error": str(e)
+                        })
+                print(f"❌ 임베딩 배치 실패 ({len(batch)}개 입력): {e}")
+                return
+
+
+def make_http_embed_fn(
+    endpoint: Optional[str] = None,
+    deployment: Optional[str] = None,
+    api_key: Optional[str] = None,
+    api_version: Optional[str] = None,
+    timeout: float = 60.0
+) -> EmbedFunction:
+    """
+    Azure OpenAI 임베딩 REST API를 직접 호출하는 embed_fn을 만듭니다.
+
+    {endpoint}/openai/deployments/{deployment}/embeddings 경로를 사용하므로
+    같은 경로를 흉내 내는 로컬 가짜 서버에도 붙일 수 있습니다.
+    인자가 없으면 create_embeddings_client와 같은 환경변수를 사용합니다.
+    """
+    endpoint = (endpoint or os.getenv("AZURE_OPENAI_ENDPOINT", "")).rstrip("/")
+    deployment = deployment or os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT")
+    api_key = api_key or os.getenv("AZURE_OPENAI_API_KEY", "")
+    api_version = api_version or os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+    url = f"{endpoint}/openai/deployments/{deployment}/embeddings"
+    session = requests.Session()
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        response = session.post(
+            url,
+            params={"api-version": api_version},
+            headers={"api-key": api_key},
+            json={"input": texts},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        return [item["embedding"] for item in data]
+
+    return embed
@@ -0,0 +1,474 @@
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from collections import deque
+from html.entities import html5
+from html.parser import HTMLParser
+import argparse
+import json
+import re
+import time
+
+# 한 번의 스트리밍 파싱으로 청크, 감지된 헤더, 페이지 구간을 함께 만드는 HTML 청커
+#
+# 표준 라이브러리 HTMLParser 이벤트로 h1/h2/h3/p/footer 요소의 텍스트를 모으고,
+# 요소가 닫히는 대로 청크에 반영합니다. BeautifulSoup 트리를 만들지 않으며
+# 청크 본문은 문자열 누적(+=) 대신 조각 리스트로 모은 뒤 한 번에 합칩니다.
+# compat=True면 기존 extract_chunks_from_html(BeautifulSoup 버전)과 정확히 같은 청크를 만듭니다.
+
+CHUNK_TAGS = frozenset(["h1", "h2", "h3", "p", "footer"])
+
+# "숫자.숫자" 형태로 시작하는 모든 섹션 (예: "1.1", "2.3", "7.3.5")
+SECTION_PATTERN = re.compile(r'^\d+\.\d+(\s|$)')
+
+# use_dynamic_headers=False일 때 사용하는 기본 헤더
+DEFAULT_HEADERS = ("1.0 GENERAL", "2.0 SCOPE OF SUPPLY", "3.0", "4.0", "5.0")
+
+# 자식을 갖지 않는 요소 (BeautifulSoup html.parser 빌더와 같은 목록)
+_VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer"
+])
+
+# get_text()에 포함되지 않는 문자열을 담는 요소
+_NON_TEXT_TAGS = frozenset(["script", "style", "template"])
+
+# 헤더 앞의 섹션 번호 (예: "7.3.5 TESTING" -> "7.3.5")
+_SECTION_ID_PATTERN = re.compile(r'^\d+(?:\.\d+)+')
+
+
+class ChunkRecord:
+    """
+    구조화된 청크 하나 (페이지 표시가 붙은 문자열 청크 대신 사용).
+
+    Attributes:
+        section_id: 헤더의 섹션 번호 (예: "7.3.5", 번호가 없으면 None)
+        header: 섹션 헤더 텍스트
+        start_page / end_page: 청크가 걸친 페이지 (페이지 번호를 못 찾으면 None)
+        start_offset / end_offset: 원본 HTML에서의 문자 위치 (헤더 요소 시작 ~ 다음 헤더 요소 시작)
+        text: 헤더와 본문 ("[페이지 N]" 표시 없음)
+    """
+
+    __slots__ = ("section_id", "header", "start_page", "end_page", "start_offset", "end_offset", "text")
+
+    def __init__(
+        self,
+        section_id: Optional[str],
+        header: str,
+        start_page: Optional[int],
+        end_page: Optional[int],
+        start_offset: int,
+        end_offset: int,
+        text: str
+    ):
+        self.section_id = section_id
+        self.header = header
+        self.start_page = start_page
+        self.end_page = end_page
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.text = text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChunkRecord":
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def __eq__(self, other):
+        if not isinstance(other, ChunkRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return (
+            f"ChunkRecord(section_id={self.section_id!r}, pages={self.start_page}-{self.end_page}, "
+            f"offsets={self.start_offset}-{self.end_offset}, text={self.text[:40]!r})"
+        )
+
+def section_id_of(header: str) -> Optional[str]:
+    """헤더 텍스트에서 섹션 번호를 꺼냅니다."""
+    match = _SECTION_ID_PATTERN.match(header)
+    return match.group(0) if match else None
+
+
+# BeautifulSoup(html.parser)과 같은 개체 참조 표: 세미콜론을 뗀 이름 -> 문자
+_ENTITY_TO_CHARACTER: Dict[str, str] = {}
+for _name, _character in sorted(html5.items()):
+    _ENTITY_TO_CHARACTER.setdefault(_name.rstrip(";"), _character)
+
+_NUMERIC_REFERENCE_PATTERNS = {
+    10: re.compile(r"^([0-9]+)(.*)", re.DOTALL),
+    16: re.compile(r"^([0-9a-f]+)(.*)", re.DOTALL),
+}
+
+
+def _numeric_reference_text(name: str) -> str:
+    """
+    숫자 문자 참조(&#...;)를 BeautifulSoup과 같은 규칙으로 텍스트로 바꿉니다.
+
+    세미콜론 없이 뒤에 글자가 붙은 경우 앞쪽 숫자만 참조로 보고 나머지는 그대로 두며,
+    0/서로게이트/범위 밖 값은 U+FFFD, 0x80~0x9F는 Windows-1252 문자로 바꿉니다.
+    """
+    base = 10
+    if name[:1] in ("x", "X"):
+        name, base = name[1:], 16
+    extra = ""
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = _NUMERIC_REFERENCE_PATTERNS[base].search(name)
+        if match is None:
+            return name
+        number, extra = int(match.group(1), base), match.group(2)
+
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd" + extra
+    if 0x80 <= number <= 0x9F:
+        try:
+            return bytes([number]).decode("cp1252") + extra
+        except UnicodeDecodeError:
+            pass
+    return chr(number) + extra
+
+
+class _ElementCollector(HTMLParser):
+    """
+    h1/h2/h3/p/footer 요소를 문서 순서대로 (태그, 텍스트, 시작 위치)로 내보내는 파서.
+
+    텍스트는 BeautifulSoup get_text(strip=True)와 같이 연속된 문자열 조각마다
+    strip한 뒤 빈 조각을 빼고 이어 붙입니다. 요소가 중첩되면 바깥 요소가 먼저 나옵니다.
+    개체 참조도 BeautifulSoup처럼 직접 풀어 씁니다 (모르는 이름은 "&이름"으로 남김).
+    """
+
+    def __init__(self, line_offsets: List[int]):
+        super().__init__(convert_charrefs=False)
+        self.ready: "deque[Tuple[str, str, int]]" = deque()
+        self._line_offsets = line_offsets
+        self._stack: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        self._open_records: List[Dict[str, Any]] = []
+        self._pending: "deque[Dict[str, Any]]" = deque()
+        self._data: List[str] = []
+        self._non_text_depth = 0
+
+    def _position(self) -> int:
+        """현재 태그의 문서 시작 기준 문자 위치 (getpos()의 (줄, 열)을 변환)."""
+        line, column = self.getpos()
+        return self._line_offsets[line - 1] + column
+
+    def _flush_data(self):
+        if not self._data:
+            return
+        text = "".join(self._data).strip()
+        self._data = []
+        if text and not self._non_text_depth:
+            for record in self._open_records:
+                record["parts"].append(text)
+
+    def _start(self, tag: str, closes_immediately: bool):
+        self._flush_data()
+        record = None
+        if tag in CHUNK_TAGS:
+            record = {"tag": tag, "parts": [], "done": False, "start": self._position()}
+            self._pending.append(record)
+        if closes_immediately or tag in _VOID_TAGS:
+            if record is not None:
+                record["done"] = True
+                self._release()
+            return
+        if tag in _NON_TEXT_TAGS:
+            self._non_text_depth += 1
+        self._stack.append((tag, record))
+        if record is not None:
+            self._open_records.append(record)
+
+    def _close_until(self, tag: str):
+        if not any(name == tag for name, _ in self._stack):
+            return  # 열리지 않은 태그의 닫는 태그는 무시 (BeautifulSoup과 동일)
+        while self._stack:
+            name, record = self._stack.pop()
+            if name in _NON_TEXT_TAGS:
+                self._non_text_depth -= 1
+            if record is not None:
+                record["done"] = True
+                self._open_records.remove(record)
+            if name == tag:
+                break
+        self._release()
+
+    def _release(self):
+        """앞선 요소가 모두 닫힌 요소부터 문서 순서대로 내보냅니다."""
+        while self._pending and self._pending[0]["done"]:
+            record = self._pending.popleft()
+            self.ready.append((record["tag"], "".join(record["parts"]), record["start"]))
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, closes_immediately=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, closes_immediately=True)
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        self._close_until(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_entityref(self, name):
+        self._data.append(_ENTITY_TO_CHARACTER.get(name, "&" + name))
+
+    def handle_charref(self, name):
+        self._data.append(_numeric_reference_text(name))
+
+    def handle_comment(self, data):
+        self._flush_data()
+
+    def handle_decl(self, decl):
+        self._flush_data()
+
+    def handle_pi(self, data):
+        self._flush_data()
+
+    def unknown_decl(self, data):
+        # BeautifulSoup처럼 CDATA 섹션은 앞뒤와 분리된 별도 문자열로 텍스트에 포함하고
+        # 나머지 선언(<![if ...]> 등)은 텍스트에서 제외
+        self._flush_data()
+        if data.upper().startswith("CDATA["):
+            self._data.append(data[len("CDATA["):])
+            self._flush_data()
+
+    def finish(self):
+        """문서 끝: 남은 요소를 모두 닫습니다."""
+        self.close()
+        self._flush_data()
+        while self._stack:
+            self._close_until(self._stack[-1][0])
+
+
+def iter_html_elements(html_content: str, feed_size: int = 64 * 1024) -> Iterator[Tuple[str, str, int]]:
+    """
+    HTML을 feed_size 문자씩 파서에 넣으면서 닫힌 요소를 바로 내보냅니다.
+
+    Yields:
+        (태그 이름, get_text(strip=True)와 같은 텍스트, 요소 시작 문자 위치)
+    """
+    line_offsets = [0]
+    line_offsets.extend(match.end() for match in re.finditer("\n", html_content))
+    collector = _ElementCollector(line_offsets)
+
+    for start in range(0, len(html_content), feed_size):
+        collector.feed(html_content[start:start + feed_size])
+        while collector.ready:
+            yield collector.ready.popleft()
+
+    collector.finish()
+    while collector.ready:
+        yield collector.ready.popleft()
+
+def chunk_html(
+    html_content: str,
+    use_dynamic_headers: bool = True,
+    compat: bool = True
+) -> Dict[str, Any]:
+    """
+    HTML을 한 번 파싱해 청크, 감지된 헤더, 청크별 페이지 구간을 함께 반환합니다.
+
+    페이지 번호 요소(footer 또는 세 자리 이하 숫자 p)는 해당 페이지의 끝에 온다고 보고,
+    페이지 번호 앞에 있는 내용을 그 페이지로 계산합니다.
+
+    Args:
+        html_content: HTML 문자열
+        use_dynamic_headers: True면 "숫자.숫자" 패턴으로 헤더 감지, False면 기본 헤더 목록 사용
+        compat: True면 기존 extract_chunks_from_html과 같은 청크 문자열("\n[페이지 N]" 포함),
+            False면 페이지 표시 없이 본문만 (페이지는 page_spans로 확인)
+
+    Returns:
+        {
+            "chunks": 청크 문자열 목록,
+            "detected_headers": "숫자.숫자" 패턴과 일치한 모든 요소 텍스트 (use_dynamic_headers와 무관),
+            "page_spans": 청크별 {"start_page", "end_page"} (페이지 번호를 못 찾으면 None),
+            "offsets": 청크별 {"start", "end"} 원본 HTML 문자 위치 (헤더 요소 시작 ~ 다음 헤더 요소 시작),
+            "records": 같은 순서의 ChunkRecord 목록 (text에는 페이지 표시 없음)
+        }
+    """
+    chunks: List[str] = []
+    page_spans: List[Dict[str, Optional[int]]] = []
+    offsets: List[Dict[str, int]] = []
+    detected_headers: List[str] = []
+    bodies: List[Tuple[str, str]] = []
+
+    parts: List[str] = []
+    chunk_start = 0
+    current_page: Optional[str] = None
+    span: Dict[str, Optional[int]] = {}
+    # 마지막 페이지 번호 뒤에 내용이 있어 다음 페이지 번호가 나와야 끝 페이지를 알 수 있는 구간
+    waiting_spans: List[Dict[str, Optional[int]]] = []
+    content_after_page = False
+
+    def finish_chunk(end: int):
+        text = "\n".join(parts)
+        bodies.append((parts[0], text.strip()))
+        if compat and current_page:
+            text += f"\n[페이지 {current_page}]"
+        chunks.append(text.strip())
+        page_spans.append(span)
+        offsets.append({"start": chunk_start, "end": end})
+        if content_after_page:
+            waiting_spans.append(span)
+
+    for tag, text, position in iter_html_elements(html_content):
+        # footer 또는 p 태그의 세 자리 이하 숫자는 페이지 번호
+        if text and text.isdigit() and (tag == "footer" or (len(text) <= 3 and tag == "p")):
+            current_page = text
+            page = int(text)
+            for waiting in waiting_spans:
+                if waiting["start_page"] is None:
+                    waiting["start_page"] = page
+                waiting["end_page"] = page
+            waiting_spans = []
+            if parts:
+                if span["start_page"] is None:
+                    span["start_page"] = page
+                span["end_page"] = page
+                content_after_page = False
+            continue
+
+        if not text:
+            continue
+
+        is_header_pattern = bool(SECTION_PATTERN.match(text))
+        if is_header_pattern:
+            detected_headers.append(text)
+
+        if use_dynamic_headers:
+            is_section_header = is_header_pattern
+        else:
+            is_section_header = any(text.startswith(header) for header in DEFAULT_HEADERS)
+
+        if is_section_header:
+            if parts:
+                finish_chunk(position)
+            parts = [text]
+            chunk_start = position
+            span = {"start_page": None, "end_page": None}
+            content_after_page = True
+        elif parts:
+            parts.append(text)
+            content_after_page = True
+
+    if parts:
+        finish_chunk(len(html_content))
+
+    # 페이지 구간은 뒤에 나오는 페이지 번호로 채워지므로 마지막에 레코드를 만듭니다
+    records = [
+        ChunkRecord(
+            section_id=section_id_of(header),
+            header=header,
+            start_page=span["start_page"],
+            end_page=span["end_page"],
+            start_offset=offset["start"],
+            end_offset=offset["end"],
+            text=text
+        )
+        for (header, text), span, offset in zip(bodies, page_spans, offsets)
+    ]
+
+    return {
+        "chunks": chunks,
+        "detected_headers": detected_headers,
+        "page_spans": page_spans,
+        "offsets": offsets,
+        "records": records
+    }
+
+def extract_chunks_legacy(html_content: str, use_dynamic_headers: bool = True) -> List[str]:
+    """기존 BeautifulSoup 구현 (compat 모드 검증용)."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    chunks = []
+    current_chunk = ""
+    collecting = False
+    current_page = None
+
+    for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'footer']):
+        text = tag.get_text(strip=True)
+        if tag.name == 'footer' and text and text.isdigit():
+            current_page = text
+            continue
+        elif text and text.isdigit() and len(text) <= 3 and tag.name == 'p':
+            current_page = text
+            continue
+        if not text:
+            continue
+        if use_dynamic_headers:
+            is_section_header = SECTION_PATTERN.match(text)
+        else:
+            is_section_header = any(text.startswith(header) for header in DEFAULT_HEADERS)
+        if is_section_header:
+            if current_chunk:
+                if current_page:
+                    current_chunk += f"\n[페이지 {current_page}]"
+                chunks.append(current_chunk.strip())
+            current_chunk = text
+            collecting = True
+        elif collecting:
+            current_chunk += "\n" + text
+
+    if current_chunk:
+        if current_page:
+            current_chunk += f"\n[페이지 {current_page}]"
+        chunks.append(current_chunk.strip())
+    return chunks
+
+def verify_compat(html_content: str) -> Dict[str, Any]:
+    """
+    compat 모드 결과가 기존 구현과 같은지 확인하고 두 구현의 소요 시간을 비교합니다.
+
+    Returns:
+        {"identical": bool, "chunks": 청크 수, "legacy_seconds", "streaming_seconds", "first_mismatch": 위치 또는 None}
+    """
+    report = {}
+    for use_dynamic_headers in (True, False):
+        started = time.perf_counter()
+        legacy = extract_chunks_legacy(html_content, use_dynamic_headers)
+        legacy_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        streaming = chunk_html(html_content, use_dynamic_headers, compat=True)["chunks"]
+        streaming_seconds = time.perf_counter() - started
+
+        mismatch = next(
+            (i for i, (a, b) in enumerate(zip(legacy, streaming)) if a != b),
+            None if len(legacy) == len(streaming) else min(len(legacy), len(streaming))
+        )
+        if use_dynamic_headers:
+            report = {
+                "identical": mismatch is None,
+                "chunks": len(streaming),
+                "legacy_seconds": round(legacy_seconds, 4),
+                "streaming_seconds": round(streaming_seconds, 4),
+                "first_mismatch": mismatch
+            }
+        elif mismatch is not None:
+            report["identical"] = False
+            report["first_mismatch"] = report["first_mismatch"] if report["first_mismatch"] is not None else mismatch
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="스트리밍 청커와 기존 청커의 결과/속도 비교")
+    parser.add_argument("path", help="processed_*.json (content.html 포함) 또는 HTML 파일")
+    args = parser.parse_args()
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    html = json.loads(raw)["content"]["html"] if args.path.endswith(".json") else raw
+
+    report = verify_compat(html)
+    status = "✅ 동일" if report["identical"] else f"❌ 불일치 (청크 {report['first_mismatch']})"
+    print(
+        f"{status}: 청크 {report['chunks']}개, "
+        f"기존 {report['legacy_seconds']}초 / 스트리밍 {report['streaming_seconds']}초"
+    )
@@ -0,0 +1,388 @@
+from opensearchpy import OpenSearch
+from opensearchpy.exceptions import NotFoundError
+from typing import List, Dict, Any, Optional, Callable
+from datetime import datetime, timedelta
+import copy
+import re
+from file.search_cache import bump_index_generation
+
+# 읽기/쓰기 alias 뒤에 "{alias}-v{n}" 이름의 세대(generation) 인덱스를 두고,
+# 새 세대를 채운 뒤 alias를 원자적으로 전환하는 blue/green 재구축 유틸리티
+
+
+def generation_index_name(alias: str, version: int) -> str:
+    """alias와 버전 번호로 세대 인덱스 이름을 만듭니다."""
+    return f"{alias}-v{version}"
+
+def get_alias_targets(client: OpenSearch, alias: str) -> List[str]:
+    """alias가 현재 가리키는 인덱스 목록을 반환합니다. alias가 없으면 빈 목록입니다."""
+    try:
+        return sorted(client.indices.get_alias(name=alias).keys())
+    except NotFoundError:
+        return []
+
+def is_concrete_index(client: OpenSearch, name: str) -> bool:
+    """name이 alias가 아닌 실제 인덱스인지 확인합니다 (alias 도입 전 인덱스 감지용)."""
+    return client.indices.exists(index=name) and not client.indices.exists_alias(name=name)
+
+def list_index_generations(client: OpenSearch, alias: str) -> List[Dict[str, Any]]:
+    """
+    alias의 세대 인덱스 목록을 버전 순으로 반환합니다.
+
+    Returns:
+        [{"index", "version", "docs_count", "created_at", "is_live"}, ...]
+    """
+    pattern = re.compile(rf"^{re.escape(alias)}-v(\d+)$")
+    live = set(get_alias_targets(client, alias))
+
+    try:
+        rows = client.cat.indices(
+            index=f"{alias}-v*",
+            format="json",
+            h="index,docs.count,creation.date"
+        )
+    except NotFoundError:
+        rows = []
+
+    generations = []
+    for row in rows:
+        match = pattern.match(row.get("index", ""))
+        if not match:
+            continue
+        created_ms = row.get("creation.date")
+        generations.append({
+            "index": row["index"],
+            "version": int(match.group(1)),
+            "docs_count": int(row.get("docs.count") or 0),
+            "created_at": datetime.fromtimestamp(int(created_ms) / 1000) if created_ms else None,
+            "is_live": row["index"] in live
+        })
+
+    return sorted(generations, key=lambda generation: generation["version"])
+
+def get_live_mappings(client: OpenSearch, alias: str) -> Optional[Dict[str, Any]]:
+    """alias(또는 같은 이름의 기존 인덱스)가 가리키는 인덱스의 mappings를 반환합니다. 없으면 None."""
+    try:
+        response = client.indices.get_mapping(index=alias)
+    except NotFoundError:
+        return None
+    # alias는 한 번에 하나의 세대만 가리킴
+    for mapping in response.values():
+        return mapping.get("mappings", {})
+    return None
+
+def vector_encoding_of(mappings: Dict[str, Any]) -> str:
+    """embedding 필드 매핑의 저장 인코딩 ("float" | "fp16" | "byte")을 반환합니다."""
+    embedding = mappings.get("properties", {}).get("embedding", {})
+    if embedding.get("data_type") == "byte":
+        return "byte"
+    encoder = embedding.get("method", {}).get("parameters", {}).get("encoder", {})
+    if encoder.get("name") == "sq" and encoder.get("parameters", {}).get("type") == "fp16":
+        return "fp16"
+    return "float"
+
+def inherit_live_vector_settings(client: OpenSearch, alias: str, index_body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    현재 세대의 벡터를 reindex로 복사할 새 세대 본문에 현재 세대의 양자화 보정 정보를 옮깁니다.
+
+    reindex는 저장된 벡터 값을 그대로 복사하므로 벡터 인코딩이나 양자화 모드가 바뀌는 재구축
+    (예: float → int8)은 거부합니다. 이 경우 reindex_from_live=False와 fill_fn으로 다시 임베딩해야 합니다.
+
+    Returns:
+        _meta.quantization이 현재 세대 값(mode, scale)으로 채워진 새 본문 (원본은 바꾸지 않음)
+    """
+    live = get_live_mappings(client, alias)
+    if live is None:
+        return index_body
+
+    new_mappings = index_body.get("mappings", {})
+    live_encoding, new_encoding = vector_encoding_of(live), vector_encoding_of(new_mappings)
+    live_quantization = live.get("_meta", {}).get("quantization")
+    new_quantization = new_mappings.get("_meta", {}).get("quantization")
+    live_mode = (live_quantization or {}).get("mode")
+    new_mode = (new_quantization or {}).get("mode")
+    if live_encoding != new_encoding or live_mode != new_mode:
+        raise ValueError(
+            f"{alias}의 벡터 인코딩/양자화({live_encoding}/{live_mode})와 새 세대({new_encoding}/{new_mode})가 달라 "
+            "reindex로 복사할 수 없습니다. reindex_from_live=False와 fill_fn으로 다시 임베딩해 채우세요."
+        )
+
+    if not live_quantization:
+        return index_body
+    body = copy.deepcopy(index_body)
+    body["mappings"].setdefault("_meta", {})["quantization"] = dict(live_quantization)
+    return body
+
+def create_index_generation(client: OpenSearch, alias: str, index_body: Dict[str, Any]) -> str:
+    """
+    다음 버전 번호로 새 세대 인덱스를 생성합니다. alias는 연결하지 않습니다.
+
+    Returns:
+        생성된 인덱스 이름
+    """
+    generations = list_index_generations(client, alias)
+    version = generations[-1]["version"] + 1 if generations else 1
+    index_name = generation_index_name(alias, version)
+
+    body = {key: value for key, value in index_body.items() if key != "aliases"}
+    client.indices.create(index=index_name, body=body)
+    print(f"✅ 새 세대 인덱스 생성: {index_name}")
+    return index_name
+
+def ensure_alias_index(client: OpenSearch, alias: str, index_body: Dict[str, Any]) -> Optional[str]:
+    """
+    alias(또는 alias 도입 전의 같은 이름 인덱스)가 없으면 첫 세대를 만들고 alias를 연결합니다.
+
+    Returns:
+        새로 만든 인덱스 이름, 이미 있으면 None
+    """
+    if client.indices.exists(index=alias):
+        return None
+
+    index_name = generation_index_name(alias, 1)
+    body = dict(index_body)
+    body["aliases"] = {alias: {"is_write_index": True}}
+    client.indices.create(index=index_name, body=body)
+    print(f"✅ 인덱스 생성됨: {index_name} (alias: {alias})")
+    return index_name
+
+def fill_generation_from_live(
+    client: OpenSearch,
+    alias: str,
+    target_index: str,
+    query: Optional[Dict[str, Any]] = None,
+    request_timeout: int = 3600
+) -> int:
+    """
+    현재 alias(또는 같은 이름의 기존 인덱스)의 문서를 새 세대로 reindex 합니다.
+
+    Returns:
+        복사된 문서 수
+    """
+    source = {"index": alias}
+    if query:
+        source["query"] = query
+
+    response = client.reindex(
+        body={"source": source, "dest": {"index": target_index}},
+        wait_for_completion=True,
+        refresh=True,
+        request_timeout=request_timeout
+    )
+
+    failures = response.get("failures") or []
+    if failures:
+        raise RuntimeError(f"reindex 중 {len(failures)}건 실패: {failures[0]}")
+
+    copied = response.get("created", 0) + response.get("updated", 0)
+    print(f"📦 {alias} -> {target_index}: {copied}개 문서 복사")
+    return copied
+
+def warm_index_generation(
+    client: OpenSearch,
+    index_name: str,
+    warm_queries: Optional[List[Dict[str, Any]]] = None
+):
+    """
+    alias 전환 전에 새 세대를 refresh 하고 검색 경로를 미리 데워둡니다.
+
+    문서 하나의 임베딩으로 kNN 검색을 한 번 실행해 그래프를 메모리에 올리고,
+    warm_queries로 전달된 검색 본문도 순서대로 실행합니다.
+    """
+    client.indices.refresh(index=index_name)
+
+    # native 엔진(faiss 등)은 warmup API로 그래프를 미리 적재 (lucene은 지원하지 않아 무시)
+    try:
+        client.transport.perform_request("GET", f"/_plugins/_knn/warmup/{index_name}")
+    except Exception:
+        pass
+
+    queries = list(warm_queries or [])
+    try:
+        sample = client.search(
+            index=index_name,
+            body={"size": 1, "query": {"exists": {"field": "embedding"}}, "_source": ["embedding"]}
+        )
+        hits = sample["hits"]["hits"]
+        if hits and hits[0]["_source"].get("embedding"):
+            queries.insert(0, {
+                "size": 1,
+                "query": {"knn": {"embedding": {"vector": hits[0]["_source"]["embedding"], "k": 1}}},
+                "_source": False
+            })
+    except Exception as e:
+        print(f"⚠️ 워밍용 샘플 조회 실패: {e}")
+
+    for body in queries:
+        try:
+            client.search(index=index_name, body=body)
+        except Exception as e:
+            print(f"⚠️ 워밍 쿼리 실패: {e}")
+
+    print(f"🔥 {index_name} 워밍 완료 ({len(queries)}개 쿼리)")
+
+def preserve_legacy_index(client: OpenSearch, alias: str) -> str:
+    """
+    alias 도입 전의 같은 이름 인덱스를 "{alias}-v0" 세대로 복제합니다.
+
+    alias와 인덱스는 이름을 공유할 수 없어 전환 시 원본은 지워야 하므로, 복제본을 이전 세대로 남겨
+    되돌릴 수 있게 하고 이후 cleanup_index_generations가 보존 정책에 따라 지우게 합니다.
+    clone은 세그먼트를 하드 링크로 복사해 reindex보다 빠르고 매핑/설정을 그대로 유지하지만
+    원본에 쓰기 차단이 필요합니다 (복제본에서는 해제).
+
+    Returns:
+        복제된 세대 인덱스 이름
+    """
+    legacy_index = generation_index_name(alias, 0)
+    if client.indices.exists(index=legacy_index):
+        raise ValueError(f"{legacy_index}가 이미 있어 기존 인덱스 {alias}를 보존할 수 없습니다.")
+
+    client.indices.put_settings(index=alias, body={"index.blocks.write": True})
+    try:
+        client.indices.clone(
+            index=alias,
+            target=legacy_index,
+            body={"settings": {"index.blocks.write": None}},
+            wait_for_active_shards="all"
+        )
+    except Exception:
+        client.indices.put_settings(index=alias, body={"index.blocks.write": None})
+        raise
+
+    print(f"📦 기존 인덱스 {alias}를 {legacy_index}로 보존")
+    return legacy_index
+
+def _release_legacy_index(client: OpenSearch, alias: str, legacy_index: str):
+    """alias 전환이 실패하면 기존 인덱스의 쓰기 차단을 풀고 복제본을 지웁니다."""
+    try:
+        client.indices.put_settings(index=alias, body={"index.blocks.write": None})
+        client.indices.delete(index=legacy_index)
+    except Exception as e:
+        print(f"⚠️ 기존 인덱스 {alias} 복구 실패: {e}")
+
+def switch_index_alias(client: OpenSearch, alias: str, new_index: str) -> List[str]:
+    """
+    alias를 new_index로 원자적으로 전환합니다.
+
+    alias 도입 전에 같은 이름의 실제 인덱스가 있었다면 "{alias}-v0" 세대로 복제해 둔 뒤
+    같은 요청에서 원본을 삭제합니다 (alias와 인덱스는 이름을 공유할 수 없기 때문).
+
+    Returns:
+        이전에 alias가 가리키던 인덱스 목록 (기존 인덱스를 보존했다면 그 복제본 포함)
+    """
+    previous = [index for index in get_alias_targets(client, alias) if index != new_index]
+    legacy_index = preserve_legacy_index(client, alias) if is_concrete_index(client, alias) else None
+
+    actions = [{"remove": {"index": index, "alias": alias}} for index in previous]
+    if legacy_index:
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": new_index, "alias": alias, "is_write_index": True}})
+
+    try:
+        client.indices.update_aliases(body={"actions": actions})
+    except Exception:
+        if legacy_index:
+            _release_legacy_index(client, alias, legacy_index)
+        raise
+
+    bump_index_generation()
+    print(f"🔀 alias {alias} -> {new_index} 전환 완료")
+    return previous + ([legacy_index] if legacy_index else [])
+
+def cleanup_index_generations(
+    client: OpenSearch,
+    alias: str,
+    keep_generations: int = 2,
+    max_age_days: Optional[int] = None
+) -> List[str]:
+    """
+    보존 정책에 따라 오래된 세대 인덱스를 삭제합니다.
+
+    alias가 가리키는 세대는 항상 남기고, 최신 keep_generations개 세대도 남깁니다.
+    max_age_days가 주어지면 그보다 오래된 세대만 삭제 대상으로 봅니다.
+
+    Returns:
+        삭제된 인덱스 목록
+    """
+    generations = list_index_generations(client, alias)
+    retained = {generation["index"] for generation in generations[-max(1, keep_generations):]}
+    cutoff = datetime.now() - timedelta(days=max_age_days) if max_age_days is not None else None
+
+    deleted = []
+    for generation in generations:
+        if generation["is_live"] or generation["index"] in retained:
+            continue
+        if cutoff and generation["created_at"] and generation["created_at"] > cutoff:
+            continue
+        try:
+            client.indices.delete(index=generation["index"])
+            deleted.append(generation["index"])
+            print(f"🗑️ 이전 세대 인덱스 삭제: {generation['index']}")
+        except Exception as e:
+            print(f"⚠️ 세대 인덱스 {generation['index']} 삭제 실패: {e}")
+
+    return deleted
+
+def rebuild_index(
+    client: OpenSearch,
+    alias: str,
+    index_body: Dict[str, Any],
+    reindex_from_live: bool = True,
+    fill_fn: Optional[Callable[[OpenSearch, str], Any]] = None,
+    warm_queries: Optional[List[Dict[str, Any]]] = None,
+    keep_generations: int = 2,
+    max_age_days: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    검색 중단 없이 인덱스를 재구축합니다 (blue/green).
+
+    reindex로 복사하는 경우 새 세대는 현재 세대의 양자화 보정 정보(_meta.quantization)를 그대로
+    이어받고, 벡터 인코딩이 바뀌는 재구축은 시작 전에 거부합니다 (inherit_live_vector_settings).
+
+    1. "{alias}-v{n}" 새 세대 인덱스 생성
+    2. 현재 alias에서 reindex 하거나 fill_fn(client, 새 인덱스 이름)으로 채움
+    3. refresh 및 워밍
+    4. alias를 새 세대로 원자적 전환
+    5. 보존 정책에 따라 이전 세대 정리 (alias 도입 전 인덱스는 "{alias}-v0" 세대로 남아 같은 정책을 따름)
+
+    전환 전까지 모든 검색은 기존 세대를 읽습니다. 채우는 중 실패하면 새 세대를 지우고
+    기존 세대를 그대로 둡니다. reindex 시작 이후 alias로 들어온 쓰기는 새 세대에
+    반영되지 않으므로 재구축 중에는 저장을 멈추는 것이 안전합니다.
+
+    Args:
+        client: OpenSearch 클라이언트
+        alias: 검색/저장에 쓰는 alias 이름
+        index_body: 새 세대 인덱스의 settings/mappings
+        reindex_from_live: True면 현재 alias의 문서를 새 세대로 복사
+        fill_fn: 새 세대를 채우는 콜백 (reindex 이후 추가로 실행)
+        warm_queries: 전환 전에 실행할 검색 본문 목록
+        keep_generations: 남겨둘 최신 세대 수
+        max_age_days: 이 일수보다 오래된 세대만 삭제
+
+    Returns:
+        {"index", "previous", "copied", "deleted"}
+    """
+    if reindex_from_live and client.indices.exists(index=alias):
+        index_body = inherit_live_vector_settings(client, alias, index_body)
+
+    new_index = create_index_generation(client, alias, index_body)
+    copied = 0
+
+    try:
+        if reindex_from_live and client.indices.exists(index=alias):
+            copied = fill_generation_from_live(client, alias, new_index)
+        if fill_fn is not None:
+            fill_fn(client, new_index)
+        warm_index_generation(client, new_index, warm_queries)
+    except Exception:
+        print(f"❌ 새 세대 {new_index} 준비 실패, 기존 인덱스를 유지합니다.")
+        try:
+            client.indices.delete(index=new_index)
+        except Exception:
+            pass
+        raise
+
+    previous = switch_index_alias(client, alias, new_index)
+    deleted = cleanup_index_generations(client, alias, keep_generations, max_age_days)
+
+    return {"index": new_index, "previous": previous, "copied": copied, "deleted": deleted}
@@ -0,0 +1,235 @@
+from typing import List, Dict, Any, Optional
+import os
+
+# 청크 인덱스의 settings/mappings를 한 곳에서 관리하는 스키마 레지스트리
+# 프로필 이름으로 엔진, HNSW 파라미터, 벡터 인코딩, 샤드/레플리카 수를 고릅니다.
+
+EMBEDDING_DIMENSION = 1536
+
+# 벡터 인코딩별 차원당 바이트 수
+_BYTES_PER_DIMENSION = {"float": 4, "fp16": 2, "byte": 1}
+
+_BASE_PROFILE = {
+    "description": "",
+    "engine": "lucene",              # lucene | faiss
+    "space_type": "cosinesimil",
+    "m": 16,                         # HNSW 노드당 연결 수
+    "ef_construction": 100,          # 그래프 생성 시 후보 수
+    "ef_search": None,               # 검색 시 후보 수 (None이면 엔진 기본값: faiss 100, lucene k)
+    "vector_encoding": "float",      # float | fp16 (faiss sq 인코더) | byte (int8 입력 필요)
+    "quantization": None,            # 클라이언트 측 변환 모드 (file.quantization 참고)
+    "dimension": EMBEDDING_DIMENSION,
+    "number_of_shards": 1,
+    "number_of_replicas": 1,
+    "refresh_interval": "1s",
+    "bulk_refresh_interval": "-1"    # bulk 저장 중 refresh_interval (None이면 변경하지 않음)
+}
+
+INDEX_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {
+        "description": "기존 인덱스와 같은 설정 (lucene, HNSW 기본값, float32)"
+    },
+    "low-latency": {
+        "description": "faiss 네이티브 그래프, 작은 ef_search로 검색 지연 최소화",
+        "engine": "faiss",
+        "m": 16,
+        "ef_construction": 128,
+        "ef_search": 64
+    },
+    "low-memory": {
+        "description": "faiss fp16 스칼라 양자화와 작은 m으로 그래프 메모리 절감",
+        "engine": "faiss",
+        "m": 8,
+        "ef_construction": 100,
+        "ef_search": 100,
+        "vector_encoding": "fp16",
+        "quantization": "fp16"
+    },
+    "int8": {
+        "description": "코퍼스 보정 int8 스칼라 양자화 (lucene byte 벡터, 메모리 약 1/4)",
+        "engine": "lucene",
+        "vector_encoding": "byte",
+        "quantization": "int8"
+    },
+    "high-recall": {
+        "description": "큰 m/ef_construction/ef_search로 재현율 우선 (메모리, 색인 시간, 검색 지연 증가)",
+        "engine": "lucene",
+        "m": 32,
+        "ef_construction": 256,
+        "ef_search": 256
+    }
+}
+
+# metadata 아래 문자열 필드는 keyword로 매핑해 검색 범위(term filter)에 쓸 수 있게 합니다
+CHUNK_DYNAMIC_TEMPLATES: List[Dict[str, Any]] = [
+    {
+        "metadata_strings": {
+            "path_match": "metadata.*",
+            "match_mapping_type": "string",
+            "mapping": {"type": "keyword"}
+        }
+    }
+]
+
+CHUNK_FIELD_MAPPINGS: Dict[str, Any] = {
+    "chunk_id": {"type": "integer"},
+    "content": {"type": "text"},
+    "document_name": {"type": "keyword"},
+    "content_hash": {"type": "keyword"},
+    "timestamp": {"type": "date"},
+    "metadata": {"type": "object"},
+    # 구조화 청크(ChunkRecord) 필드: 섹션/페이지 범위 검색용
+    "section_id": {"type": "keyword"},
+    "section_header": {"type": "keyword"},
+    "start_page": {"type": "integer"},
+    "end_page": {"type": "integer"},
+    "start_offset": {"type": "integer"},
+    "end_offset": {"type": "integer"}
+}
+
+# 기존 인덱스에 나중에 추가할 수 있는 필드 (put_mapping 대상)
+CHUNK_RECORD_FIELDS = ("section_id", "section_header", "start_page", "end_page", "start_offset", "end_offset")
+
+
+def get_index_profile(name: Optional[str] = None, **overrides) -> Dict[str, Any]:
+    """
+    이름으로 인덱스 프로필을 가져옵니다.
+
+    Args:
+        name: 프로필 이름 (없으면 OPENSEARCH_INDEX_PROFILE 환경변수, 그것도 없으면 "default")
+        **overrides: 프로필 값을 덮어쓸 항목 (예: number_of_replicas=0)
+
+    Returns:
+        기본값이 채워진 프로필 딕셔너리 ("name" 포함)
+    """
+    name = name or os.getenv("OPENSEARCH_INDEX_PROFILE", "default")
+    if name not in INDEX_PROFILES:
+        raise ValueError(f"알 수 없는 인덱스 프로필: {name} (사용 가능: {', '.join(INDEX_PROFILES)})")
+
+    profile = {**_BASE_PROFILE, **INDEX_PROFILES[name], **overrides, "name": name}
+
+    if profile["engine"] not in ("lucene", "faiss"):
+        raise ValueError(f"지원하지 않는 엔진: {profile['engine']}")
+    if profile["vector_encoding"] not in _BYTES_PER_DIMENSION:
+        raise ValueError(f"지원하지 않는 벡터 인코딩: {profile['vector_encoding']}")
+    if profile["vector_encoding"] == "fp16" and profile["engine"] != "faiss":
+        raise ValueError("fp16 인코딩은 faiss 엔진에서만 사용할 수 있습니다.")
+    if profile["vector_encoding"] == "byte" and profile["quantization"] != "int8":
+        raise ValueError("byte 인코딩은 int8 양자화된 벡터가 필요합니다 (quantization=\"int8\").")
+
+    return profile
+
+def build_embedding_mapping(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """프로필에 맞는 knn_vector 필드 매핑을 만듭니다."""
+    parameters = {
+        "m": profile["m"],
+        "ef_construction": profile["ef_construction"]
+    }
+    if profile["vector_encoding"] == "fp16":
+        parameters["encoder"] = {"name": "sq", "parameters": {"type": "fp16"}}
+
+    mapping = {
+        "type": "knn_vector",
+        "dimension": profile["dimension"],
+        "method": {
+            "name": "hnsw",
+            "space_type": profile["space_type"],
+            "engine": profile["engine"],
+            "parameters": parameters
+        }
+    }
+    if profile["vector_encoding"] == "byte":
+        mapping["data_type"] = "byte"
+
+    return mapping
+
+def build_index_body(profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    프로필로 청크 인덱스 생성 본문(settings/mappings)을 만듭니다.
+
+    Args:
+        profile: get_index_profile() 결과 (없으면 기본 프로필)
+    """
+    profile = profile or get_index_profile()
+
+    settings = {
+        "number_of_shards": profile["number_of_shards"],
+        "number_of_replicas": profile["number_of_replicas"],
+        "refresh_interval": profile["refresh_interval"],
+        "index.knn": True  # KNN 플러그인 활성화
+    }
+    meta = {"index_profile": profile["name"]}
+    if profile["ef_search"] is not None:
+        if profile["engine"] == "faiss":
+            settings["index.knn.algo_param.ef_search"] = profile["ef_search"]
+        else:
+            # lucene은 ef_search 인덱스 설정이 없어 검색 시 kNN 쿼리의 method_parameters로 보냅니다 (OpenSearch 2.16 이상)
+            meta["method_parameters"] = {"ef_search": profile["ef_search"]}
+    if profile["quantization"]:
+        # int8 스케일은 코퍼스 표본(rebuild_chunk_index) 또는 빈 인덱스의 첫 저장 배치로 한 번만 계산해 채워집니다
+        meta["quantization"] = {"mode": profile["quantization"]}
+
+    return {
+        "settings": settings,
+        "mappings": {
+            "_meta": meta,
+            "dynamic_templates": CHUNK_DYNAMIC_TEMPLATES,
+            "properties": {
+                **CHUNK_FIELD_MAPPINGS,
+                "embedding": build_embedding_mapping(profile)
+            }
+        }
+    }
+
+def estimate_graph_memory(profile: Dict[str, Any], num_vectors: int = 1_000_000) -> Dict[str, Any]:
+    """
+    HNSW 그래프 + 벡터가 차지하는 네이티브 메모리를 추정합니다.
+
+    OpenSearch k-NN 문서의 추정식 1.1 * (차원당 바이트 * dimension + 8 * m) * 벡터 수를 사용합니다.
+
+    Returns:
+        {"bytes_per_vector", "total_bytes", "total_gib", "cluster_gib"(레플리카 포함)}
+    """
+    bytes_per_vector = 1.1 * (
+        _BYTES_PER_DIMENSION[profile["vector_encoding"]] * profile["dimension"] + 8 * profile["m"]
+    )
+    total_bytes = bytes_per_vector * num_vectors
+    copies = 1 + profile["number_of_replicas"]
+
+    return {
+        "bytes_per_vector": round(bytes_per_vector),
+        "total_bytes": round(total_bytes),
+        "total_gib": round(total_bytes / 1024 ** 3, 2),
+        "cluster_gib": round(total_bytes * copies / 1024 ** 3, 2)
+    }
+
+def describe_index_profiles(num_vectors: int = 1_000_000) -> List[Dict[str, Any]]:
+    """모든 프로필의 주요 설정과 num_vectors개 청크 기준 예상 메모리를 반환합니다."""
+    rows = []
+    for name in INDEX_PROFILES:
+        profile = get_index_profile(name)
+        rows.append({
+            "name": name,
+            "engine": profile["engine"],
+            "m": profile["m"],
+            "ef_construction": profile["ef_construction"],
+            "ef_search": profile["ef_search"],
+            "vector_encoding": profile["vector_encoding"],
+            "shards": profile["number_of_shards"],
+            "replicas": profile["number_of_replicas"],
+            **estimate_graph_memory(profile, num_vectors),
+            "description": profile["description"]
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    print("📐 인덱스 프로필별 예상 그래프 메모리 (청크 100만 개 기준)")
+    print("-" * 80)
+    for row in describe_index_profiles():
+        print(
+            f"{row['name']:<12} {row['engine']:<6} m={row['m']:<3} "
+            f"ef_c={row['ef_construction']:<4} {row['vector_encoding']:<6} "
+            f"{row['total_gib']:>6.2f} GiB/copy, {row['cluster_gib']:>6.2f} GiB 전체"
+        )
+        print(f"    {row['description']}")
@@ -0,0 +1,458 @@
+from typing import List, Dict, Any, Optional, Callable
+import argparse
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from datetime import datetime
+from dotenv import load_dotenv
+from file.upstage import process_document_with_upstage, extract_chunks_from_html, generate_embeddings_with_cache
+from file.chunk_budget import budget_chunk_records, chunk_budget_enabled
+from file.parse_cache import file_sha256
+from file.search import create_opensearch_client, save_chunks_to_opensearch, refresh_index
+from file.html_chunker import ChunkRecord
+from file.blob_store import get_blob_store, store_embeddings, load_embeddings
+
+load_dotenv()
+
+# 디렉터리(또는 매니페스트)의 문서를 한꺼번에 적재하는 배치 CLI
+#
+# parse(Upstage) → chunk → embed → index 네 단계를 크기가 정해진 큐로 잇고 단계마다 워커 수를 따로 둡니다.
+# 느린 단계(파싱, 임베딩)는 여러 문서를 동시에 처리하고, 큐가 차면 앞 단계가 기다리므로
+# 메모리에는 큐 크기만큼의 문서만 올라옵니다.
+# 문서마다 마지막으로 끝낸 단계를 체크포인트 파일에 기록하고, 다시 실행하면 색인까지 끝난
+# (내용이 그대로인) 문서는 건너뜁니다. chunk/embed 단계의 결과(청크 레코드, 임베딩)는 결과 저장소
+# (file.blob_store)에 두고 참조를 체크포인트에 남기므로, 중간에 멈춘 문서는 끝낸 단계의 다음 단계부터
+# 이어갑니다. parse 단계의 HTML은 따로 남기지 않아 parse만 끝난 문서(또는 저장소에서 결과가 지워진 문서)는
+# 파싱부터 다시 하지만, 파싱 캐시 덕분에 Upstage API를 다시 호출하지 않습니다.
+#
+# 사용 예:
+#   python -m file.ingest specs/ --parse-workers 4 --embed-workers 2
+#   python -m file.ingest manifest.jsonl --index-name document-chunks
+
+SUPPORTED_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".bmp")
+
+STAGES = ("parse", "chunk", "embed", "index")
+
+DEFAULT_CHECKPOINT_PATH = ".ingest_checkpoint.json"
+
+# 단계 워커에게 입력이 끝났음을 알리는 표식
+_DONE = object()
+
+
+def discover_documents(source: str) -> List[Dict[str, Any]]:
+    """
+    적재할 문서 목록을 만듭니다.
+
+    Args:
+        source: 디렉터리(하위 폴더 포함, 지원 확장자만), 경로를 한 줄에 하나씩 적은 .txt,
+            또는 {"path", "document_name"?, "metadata"?}를 한 줄에 하나씩 적은 .jsonl
+
+    Returns:
+        [{"path", "document_name", "metadata"}] 경로 순서대로
+    """
+    documents = []
+    if os.path.isdir(source):
+        for root, _, names in os.walk(source):
+            for name in names:
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    documents.append({"path": os.path.join(root, name)})
+        documents.sort(key=lambda document: document["path"])
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                entry = json.loads(line) if source.endswith(".jsonl") else {"path": line}
+                # 매니페스트 기준 상대 경로 허용
+                entry["path"] = os.path.join(base, entry["path"])
+                documents.append(entry)
+
+    for document in documents:
+        document.setdefault("document_name", os.path.basename(document["path"]))
+        document.setdefault("metadata", {})
+    return documents
+
+
+class IngestCheckpoint:
+    """
+    문서별 적재 상태를 JSON 파일에 기록합니다 (단계가 끝날 때마다 원자적으로 저장).
+
+    상태: {"sha256", "stage": 마지막으로 끝낸 단계, "status": "running" | "done" | "failed",
+           "error", "chunks", "updated_at",
+           "chunk_records_ref", "metadata": chunk 단계 결과, "embeddings_ref": embed 단계 결과}
+    """
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._documents = json.load(f).get("documents", {})
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._documents.get(key)
+            return dict(state) if state else None
+
+    def is_done(self, key: str, sha256: str) -> bool:
+        state = self.get(key)
+        return bool(state) and state.get("status") == "done" and state.get("sha256") == sha256
+
+    def update(self, key: str, **fields):
+        with self._lock:
+            state = self._documents.setdefault(key, {})
+            state.update(fields)
+            state["updated_at"] = datetime.now().isoformat()
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"documents": self._documents}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {"done": 0, "failed": 0, "running": 0}
+            for state in self._documents.values():
+                counts[state.get("status", "running")] = counts.get(state.get("status", "running"), 0) + 1
+            return counts
+
+
+class StageStats:
+    """단계별 처리량 집계 (여러 워커 스레드에서 갱신)."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.documents = 0
+        self.failed = 0
+        self.units = 0
+        self.busy_seconds = 0.0
+        self.first_started: Optional[float] = None
+        self.last_finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, started: float, finished: float, units: int = 0, failed: bool = False):
+        with self._lock:
+            if failed:
+                self.failed += 1
+            else:
+                self.documents += 1
+                self.units += units
+            self.busy_seconds += finished - started
+            self.first_started = started if self.first_started is None else min(self.first_started, started)
+            self.last_finished = finished if self.last_finished is None else max(self.last_finished, finished)
+
+    def report(self) -> Dict[str, Any]:
+        active = (self.last_finished - self.first_started) if self.first_started is not None else 0.0
+        return {
+            "stage": self.name,
+            "documents": self.documents,
+            "failed": self.failed,
+            "units": self.units,
+            "unit": self.unit,
+            "busy_seconds": round(self.busy_seconds, 2),
+            "active_seconds": round(active, 2),
+            "documents_per_minute": round(self.documents / active * 60, 2) if active else 0.0,
+            "units_per_second": round(self.units / active, 2) if active else 0.0
+        }
+
+
+class IngestPipeline:
+    """
+    parse → chunk → embed → index 단계를 동시에 실행하는 배치 적재 파이프라인.
+
+    Args:
+        index_name: 저장할 인덱스(alias) 이름
+        checkpoint: 문서별 상태 기록 (없으면 DEFAULT_CHECKPOINT_PATH)
+        workers: 단계별 워커 수 {"parse": 2, "chunk": 1, "embed": 2, "index": 1}
+        queue_size: 단계 사이 큐의 최대 문서 수
+        parse_options: process_document_with_upstage에 넘길 추가 인자 (use_cache, parallel, ocr_precheck 등)
+    """
+
+    def __init__(
+        self,
+        index_name: str = "document-chunks",
+        checkpoint: Optional[IngestCheckpoint] = None,
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: int = 4,
+        parse_options: Optional[Dict[str, Any]] = None
+    ):
+        self.index_name = index_name
+        self.checkpoint = checkpoint or IngestCheckpoint()
+        self.workers = {"parse": 2, "chunk": 1, "embed": 2, "index": 1, **(workers or {})}
+        self.queue_size = max(1, queue_size)
+        self.parse_options = parse_options or {}
+        self.stats = {
+            "parse": StageStats("parse", "pages"),
+            "chunk": StageStats("chunk", "chunks"),
+            "embed": StageStats("embed", "chunks"),
+            "index": StageStats("index", "chunks")
+        }
+        self._client = None
+
+    # ---- 단계 처리 함수: 문서 항목(dict)을 받아 다음 단계로 넘길 항목을 반환 ----
+
+    def _parse(self, item: Dict[str, Any]) -> int:
+        result = process_document_with_upstage(item["path"], chunk_and_embed=False, **self.parse_options)
+        item["html"] = (result.get("content") or {}).get("html", "")
+        item["metadata"] = {
+            **item["metadata"],
+            "file_name": item["document_name"],
+            "file_size": os.path.getsize(item["path"])
+        }
+        return (result.get("usage") or {}).get("pages", 0)
+
+    def _chunk(self, item: Dict[str, Any]) -> int:
+        records = extract_chunks_from_html(item.pop("html"), as_records=True)
+        if chunk_budget_enabled():
+            records, _ = budget_chunk_records(records)
+        item["records"] = records
+        item["metadata"]["chunks_count"] = len(records)
+        return len(records)
+
+    def _embed(self, item: Dict[str, Any]) -> int:
+        embeddings, stats = generate_embeddings_with_cache([record.text for record in item["records"]])
+        if item["records"] and not any(embedding is not None for embedding in embeddings):
+            raise RuntimeError("임베딩 생성 실패")
+        if stats["failures"]:
+            print(f"⚠️ {item['document_name']}: {len(stats['failures'])}개 청크 임베딩 실패 (임베딩 없이 저장, 다음 실행에서 다시 임베딩)")
+        item["embeddings"] = embeddings
+        return len(item["records"])
+
+    def _index(self, item: Dict[str, Any]) -> int:
+        saved_ids = save_chunks_to_opensearch(
+            item["records"],
+            self._client,
+            item["document_name"],
+            metadata=item["metadata"],
+            embeddings=item["embeddings"],
+            index_name=self.index_name,
+            incremental=True,
+            refresh=False  # 전체 적재가 끝난 뒤 한 번만 refresh
+        )
+        if len(saved_ids) < len(item["records"]):
+            raise RuntimeError(f"{len(item['records']) - len(saved_ids)}개 청크 저장 실패")
+        return len(saved_ids)
+
+    # ---- 이어서 적재: 끝낸 단계의 결과를 체크포인트에 남기고 다시 읽음 ----
+
+    def _stage_outputs(self, stage: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """다음 실행이 이 단계 다음부터 이어갈 수 있도록 체크포인트에 남길 결과 참조."""
+        try:
+            if stage == "chunk":
+                data = json.dumps([record.to_dict() for record in item["records"]], ensure_ascii=False)
+                return {"chunk_records_ref": get_blob_store().put(data.encode("utf-8")), "metadata": item["metadata"]}
+            if stage == "embed":
+                return {"embeddings_ref": store_embeddings(item["embeddings"])}
+        except Exception as e:
+            # 남기지 못하면 다음 실행에서 파싱부터 다시 할 뿐이므로 적재는 계속
+            print(f"⚠️ {item['document_name']}: {stage} 단계 결과 저장 실패 ({str(e)})")
+        return {}
+
+    def _resume_stage(self, item: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> str:
+        """
+        이전 실행에서 끝낸 단계의 결과를 item에 채우고 들어갈 단계를 반환합니다.
+
+        chunk/embed 결과가 남아 있으면 그 다음 단계, 아니면 "parse".
+        """
+        stage = (previous or {}).get("stage")
+        if stage not in ("chunk", "embed"):
+            return "parse"
+        try:
+            data = get_blob_store().get(previous["chunk_records_ref"])
+            records = [ChunkRecord.from_dict(record) for record in json.loads(data)]
+            embeddings = load_embeddings(previous["embeddings_ref"]) if stage == "embed" else None
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            print(f"⚠️ {item['document_name']}: 저장된 {stage} 단계 결과를 읽지 못해 파싱부터 다시 합니다 ({str(e)})")
+            return "parse"
+        if embeddings is not None and len(embeddings) != len(records):
+            return "parse"
+
+        item["records"] = records
+        item["metadata"] = {**item["metadata"], **(previous.get("metadata") or {})}
+        if embeddings is not None:
+            item["embeddings"] = embeddings
+        return STAGES[STAGES.index(stage) + 1]
+
+    # ---- 실행 ----
+
+    def _worker(self, stage: str, handler: Callable[[Dict[str, Any]], int], inbox: queue.Queue, outbox: Optional[queue.Queue]):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            started = time.time()
+            try:
+                units = handler(item)
+            except Exception as e:
+                self.stats[stage].record(started, time.time(), failed=True)
+                self.checkpoint.update(item["key"], status="failed", error=f"{stage}: {str(e)}")
+                print(f"❌ [{stage}] {item['document_name']}: {str(e)}")
+                continue
+            self.stats[stage].record(started, time.time(), units)
+
+            missing = sum(1 for embedding in item.get("embeddings") or [] if embedding is None)
+            if outbox is None and missing:
+                # 임베딩 없이 저장된 청크는 벡터 검색에서 빠지므로 완료로 두지 않고
+                # chunk 단계로 되돌려 다음 실행이 embed부터 다시 하게 함 (성공한 임베딩은 캐시에서 재사용)
+                self.checkpoint.update(
+                    item["key"], stage="chunk", status="failed", embeddings_ref=None, chunks=units,
+                    error=f"embed: {missing}개 청크 임베딩 실패 (임베딩 없이 색인됨)"
+                )
+                print(f"⚠️ {item['document_name']}: {units}개 청크 색인, {missing}개는 임베딩 없이 저장 (다음 실행에서 다시 임베딩)")
+            elif outbox is None:
+                self.checkpoint.update(item["key"], stage=stage, status="done", error=None, chunks=units)
+                print(f"✅ {item['document_name']}: {units}개 청크 색인 완료")
+            else:
+                self.checkpoint.update(
+                    item["key"], stage=stage, status="running", error=None, **self._stage_outputs(stage, item)
+                )
+                outbox.put(item)
+
+    def run(self, documents: List[Dict[str, Any]], restart: bool = False) -> Dict[str, Any]:
+        """
+        문서들을 적재합니다.
+
+        Args:
+            documents: discover_documents 결과
+            restart: True면 체크포인트를 무시하고 모든 문서를 다시 적재 (False면 중간에 멈춘 문서는
+                chunk/embed 단계 결과가 남아 있으면 그 다음 단계부터 이어감)
+
+        Returns:
+            {"total", "skipped", "resumed", "stages": 단계별 StageStats.report(), "elapsed_seconds", "checkpoint": 상태별 문서 수}
+        """
+        started = time.time()
+        self._client = create_opensearch_client()
+
+        pending = []
+        skipped = 0
+        for document in documents:
+            key = os.path.abspath(document["path"])
+            sha256 = file_sha256(document["path"])
+            if not restart and self.checkpoint.is_done(key, sha256):
+                skipped += 1
+                continue
+            item = {**document, "key": key, "metadata": dict(document["metadata"])}
+            previous = self.checkpoint.get(key)
+            entry = "parse"
+            if not restart and previous and previous.get("sha256") == sha256:
+                entry = self._resume_stage(item, previous)
+                print(f"🔁 이어서 적재: {document['document_name']} (이전 단계: {previous.get('stage') or '없음'}, 시작 단계: {entry})")
+            if entry == "parse":
+                self.checkpoint.update(
+                    key, sha256=sha256, status="running", stage=None, error=None,
+                    chunk_records_ref=None, embeddings_ref=None, metadata=None
+                )
+            else:
+                self.checkpoint.update(key, status="running", error=None)
+            pending.append((entry, item))
+
+        resumed = sum(1 for entry, _ in pending if entry != "parse")
+        print(f"📚 적재 대상 {len(pending)}개 (이어서 {resumed}개, 완료되어 건너뜀 {skipped}개)")
+
+        handlers = {"parse": self._parse, "chunk": self._chunk, "embed": self._embed, "index": self._index}
+        queues = {stage: queue.Queue(maxsize=self.queue_size) for stage in STAGES}
+        threads = {}
+        for position, stage in enumerate(STAGES):
+            outbox = queues[STAGES[position + 1]] if position + 1 < len(STAGES) else None
+            threads[stage] = [
+                threading.Thread(
+                    target=self._worker,
+                    args=(stage, handlers[stage], queues[stage], outbox),
+                    name=f"ingest-{stage}-{i}",
+                    daemon=True
+                )
+                for i in range(max(1, self.workers[stage]))
+            ]
+            for thread in threads[stage]:
+                thread.start()
+
+        # 큐가 차면 여기서 기다리므로 파싱보다 앞서 문서를 쌓아두지 않음
+        # (이어서 적재하는 문서는 끝낸 단계의 다음 단계 큐로 바로 넣음)
+        for entry, item in pending:
+            queues[entry].put(item)
+
+        # 앞 단계 워커가 모두 끝나면 다음 단계 워커 수만큼 종료 표식을 보냄
+        for stage in STAGES:
+            for _ in threads[stage]:
+                queues[stage].put(_DONE)
+            for thread in threads[stage]:
+                thread.join()
+
+        if self.stats["index"].documents:
+            refresh_index(self._client, self.index_name)
+
+        return {
+            "total": len(documents),
+            "skipped": skipped,
+            "resumed": resumed,
+            "stages": [self.stats[stage].report() for stage in STAGES],
+            "elapsed_seconds": round(time.time() - started, 2),
+            "checkpoint": self.checkpoint.summary()
+        }
+
+
+def print_report(report: Dict[str, Any]):
+    print("-" * 80)
+    print(f"⏱️ 전체 {report['elapsed_seconds']}초, 문서 {report['total']}개 (건너뜀 {report['skipped']}개, 이어서 {report.get('resumed', 0)}개)")
+    for stage in report["stages"]:
+        print(
+            f"  {stage['stage']:<6} 완료 {stage['documents']:>4} / 실패 {stage['failed']:>3}  "
+            f"{stage['documents_per_minute']:>7} 문서/분  "
+            f"{stage['units_per_second']:>8} {stage['unit']}/초  "
+            f"(작업 {stage['busy_seconds']}초, 구간 {stage['active_seconds']}초)"
+        )
+    print(f"📒 체크포인트: {report['checkpoint']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="문서 배치 적재 (parse → chunk → embed → index)")
+    parser.add_argument("source", help="문서 디렉터리 또는 매니페스트(.txt 경로 목록, .jsonl)")
+    parser.add_argument("--index-name", default="document-chunks")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="문서별 상태 파일")
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="체크포인트를 무시하고 모두 다시 적재 (기본: 중간에 멈춘 문서는 끝낸 chunk/embed 단계 다음부터 이어감, "
+             "parse만 끝낸 문서는 파싱 캐시로 다시 파싱)"
+    )
+    parser.add_argument("--parse-workers", type=int, default=2)
+    parser.add_argument("--chunk-workers", type=int, default=1)
+    parser.add_argument("--embed-workers", type=int, default=2)
+    parser.add_argument("--index-workers", type=int, default=1)
+    parser.add_argument("--queue-size", type=int, default=4, help="단계 사이 큐의 최대 문서 수")
+    parser.add_argument("--no-parse-cache", action="store_true", help="파싱 캐시를 읽지 않고 다시 파싱")
+    parser.add_argument("--parallel-parse", action="store_true", help="대용량 PDF를 페이지 구간으로 나눠 병렬 파싱")
+    parser.add_argument("--ocr-precheck", action="store_true", help="텍스트 레이어가 있는 페이지는 OCR 생략")
+    args = parser.parse_args()
+
+    documents = discover_documents(args.source)
+    if not documents:
+        raise SystemExit(f"❌ 적재할 문서가 없습니다: {args.source}")
+
+    pipeline = IngestPipeline(
+        index_name=args.index_name,
+        checkpoint=IngestCheckpoint(args.checkpoint),
+        workers={
+            "parse": args.parse_workers,
+            "chunk": args.chunk_workers,
+            "embed": args.embed_workers,
+            "index": args.index_workers
+        },
+        queue_size=args.queue_size,
+        parse_options={
+            "use_cache": not args.no_parse_cache,
+            "parallel": args.parallel_parse or None,
+            "ocr_precheck": args.ocr_precheck or None
+        }
+    )
+    print_report(pipeline.run(documents, restart=args.restart))
@@ -0,0 +1,512 @@
+from typing import List, Dict, Any, Optional
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from file.upstage import process_document_with_upstage, postprocess_upstage_result, embed_result_chunks
+from file.html_chunker import ChunkRecord
+from file.search import create_opensearch_client, save_chunks_to_opensearch
+
+# 문서 처리(parse → chunk → embed → index) 백그라운드 작업 큐
+#
+# 작업 상태는 SQLite에, 업로드 파일과 처리 결과(gzip JSON)는 작업별 디렉터리에 저장합니다.
+# Streamlit 화면은 작업을 등록하고 상태만 읽으므로 처리 중에도 멈추지 않고,
+# 새로고침하거나 다른 사용자가 동시에 문서를 올려도 작업과 결과가 남습니다.
+# 워커는 Streamlit 프로세스 안의 스레드 풀(get_job_queue) 또는 별도 프로세스
+# (python -m file.jobs worker)로 실행할 수 있고, 작업 할당은 SQLite 트랜잭션으로 한 워커에만 갑니다.
+# 실행 중인 작업은 워커가 heartbeat_at을 주기적으로 갱신하므로, 오래 걸리는 작업과 워커가 죽어
+# 멈춘 작업을 구분해 멈춘 작업만 다시 대기열에 넣습니다.
+
+DEFAULT_JOBS_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bom_search", "jobs")
+
+JOB_STAGES = ("parse", "chunk", "embed", "index")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    file_size INTEGER NOT NULL,
+    input_path TEXT,
+    options TEXT NOT NULL,
+    stage TEXT,
+    progress TEXT NOT NULL,
+    result_path TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+_queue_lock = threading.Lock()
+_shared_queue: Optional["JobQueue"] = None
+
+# 작업별 API 키 (디스크에 남기지 않고 같은 프로세스의 워커에만 전달)
+# 성공한 작업의 키만 바로 지우고, 실패/재대기 작업의 키는 다시 시도할 수 있도록 purge까지 유지합니다.
+_job_secrets: Dict[str, str] = {}
+
+
+def job_api_key(job_id: str) -> Optional[str]:
+    """작업에 쓸 Upstage API 키 (작업별 키, 없으면 UPSTAGE_API_KEY 환경변수). 둘 다 없으면 None."""
+    if _job_secrets.get(job_id):
+        return _job_secrets[job_id]
+    env_api_key = os.getenv("UPSTAGE_API_KEY")
+    if env_api_key and env_api_key != "UPSTAGE_API_KEY":
+        return env_api_key
+    return None
+
+
+def _initial_progress() -> Dict[str, Any]:
+    return {stage: {"status": "pending"} for stage in JOB_STAGES}
+
+
+class JobStore:
+    """
+    SQLite 작업 테이블과 작업별 파일 디렉터리 (스레드/프로세스 간 공유 가능).
+
+    Args:
+        directory: 작업 DB(jobs.sqlite3)와 작업별 파일을 둘 디렉터리
+    """
+
+    def __init__(self, directory: str = DEFAULT_JOBS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # 작업 할당은 BEGIN IMMEDIATE로 직접 트랜잭션을 관리
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "jobs.sqlite3"),
+            check_same_thread=False,
+            timeout=30,
+            isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # heartbeat_at 이전에 만든 DB에는 컬럼 추가
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat_at" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id)
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["options"] = json.loads(job["options"])
+        job["progress"] = json.loads(job["progress"])
+        return job
+
+    def submit(self, data: bytes, file_name: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """업로드 파일을 작업 디렉터리에 저장하고 작업을 대기 상태로 등록합니다."""
+        job_id = uuid.uuid4().hex
+        job_dir = self._job_dir(job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        # 확장자를 유지해야 Upstage가 형식을 인식
+        input_path = os.path.join(job_dir, "input" + os.path.splitext(file_name)[1].lower())
+        with open(input_path, "wb") as f:
+            f.write(data)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, file_name, file_size, input_path, options, progress, created_at, updated_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, file_name, len(data), input_path, json.dumps(options or {}),
+                 json.dumps(_initial_progress()), now, now)
+            )
+        return job_id
+
+    def claim_next(self, worker: str) -> Optional[Dict[str, Any]]:
+        """가장 오래 기다린 작업 하나를 이 워커에 할당합니다. 없으면 None."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                now = time.time()
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, started_at = ?, updated_at = ?, heartbeat_at = ? "
+                    "WHERE id = ?",
+                    (worker, now, now, now, row["id"])
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._row_to_job(row)
+        job["status"] = "running"
+        return job
+
+    def update_stage(self, job_id: str, stage: str, status: str, **detail):
+        """단계 진행 상태를 기록합니다 (status: running | done | skipped | failed)."""
+        with self._lock:
+            row = self._conn.execute("SELECT progress FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            progress = json.loads(row["progress"])
+            progress[stage] = {"status": status, **detail}
+            now = time.time()
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ?, heartbeat_at = ? WHERE id = ?",
+                (stage, json.dumps(progress), now, now, job_id)
+            )
+
+    def heartbeat(self, job_id: str):
+        """실행 중인 작업의 워커가 살아 있음을 기록합니다 (단계가 길어도 멈춘 작업으로 보지 않도록)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                (time.time(), job_id)
+            )
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """작업을 끝냅니다. 결과는 gzip JSON으로 저장하고 입력 파일은 지웁니다."""
+        result_path = None
+        if result is not None:
+            result_path = os.path.join(self._job_dir(job_id), "result.json.gz")
+            with gzip.open(result_path, "wt", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT input_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result_path = ?, error = ?, input_path = ?, "
+                "updated_at = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", result_path, error,
+                 row["input_path"] if row and error else None, now, now, job_id)
+            )
+        # 실패한 작업은 다시 시도할 수 있도록 입력 파일을 남김
+        if row and row["input_path"] and not error:
+            try:
+                os.remove(row["input_path"])
+            except OSError:
+                pass
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 20, job_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """최근 등록 순으로 작업 목록을 반환합니다 (job_ids가 있으면 그 작업만)."""
+        with self._lock:
+            if job_ids is not None:
+                if not job_ids:
+                    return []
+                rows = self._conn.execute(
+                    f"SELECT * FROM jobs WHERE id IN ({','.join('?' * len(job_ids))}) ORDER BY created_at DESC",
+                    list(job_ids)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def load_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """끝난 작업의 처리 결과를 읽습니다."""
+        job = self.get(job_id)
+        if not job or not job["result_path"]:
+            return None
+        with gzip.open(job["result_path"], "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def retry(self, job_id: str) -> bool:
+        """실패한 작업을 (입력 파일이 남아 있으면) 다시 대기 상태로 돌립니다."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', error = NULL, stage = NULL, progress = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'failed' AND input_path IS NOT NULL",
+                (json.dumps(_initial_progress()), time.time(), job_id)
+            )
+            return cursor.rowcount > 0
+
+    def requeue_stale(self, max_age_seconds: float) -> int:
+        """
+        워커가 죽어 max_age_seconds 동안 heartbeat가 없는 실행 중 작업을 다시 대기 상태로 돌립니다.
+
+        시작 후 경과 시간이 아니라 마지막 heartbeat(없으면 updated_at) 기준이라,
+        살아 있는 워커가 처리 중인 오래 걸리는 작업은 다시 넣지 않습니다.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, stage = NULL, progress = ?, "
+                "updated_at = ?, heartbeat_at = NULL "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, updated_at) < ?",
+                (json.dumps(_initial_progress()), now, now - max_age_seconds)
+            )
+            return cursor.rowcount
+
+    def purge(self, max_age_days: float = 7) -> int:
+        """끝난 지 max_age_days가 지난 작업과 파일을 지웁니다."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            ).fetchall()
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+            )
+        for row in rows:
+            shutil.rmtree(self._job_dir(row["id"]), ignore_errors=True)
+            _job_secrets.pop(row["id"], None)
+        return len(rows)
+
+
+def run_job(store: JobStore, job: Dict[str, Any], heartbeat_seconds: Optional[float] = None):
+    """
+    작업 하나를 단계별로 실행하고 진행 상태와 결과를 store에 기록합니다.
+
+    청크는 있는데 임베딩이 하나도 만들어지지 않으면 색인하지 않고 작업을 실패로 끝냅니다
+    (입력 파일이 남으므로 다시 시도 가능).
+
+    options: {"use_cache", "parallel", "ocr_precheck"} (process_document_with_upstage 인자),
+             {"index": True, "index_name"}이면 처리 후 OpenSearch에 저장
+    heartbeat_seconds: 실행 중 heartbeat 간격 (기본 JOB_HEARTBEAT_SECONDS, 30초)
+    """
+    job_id = job["id"]
+    options = job["options"]
+    stage = "parse"
+    if heartbeat_seconds is None:
+        heartbeat_seconds = float(os.getenv("JOB_HEARTBEAT_SECONDS", "30"))
+    # 단계 하나가 오래 걸려도 heartbeat가 갱신되도록 작업이 끝날 때까지 별도 스레드에서 기록
+    job_finished = threading.Event()
+
+    def beat():
+        while not job_finished.wait(heartbeat_seconds):
+            try:
+                store.heartbeat(job_id)
+            except Exception as e:
+                print(f"⚠️ 작업 heartbeat 기록 실패 ({job_id}): {str(e)}")
+
+    threading.Thread(target=beat, name=f"job-heartbeat-{job_id[:8]}", daemon=True).start()
+    try:
+        store.update_stage(job_id, "parse", "running")
+        started = time.time()
+        result = process_document_with_upstage(
+            job["input_path"],
+            api_key=job_api_key(job_id),
+            use_cache=options.get("use_cache", True),
+            parallel=options.get("parallel"),
+            ocr_precheck=options.get("ocr_precheck"),
+            chunk_and_embed=False
+        )
+        store.update_stage(
+            job_id, "parse", "done",
+            pages=(result.get("usage") or {}).get("pages"),
+            cache_hit=result.get("parse_cache_hit"),
+            seconds=round(time.time() - started, 2)
+        )
+
+        stage = "chunk"
+        store.update_stage(job_id, "chunk", "running")
+        result = postprocess_upstage_result(result, embed=False)
+        if result.get("chunks_error"):
+            raise RuntimeError(result["chunks_error"])
+        store.update_stage(job_id, "chunk", "done", chunks=result.get("chunks_count", 0))
+
+        stage = "embed"
+        store.update_stage(job_id, "embed", "running", chunks=result.get("chunks_count", 0))
+        started = time.time()
+        result = embed_result_chunks(result)
+        if result.get("chunks_count") and not result.get("embeddings_count"):
+            # 임베딩 없이 색인하면 벡터 검색에서 빠진 문서가 완료로 보이므로 여기서 멈춤
+            raise RuntimeError(result.get("embeddings_error") or "임베딩 생성 실패")
+        store.update_stage(
+            job_id, "embed", "done",
+            embeddings=result.get("embeddings_count", 0),
+            cache_hits=result.get("embeddings_cache_hits"),
+            error=result.get("embeddings_error"),
+            seconds=round(time.time() - started, 2)
+        )
+
+        stage = "index"
+        if options.get("index") and result.get("chunk_records"):
+            store.update_stage(job_id, "index", "running")
+            saved_ids = save_chunks_to_opensearch(
+                [ChunkRecord.from_dict(record) for record in result["chunk_records"]],
+                create_opensearch_client(),
+                job["file_name"],
+                metadata={
+                    "file_name": job["file_name"],
+                    "file_size": job["file_size"],
+                    "chunks_count": len(result["chunk_records"])
+                },
+                embeddings=result.get("embeddings", []),
+                index_name=options.get("index_name", "document-chunks"),
+                incremental=True
+            )
+            result["saved_ids_count"] = len(saved_ids)
+            store.update_stage(job_id, "index", "done", saved=len(saved_ids))
+        else:
+            store.update_stage(job_id, "index", "skipped")
+
+        store.finish(job_id, result=result)
+        # 다시 실행할 일이 없으므로 키를 지움 (실패한 작업은 다시 시도를 위해 유지)
+        _job_secrets.pop(job_id, None)
+        print(f"✅ 작업 완료: {job['file_name']} ({job_id})")
+    except Exception as e:
+        store.update_stage(job_id, stage, "failed", error=str(e))
+        store.finish(job_id, error=f"{stage}: {str(e)}")
+        print(f"❌ 작업 실패: {job['file_name']} ({job_id}) - {stage}: {str(e)}")
+    finally:
+        job_finished.set()
+
+
+class JobQueue:
+    """
+    JobStore와 작업을 처리하는 워커 스레드 풀.
+
+    Args:
+        store: 작업 저장소
+        workers: 동시에 처리할 작업 수 (0이면 등록만 하고 처리는 별도 워커 프로세스가 담당)
+        poll_interval: 대기 작업이 없을 때 다시 확인하는 간격(초)
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, poll_interval: float = 1.0):
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self.stale_seconds = float(os.getenv("JOB_STALE_SECONDS", "300"))
+        self._stale_lock = threading.Lock()
+        self._last_stale_check = 0.0
+
+    def _requeue_stale(self):
+        """다른 워커(프로세스)가 죽어 멈춘 작업을 stale_seconds의 절반 간격으로 확인해 다시 대기열에 넣습니다."""
+        with self._stale_lock:
+            if time.time() - self._last_stale_check < self.stale_seconds / 2:
+                return
+            self._last_stale_check = time.time()
+        requeued = self.store.requeue_stale(self.stale_seconds)
+        if requeued:
+            print(f"🔁 멈춘 작업 {requeued}개를 다시 대기열에 넣었습니다.")
+
+    def start(self):
+        self._requeue_stale()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _loop(self):
+        worker = f"{os.getpid()}-{threading.current_thread().name}"
+        while not self._stop.is_set():
+            job = self.store.claim_next(worker)
+            if job is None:
+                self._requeue_stale()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            run_job(self.store, job)
+
+    def submit(
+        self,
+        data: bytes,
+        file_name: str,
+        options: Optional[Dict[str, Any]] = None,
+        api_key: Optional[str] = None
+    ) -> str:
+        """
+        작업을 등록하고 바로 작업 ID를 반환합니다.
+
+        api_key는 디스크에 저장하지 않으며 이 프로세스의 워커만 사용합니다
+        (별도 워커 프로세스는 UPSTAGE_API_KEY 환경변수를 사용).
+        """
+        job_id = self.store.submit(data, file_name, options)
+        if api_key:
+            _job_secrets[job_id] = api_key
+        self._wakeup.set()
+        return job_id
+
+    def retry(self, job_id: str, api_key: Optional[str] = None) -> bool:
+        """
+        실패한 작업을 다시 대기 상태로 돌립니다 (JobStore.retry).
+
+        api_key를 주면 이 작업의 키로 기억합니다 (처음 등록한 세션이 아니거나 키를 바꾼 경우).
+        """
+        if api_key:
+            _job_secrets[job_id] = api_key
+        retried = self.store.retry(job_id)
+        if retried:
+            self._wakeup.set()
+        return retried
+
+
+def get_job_queue() -> JobQueue:
+    """
+    프로세스에서 공유하는 작업 큐를 반환합니다 (처음 호출할 때 워커 시작).
+
+    환경변수:
+        JOBS_DIR: 작업 DB와 파일 디렉터리 (기본 ~/.cache/bom_search/jobs)
+        JOB_WORKERS: Streamlit 프로세스 안에서 돌릴 워커 수 (기본 2, 0이면 별도 워커 프로세스 사용)
+        JOB_STALE_SECONDS: heartbeat 없이 이 시간이 지난 실행 중 작업은 다시 대기열로 (기본 300)
+        JOB_HEARTBEAT_SECONDS: 실행 중 작업의 heartbeat 간격 (기본 30)
+    """
+    global _shared_queue
+    if _shared_queue is not None:
+        return _shared_queue
+    with _queue_lock:
+        if _shared_queue is None:
+            queue = JobQueue(
+                JobStore(os.getenv("JOBS_DIR", DEFAULT_JOBS_DIR)),
+                workers=int(os.getenv("JOB_WORKERS", "2"))
+            )
+            queue.start()
+            _shared_queue = queue
+    return _shared_queue
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="문서 처리 작업 큐")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = subparsers.add_parser("worker", help="작업을 처리하는 워커 프로세스 실행")
+    worker_parser.add_argument("--workers", type=int, default=2)
+    list_parser = subparsers.add_parser("list", help="최근 작업 목록")
+    list_parser.add_argument("--limit", type=int, default=20)
+    purge_parser = subparsers.add_parser("purge", help="오래된 작업 정리")
+    purge_parser.add_argument("--days", type=float, default=7)
+    args = parser.parse_args()
+
+    store = JobStore(os.getenv("JOBS_DIR", DEFAULT_JOBS_DIR))
+
+    if args.command == "worker":
+        job_queue = JobQueue(store, workers=args.workers)
+        job_queue.start()
+        print(f"👷 워커 {args.workers}개 실행 중 ({store.directory}), 종료: Ctrl+C")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("🛑 종료 중... (진행 중인 작업이 끝날 때까지 기다립니다)")
+            job_queue.stop()
+    elif args.command == "list":
+        for job in store.list_jobs(limit=args.limit):
+            stages = " ".join(f"{stage}:{job['progress'][stage]['status']}" for stage in JOB_STAGES)
+            print(f"{job['id'][:8]} {job['status']:<8} {job['file_name']:<40} {stages}")
+    elif args.command == "purge":
+        print(f"🗑️ {store.purge(args.days)}개 작업을 정리했습니다.")
@@ -0,0 +1,268 @@
+from opensearchpy import OpenSearch, Transport
+from opensearchpy.exceptions import TransportError, ConnectionError, ConnectionTimeout
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
+import atexit
+import os
+import random
+import asyncio
+import threading
+import time
+import weakref
+from dotenv import load_dotenv
+
+try:
+    from opensearchpy import AsyncOpenSearch
+except ImportError:  # aiohttp가 없으면 비동기 클라이언트만 사용할 수 없음
+    AsyncOpenSearch = None
+
+load_dotenv()
+
+# 프로세스 전체에서 공유하는 OpenSearch 클라이언트
+# urllib3 커넥션 풀을 재사용하므로 Streamlit 재실행마다 TLS 핸드셰이크를 다시 하지 않습니다.
+
+_client_lock = threading.Lock()
+_shared_client: Optional[OpenSearch] = None
+_shared_config: Optional[Tuple] = None
+
+# 설정이 바뀌어 교체된 클라이언트 [(종료 타이머, 클라이언트)]
+# 다른 스레드가 아직 들고 있을 수 있으므로 유예 시간이 지난 뒤(또는 종료 시) 닫습니다.
+_retired_clients: List[Tuple[threading.Timer, OpenSearch]] = []
+
+# 이벤트 루프별 AsyncOpenSearch 클라이언트 (aiohttp 세션은 생성된 루프에서만 사용할 수 있음)
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+_health_lock = threading.Lock()
+_health_cache: Dict[str, Any] = {}
+
+
+class BackoffTransport(Transport):
+    """
+    재시도 사이에 지수 백오프(+지터)를 두는 Transport.
+
+    기본 Transport는 실패 직후 바로 다음 노드로 재시도하므로, 과부하 상태의
+    클러스터에 요청이 몰립니다. 재시도 판단 기준(타임아웃, 연결 오류, retry_on_status)은
+    기본 Transport와 같습니다.
+    """
+
+    def __init__(self, *args, backoff_factor: float = 0.5, max_backoff: float = 10.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        # 재시도는 이 클래스에서 처리하고 기본 루프는 한 번만 시도
+        self.backoff_retries = self.max_retries
+        self.max_retries = 0
+
+    def _should_retry(self, error: TransportError) -> bool:
+        if isinstance(error, ConnectionTimeout):
+            return self.retry_on_timeout
+        if isinstance(error, ConnectionError):
+            return True
+        return error.status_code in self.retry_on_status
+
+    def perform_request(self, method: str, url: str, *args, **kwargs) -> Any:
+        for attempt in range(self.backoff_retries + 1):
+            try:
+                return super().perform_request(method, url, *args, **kwargs)
+            except TransportError as e:
+                if attempt == self.backoff_retries or not self._should_retry(e):
+                    raise
+                delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def _parse_hosts() -> List[Dict[str, Any]]:
+    """OPENSEARCH_HOSTS("host1:9200,host2:9200") 또는 OPENSEARCH_HOST/PORT로 호스트 목록을 만듭니다."""
+    default_port = int(os.getenv('OPENSEARCH_PORT', '9200'))
+    hosts_env = os.getenv('OPENSEARCH_HOSTS')
+    if not hosts_env:
+        return [{'host': os.getenv('OPENSEARCH_HOST', 'localhost'), 'port': default_port}]
+
+    hosts = []
+    for entry in hosts_env.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        hosts.append({'host': host, 'port': int(port) if port else default_port})
+    return hosts
+
+def _client_config() -> Tuple:
+    """환경변수에서 클라이언트 설정을 읽어 비교 가능한 튜플로 만듭니다."""
+    return (
+        tuple((host['host'], host['port']) for host in _parse_hosts()),
+        os.getenv('OPENSEARCH_USERNAME'),
+        os.getenv('OPENSEARCH_PASSWORD'),
+        os.getenv('OPENSEARCH_USE_SSL', 'true').lower() == 'true',
+        int(os.getenv('OPENSEARCH_POOL_MAXSIZE', '10')),
+        float(os.getenv('OPENSEARCH_TIMEOUT', '30')),
+        int(os.getenv('OPENSEARCH_MAX_RETRIES', '3')),
+        float(os.getenv('OPENSEARCH_RETRY_BACKOFF', '0.5')),
+        os.getenv('OPENSEARCH_SNIFF', 'false').lower() == 'true'
+    )
+
+def build_opensearch_client(config: Optional[Tuple] = None) -> OpenSearch:
+    """
+    설정으로 새 OpenSearch 클라이언트를 만듭니다 (공유하지 않음).
+
+    환경변수:
+        OPENSEARCH_HOST / OPENSEARCH_PORT 또는 OPENSEARCH_HOSTS (멀티 노드)
+        OPENSEARCH_POOL_MAXSIZE: 노드당 커넥션 풀 크기 (기본 10)
+        OPENSEARCH_TIMEOUT: 요청별 타임아웃 초 (기본 30)
+        OPENSEARCH_MAX_RETRIES: 타임아웃/연결 오류/502·503·504 재시도 횟수 (기본 3)
+        OPENSEARCH_RETRY_BACKOFF: 재시도 백오프 기본 초 (기본 0.5, 재시도마다 2배)
+        OPENSEARCH_SNIFF: true면 시작 시/연결 실패 시 노드 목록을 갱신 (관리형 서비스에서는 false)
+    """
+    (hosts, username, password, use_ssl, pool_maxsize,
+     timeout, max_retries, backoff, sniff) = config or _client_config()
+    http_auth = (username, password) if username and password else None
+
+    return OpenSearch(
+        hosts=[{'host': host, 'port': port} for host, port in hosts],
+        http_auth=http_auth,
+        use_ssl=use_ssl,
+        verify_certs=False,  # 테스트 시 False, 운영에서는 True
+        ssl_show_warn=False,
+        transport_class=BackoffTransport,
+        backoff_factor=backoff,
+        pool_maxsize=pool_maxsize,
+        timeout=timeout,
+        max_retries=max_retries,
+        retry_on_timeout=True,
+        sniff_on_start=sniff,
+        sniff_on_connection_fail=sniff,
+        sniffer_timeout=60 if sniff else None
+    )
+
+def get_opensearch_client() -> OpenSearch:
+    """
+    프로세스 전체에서 공유하는 OpenSearch 클라이언트를 반환합니다 (스레드 안전).
+
+    환경변수 설정이 바뀌면 새 클라이언트로 교체합니다. 이전 클라이언트는 더 이상 반환하지 않고,
+    진행 중인 요청이 끝나도록 OPENSEARCH_CLIENT_CLOSE_GRACE초(기본 120) 뒤 또는 프로세스 종료 시 닫습니다.
+    """
+    global _shared_client, _shared_config
+
+    config = _client_config()
+    if _shared_client is not None and _shared_config == config:
+        return _shared_client
+
+    with _client_lock:
+        if _shared_client is None or _shared_config != config:
+            previous = _shared_client
+            _shared_client = build_opensearch_client(config)
+            _shared_config = config
+            if previous is not None:
+                _retire_client(previous)
+        return _shared_client
+
+def _retire_client(client: OpenSearch):
+    """교체된 클라이언트를 유예 시간 뒤에 닫도록 예약합니다 (_client_lock 안에서 호출)."""
+    grace = float(os.getenv('OPENSEARCH_CLIENT_CLOSE_GRACE', '120'))
+    timer = threading.Timer(grace, _close_retired_client, args=(client,))
+    timer.daemon = True
+    _retired_clients.append((timer, client))
+    timer.start()
+
+def _close_retired_client(client: OpenSearch):
+    with _client_lock:
+        retired = [entry for entry in _retired_clients if entry[1] is client]
+        for entry in retired:
+            _retired_clients.remove(entry)
+    if retired:
+        _close_quietly(client)
+
+def _close_quietly(client: OpenSearch):
+    try:
+        client.close()
+    except Exception as e:
+        print(f"⚠️ OpenSearch 클라이언트 종료 중 오류: {e}")
+
+def close_opensearch_client():
+    """
+    공유 클라이언트와 종료를 기다리는 이전 클라이언트의 커넥션 풀을 닫습니다.
+    다음 get_opensearch_client() 호출 시 새로 만듭니다.
+    """
+    global _shared_client, _shared_config
+
+    with _client_lock:
+        if _shared_client is not None:
+            _close_quietly(_shared_client)
+        _shared_client = None
+        _shared_config = None
+        retired = list(_retired_clients)
+        _retired_clients.clear()
+    for timer, client in retired:
+        timer.cancel()
+        _close_quietly(client)
+    with _health_lock:
+        _health_cache.clear()
+
+def get_async_opensearch_client() -> "AsyncOpenSearch":
+    """
+    현재 실행 중인 이벤트 루프에서 공유하는 AsyncOpenSearch 클라이언트를 반환합니다.
+
+    동기 클라이언트와 같은 환경변수(호스트, 인증, 풀 크기, 타임아웃, 재시도)를 사용합니다.
+    """
+    if AsyncOpenSearch is None:
+        raise ImportError("비동기 OpenSearch 클라이언트에는 aiohttp가 필요합니다: pip install aiohttp")
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is not None:
+        return client
+
+    (hosts, username, password, use_ssl, pool_maxsize,
+     timeout, max_retries, _, _) = _client_config()
+    http_auth = (username, password) if username and password else None
+
+    client = AsyncOpenSearch(
+        hosts=[{'host': host, 'port': port} for host, port in hosts],
+        http_auth=http_auth,
+        use_ssl=use_ssl,
+        verify_certs=False,  # 테스트 시 False, 운영에서는 True
+        ssl_show_warn=False,
+        maxsize=pool_maxsize,
+        timeout=timeout,
+        max_retries=max_retries,
+        retry_on_timeout=True
+    )
+    _async_clients[loop] = client
+    return client
+
+async def close_async_opensearch_client():
+    """현재 이벤트 루프의 AsyncOpenSearch 클라이언트를 닫습니다."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def get_opensearch_health(max_age: float = 30.0) -> Dict[str, Any]:
+    """
+    공유 클라이언트로 클러스터 상태를 확인합니다. 결과는 max_age초 동안 캐시합니다.
+
+    Returns:
+        {"ok": bool, "status": "green"|"yellow"|"red"|None, "nodes": int, "checked_at": str, "error": str|None}
+    """
+    with _health_lock:
+        if _health_cache and time.time() - _health_cache["_checked"] < max_age:
+            return {key: value for key, value in _health_cache.items() if key != "_checked"}
+
+    try:
+        health = get_opensearch_client().cluster.health(params={"timeout": "5s"})
+        result = {
+            "ok": health.get("status") in ("green", "yellow"),
+            "status": health.get("status"),
+            "nodes": health.get("number_of_nodes", 0),
+            "error": None
+        }
+    except Exception as e:
+        result = {"ok": False, "status": None, "nodes": 0, "error": str(e)}
+
+    result["checked_at"] = datetime.now().isoformat(timespec="seconds")
+    with _health_lock:
+        _health_cache.clear()
+        _health_cache.update(result, _checked=time.time())
+    return result
+
+
+atexit.register(close_opensearch_client)
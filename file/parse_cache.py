@@ -0,0 +1,190 @@
+from typing import Dict, Any, Optional
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+# Upstage 문서 파싱 결과 디스크 캐시
+#
+# 키는 파일 내용의 sha256과 파싱 파라미터(ocr, base64_encoding, model)이며,
+# API 원본 응답(JSON)을 gzip으로 저장합니다. 청크 분할/임베딩은 캐시된 원본 응답에서
+# 다시 수행하므로 청크 분할 실험이나 재색인 때 파싱을 반복하지 않습니다.
+# 전체 크기 상한과 최대 보관 기간으로 오래된(가장 오래 읽지 않은) 항목부터 지웁니다.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bom_search", "upstage")
+
+_FILE_SUFFIX = ".json.gz"
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """파일 내용의 sha256 해시를 계산합니다."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def parse_cache_key(file_hash: str, **params) -> str:
+    """파일 해시와 파싱 파라미터로 캐시 키를 만듭니다."""
+    payload = json.dumps({"file": file_hash, **params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """
+    디렉터리에 파싱 응답을 저장하는 캐시 (프로세스 간에도 공유 가능).
+
+    Args:
+        directory: 캐시 디렉터리
+        max_bytes: 저장 파일 크기 합의 상한
+        max_age_days: 마지막 사용 후 이 일수가 지난 항목은 삭제
+    """
+
+    def __init__(
+        self,
+        directory: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_age_days: Optional[float] = 30
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _FILE_SUFFIX)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """저장된 원본 응답을 반환합니다. 없거나 읽을 수 없으면 None."""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 파싱 캐시 항목을 읽을 수 없어 삭제합니다: {e}")
+            self._remove(path)
+            return None
+
+        # 마지막 사용 시각 갱신 (LRU 정리 기준)
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """원본 응답을 저장하고 보관 정책에 따라 오래된 항목을 정리합니다."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(json.dumps(result, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_FILE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self) -> int:
+        """
+        보관 기간이 지난 항목과, 크기 상한을 넘는 만큼 가장 오래 사용하지 않은 항목을 지웁니다.
+
+        Returns:
+            삭제한 항목 수
+        """
+        with self._lock:
+            entries = self._entries()
+            cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days is not None else None
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for mtime, size, path in entries:
+                if (cutoff is not None and mtime < cutoff) or total > self.max_bytes:
+                    self._remove(path)
+                    total -= size
+                    removed += 1
+            return removed
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "max_age_days": self.max_age_days,
+            "directory": self.directory
+        }
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """
+    환경변수 설정으로 파싱 캐시를 반환합니다.
+
+    환경변수:
+        UPSTAGE_PARSE_CACHE_ENABLED: false면 캐시를 사용하지 않음 (기본 true)
+        UPSTAGE_PARSE_CACHE_DIR: 캐시 디렉터리 (기본 ~/.cache/bom_search/upstage)
+        UPSTAGE_PARSE_CACHE_MAX_BYTES: 크기 상한 (기본 2GB)
+        UPSTAGE_PARSE_CACHE_MAX_AGE_DAYS: 보관 기간 (기본 30일)
+
+    캐시 디렉터리를 만들 수 없으면 경고를 출력하고 None을 반환합니다.
+    """
+    if os.getenv("UPSTAGE_PARSE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    try:
+        return ParseCache(
+            directory=os.getenv("UPSTAGE_PARSE_CACHE_DIR", DEFAULT_CACHE_DIR),
+            max_bytes=int(os.getenv("UPSTAGE_PARSE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024))),
+            max_age_days=float(os.getenv("UPSTAGE_PARSE_CACHE_MAX_AGE_DAYS", "30"))
+        )
+    except OSError as e:
+        print(f"⚠️ 파싱 캐시를 사용할 수 없어 캐시 없이 진행합니다: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upstage 파싱 캐시 관리")
+    parser.add_argument("command", choices=["stats", "evict", "clear"])
+    args = parser.parse_args()
+
+    cache = get_parse_cache()
+    if cache is None:
+        raise SystemExit("❌ 파싱 캐시가 비활성화되어 있습니다.")
+
+    if args.command == "evict":
+        print(f"🗑️ {cache.evict()}개 항목을 정리했습니다.")
+    elif args.command == "clear":
+        cache.clear()
+        print("🗑️ 파싱 캐시를 비웠습니다.")
+
+    stats = cache.stats()
+    print(f"📦 {stats['directory']}: {stats['entries']}개, {stats['bytes'] / 1024 / 1024:.1f} MB")
@@ -0,0 +1,219 @@
+from typing import List, Dict, Any, Optional
+import copy
+import os
+import re
+import tempfile
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf가 없으면 페이지 분할 병렬 파싱만 사용할 수 없음
+    PdfReader = None
+    PdfWriter = None
+
+# PDF를 페이지 구간(shard)으로 나누고, 구간별 Upstage 응답을 하나의 응답으로 합치는 유틸리티
+#
+# 합친 응답은 단일 호출 응답과 같은 형태(content.html, elements, usage)이므로
+# postprocess_upstage_result / extract_chunks_from_html에 그대로 넘길 수 있습니다.
+
+# 요소 HTML의 id='N' 속성 (요소 번호)
+_ELEMENT_ID_PATTERN = re.compile(r"""(<[a-zA-Z][^>]*?\bid=)(['"])(\d+)\2""")
+
+
+def pypdf_available() -> bool:
+    return PdfReader is not None
+
+def _require_pypdf():
+    if PdfReader is None:
+        raise ImportError("PDF 페이지 분할에는 pypdf가 필요합니다: pip install pypdf")
+
+def is_pdf(file_path: str) -> bool:
+    """파일 시그니처로 PDF인지 확인합니다."""
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(5) == b"%PDF-"
+    except OSError:
+        return False
+
+def count_pdf_pages(file_path: str) -> int:
+    _require_pypdf()
+    return len(PdfReader(file_path).pages)
+
+def plan_page_ranges(page_count: int, pages_per_shard: int) -> List[Dict[str, int]]:
+    """
+    전체 페이지를 pages_per_shard 단위 구간으로 나눕니다.
+
+    Returns:
+        [{"start_page": 1부터 시작, "end_page": 포함}]
+    """
+    pages_per_shard = max(1, pages_per_shard)
+    return [
+        {"start_page": start + 1, "end_page": min(page_count, start + pages_per_shard)}
+        for start in range(0, page_count, pages_per_shard)
+    ]
+
+def write_page_range(
+    file_path: str,
+    start_page: int,
+    end_page: int,
+    directory: Optional[str] = None,
+    reader: Optional[Any] = None
+) -> str:
+    """
+    start_page~end_page(1부터, 포함) 페이지만 담은 임시 PDF를 만들고 경로를 반환합니다.
+
+    호출자가 사용 후 파일을 삭제해야 합니다.
+    """
+    _require_pypdf()
+    reader = reader or PdfReader(file_path)
+    writer = PdfWriter()
+    for index in range(start_page - 1, end_page):
+        writer.add_page(reader.pages[index])
+
+    fd, shard_path = tempfile.mkstemp(dir=directory, suffix=f"_p{start_page}-{end_page}.pdf")
+    with os.fdopen(fd, "wb") as f:
+        writer.write(f)
+    return shard_path
+
+def detect_text_layer_pages(file_path: str, min_chars: int = 20) -> List[Dict[str, Any]]:
+    """
+    페이지마다 추출 가능한 텍스트 레이어가 있는지 확인합니다.
+
+    공백을 뺀 추출 텍스트가 min_chars자 이상이면 디지털(텍스트 레이어 있음) 페이지로 봅니다.
+
+    Returns:
+        [{"page": 1부터, "text_chars": 추출된 글자 수, "has_text_layer": bool}]
+    """
+    _require_pypdf()
+    pages = []
+    for number, page in enumerate(PdfReader(file_path).pages, start=1):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        chars = len("".join(text.split()))
+        pages.append({"page": number, "text_chars": chars, "has_text_layer": chars >= min_chars})
+    return pages
+
+def plan_ocr_page_ranges(
+    text_layers: List[Dict[str, Any]],
+    pages_per_shard: Optional[int] = None,
+    digital_ocr: str = "auto",
+    scanned_ocr: str = "force"
+) -> List[Dict[str, Any]]:
+    """
+    같은 OCR 모드가 필요한 연속 페이지를 하나의 구간으로 묶습니다.
+
+    Args:
+        text_layers: detect_text_layer_pages 결과
+        pages_per_shard: 구간 하나의 최대 페이지 수 (없으면 제한 없음)
+        digital_ocr: 텍스트 레이어가 있는 페이지의 ocr 값
+        scanned_ocr: 스캔 페이지의 ocr 값
+
+    Returns:
+        [{"start_page", "end_page", "ocr"}] 페이지 순서대로
+    """
+    ranges = []
+    for layer in text_layers:
+        mode = digital_ocr if layer["has_text_layer"] else scanned_ocr
+        current = ranges[-1] if ranges else None
+        if (
+            current
+            and current["ocr"] == mode
+            and current["end_page"] == layer["page"] - 1
+            and (not pages_per_shard or current["end_page"] - current["start_page"] + 1 < pages_per_shard)
+        ):
+            current["end_page"] = layer["page"]
+        else:
+            ranges.append({"start_page": layer["page"], "end_page": layer["page"], "ocr": mode})
+    return ranges
+
+def split_pdf(
+    file_path: str,
+    pages_per_shard: int,
+    directory: Optional[str] = None,
+    page_ranges: Optional[List[Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    PDF를 페이지 구간별 임시 PDF로 나눕니다.
+
+    Args:
+        page_ranges: 미리 정한 구간 목록 (없으면 pages_per_shard 단위로 나눔, 추가 키는 그대로 유지)
+
+    Returns:
+        [{"start_page", "end_page", "path", ...}] 페이지 순서대로
+    """
+    _require_pypdf()
+    reader = PdfReader(file_path)
+    shards = []
+    for page_range in page_ranges or plan_page_ranges(len(reader.pages), pages_per_shard):
+        shards.append({
+            **page_range,
+            "path": write_page_range(file_path, page_range["start_page"], page_range["end_page"], directory, reader)
+        })
+    return shards
+
+def _renumber_html_ids(html: str, offset: int) -> str:
+    if not offset:
+        return html
+    return _ELEMENT_ID_PATTERN.sub(
+        lambda match: f"{match.group(1)}{match.group(2)}{int(match.group(3)) + offset}{match.group(2)}",
+        html
+    )
+
+def merge_shard_results(shard_results: List[Dict[str, Any]], start_pages: List[int]) -> Dict[str, Any]:
+    """
+    페이지 순서대로 정렬된 구간별 응답을 하나의 응답으로 합칩니다.
+
+    - elements의 page는 원본 문서 기준 페이지로, id는 전체 문서 기준 번호로 바꿉니다.
+    - content.html/markdown/text는 구간 순서대로 이어 붙이고 HTML의 id 속성도 맞춥니다.
+    - usage.pages는 구간별 값을 더합니다.
+
+    API가 붙이는 elements[*].page와 id는 구간 PDF 기준(1, 0부터)이라 오프셋을 더해야 하지만,
+    HTML 안의 쪽번호(<footer>의 "12" 같은 텍스트)는 문서에 인쇄된 글자를 읽은 것이므로
+    구간으로 나눠도 원본 문서의 쪽번호 그대로입니다. 그래서 HTML 텍스트는 바꾸지 않으며,
+    청크의 페이지 범위(html_chunker)도 이 인쇄된 쪽번호를 기준으로 합니다.
+    (인쇄된 쪽번호가 PDF 페이지 순서와 다른 문서라면 청크 페이지도 인쇄된 번호를 따릅니다.)
+
+    Args:
+        shard_results: 구간별 API 응답 (페이지 순서)
+        start_pages: 각 구간의 시작 페이지 (1부터)
+    """
+    if not shard_results:
+        return {}
+
+    merged = copy.deepcopy(shard_results[0])
+    merged["content"] = {}
+    merged["elements"] = []
+    content_parts: Dict[str, List[str]] = {}
+    total_pages = 0
+    id_offset = 0
+
+    for result, start_page in zip(shard_results, start_pages):
+        page_offset = start_page - 1
+        elements = result.get("elements") or []
+
+        for element in elements:
+            element = copy.deepcopy(element)
+            if isinstance(element.get("page"), int):
+                element["page"] += page_offset
+            if isinstance(element.get("id"), int):
+                element["id"] += id_offset
+            html = (element.get("content") or {}).get("html")
+            if isinstance(html, str):
+                element["content"]["html"] = _renumber_html_ids(html, id_offset)
+            merged["elements"].append(element)
+
+        for key, value in (result.get("content") or {}).items():
+            if isinstance(value, str):
+                if key == "html":
+                    value = _renumber_html_ids(value, id_offset)
+                content_parts.setdefault(key, []).append(value)
+
+        total_pages += (result.get("usage") or {}).get("pages", 0)
+        element_ids = [element["id"] for element in elements if isinstance(element.get("id"), int)]
+        id_offset += max(element_ids) + 1 if element_ids else len(elements)
+
+    merged["content"] = {key: "\n".join(parts) for key, parts in content_parts.items()}
+    if "usage" in merged:
+        merged["usage"] = {**merged["usage"], "pages": total_pages}
+    return merged
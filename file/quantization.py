@@ -0,0 +1,173 @@
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import argparse
+import json
+import math
+import random
+import struct
+
+# 임베딩 벡터 양자화 (int8 스칼라 양자화, fp16)
+#
+# - int8: 코퍼스에서 |값|의 분위수로 대칭 스케일을 구해 [-127, 127] 정수로 변환합니다.
+#   모든 차원에 같은 스케일을 쓰므로 코사인 유사도 순서가 거의 그대로 유지됩니다.
+#   인덱스는 data_type=byte knn_vector("int8" 프로필)를 사용합니다.
+# - fp16: faiss sq fp16 인코더("low-memory" 프로필)가 서버에서 변환하며,
+#   클라이언트는 같은 반올림을 적용해 저장/검색 값을 맞춥니다.
+
+QUANTIZATION_MODES = ("int8", "fp16")
+
+# 양자화 모드별로 인덱스를 만들 때 사용할 인덱스 프로필
+QUANTIZATION_PROFILES = {
+    "int8": "int8",
+    "fp16": "low-memory"
+}
+
+
+def fit_int8_calibration(embeddings: Sequence[Sequence[float]], percentile: float = 99.9) -> Dict[str, Any]:
+    """
+    코퍼스 임베딩으로 int8 양자화 스케일을 계산합니다.
+
+    Args:
+        embeddings: 보정에 사용할 임베딩 벡터 리스트
+        percentile: 클리핑 기준이 되는 |값|의 분위수 (이상치 몇 개가 해상도를 낮추지 않도록)
+
+    Returns:
+        {"mode": "int8", "scale": float, "percentile": float, "samples": int}
+    """
+    magnitudes = sorted(abs(value) for vector in embeddings if vector for value in vector)
+    if not magnitudes:
+        raise ValueError("int8 보정에 사용할 임베딩이 없습니다.")
+
+    position = min(len(magnitudes) - 1, int(math.ceil(len(magnitudes) * percentile / 100.0)) - 1)
+    scale = magnitudes[max(0, position)] or magnitudes[-1] or 1.0
+
+    return {
+        "mode": "int8",
+        "scale": scale,
+        "percentile": percentile,
+        "samples": len(embeddings)
+    }
+
+def quantize_int8(vector: Sequence[float], calibration: Dict[str, Any]) -> List[int]:
+    """float 벡터를 보정 스케일로 [-127, 127] 정수 벡터로 변환합니다."""
+    factor = 127.0 / calibration["scale"]
+    return [max(-127, min(127, int(round(value * factor)))) for value in vector]
+
+def dequantize_int8(vector: Sequence[int], calibration: Dict[str, Any]) -> List[float]:
+    """int8 벡터를 대략적인 float 벡터로 되돌립니다."""
+    factor = calibration["scale"] / 127.0
+    return [value * factor for value in vector]
+
+def quantize_fp16(vector: Sequence[float]) -> List[float]:
+    """float 벡터를 fp16 정밀도로 반올림합니다."""
+    packed = struct.pack(f"<{len(vector)}e", *vector)
+    return list(struct.unpack(f"<{len(vector)}e", packed))
+
+def quantize_vector(vector: Sequence[float], calibration: Optional[Dict[str, Any]]) -> List[Any]:
+    """
+    보정 정보에 맞는 변환을 벡터 하나에 적용합니다 (저장/질의 공통).
+
+    calibration이 없으면 벡터를 그대로 반환합니다.
+    """
+    if not calibration:
+        return list(vector)
+    if calibration["mode"] == "int8":
+        return quantize_int8(vector, calibration)
+    if calibration["mode"] == "fp16":
+        return quantize_fp16(vector)
+    raise ValueError(f"지원하지 않는 양자화 모드: {calibration['mode']}")
+
+def fit_calibration(mode: str, embeddings: Sequence[Sequence[float]]) -> Dict[str, Any]:
+    """양자화 모드에 맞는 보정 정보를 만듭니다."""
+    if mode == "int8":
+        return fit_int8_calibration(embeddings)
+    if mode == "fp16":
+        return {"mode": "fp16"}
+    raise ValueError(f"지원하지 않는 양자화 모드: {mode} (사용 가능: {', '.join(QUANTIZATION_MODES)})")
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+def _top_k(query: Sequence[float], corpus: Sequence[Sequence[float]], k: int, exclude: Optional[int] = None) -> List[int]:
+    scored = [
+        (_cosine(query, vector), position)
+        for position, vector in enumerate(corpus)
+        if position != exclude
+    ]
+    scored.sort(key=lambda item: -item[0])
+    return [position for _, position in scored[:k]]
+
+def evaluate_quantization_recall(
+    corpus: Sequence[Sequence[float]],
+    queries: Optional[Sequence[Sequence[float]]] = None,
+    k: int = 10,
+    modes: Sequence[str] = QUANTIZATION_MODES,
+    num_queries: int = 50,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    양자화된 코퍼스의 전수 탐색 결과를 float 기준 결과와 비교해 recall@k를 계산합니다.
+
+    queries가 없으면 코퍼스에서 num_queries개를 뽑아 자기 자신을 제외하고 검색합니다.
+
+    Returns:
+        {"k", "num_queries", "corpus_size", "recall": {mode: recall@k}}
+    """
+    exclude_self = queries is None
+    if exclude_self:
+        rng = random.Random(seed)
+        query_positions = rng.sample(range(len(corpus)), min(num_queries, len(corpus)))
+        queries = [corpus[position] for position in query_positions]
+    else:
+        query_positions = [None] * len(queries)
+
+    baseline = [
+        _top_k(query, corpus, k, exclude=position)
+        for query, position in zip(queries, query_positions)
+    ]
+
+    recall = {}
+    for mode in modes:
+        calibration = fit_calibration(mode, corpus)
+        quantized_corpus = [quantize_vector(vector, calibration) for vector in corpus]
+
+        hits = 0
+        total = 0
+        for query, position, expected in zip(queries, query_positions, baseline):
+            found = _top_k(quantize_vector(query, calibration), quantized_corpus, k, exclude=position)
+            hits += len(set(found) & set(expected))
+            total += len(expected)
+        recall[mode] = hits / total if total else 0.0
+
+    return {
+        "k": k,
+        "num_queries": len(queries),
+        "corpus_size": len(corpus),
+        "recall": recall
+    }
+
+def _load_embeddings(path: str) -> Tuple[List[List[float]], str]:
+    """처리 결과 JSON(다운로드 파일) 또는 임베딩 리스트 JSON에서 임베딩을 읽습니다."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return data.get("embeddings", []), "processed result"
+    return data, "embedding list"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="양자화 모드별 recall@k 오프라인 평가")
+    parser.add_argument("path", help="processed_*.json (embeddings 포함) 또는 임베딩 리스트 JSON 파일")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    embeddings, source = _load_embeddings(args.path)
+    if len(embeddings) <= args.k:
+        raise SystemExit(f"❌ 평가하려면 {args.k}개보다 많은 임베딩이 필요합니다 (현재 {len(embeddings)}개).")
+
+    print(f"🔄 {source}에서 {len(embeddings)}개 임베딩으로 평가 중...")
+    report = evaluate_quantization_recall(embeddings, k=args.k, num_queries=args.queries)
+    for mode, value in report["recall"].items():
+        print(f"  - {mode}: recall@{report['k']} = {value:.4f} ({report['num_queries']}개 쿼리)")
@@ -1,11 +1,27 @@
-from opensearchpy import OpenSearch
-from typing import List, Dict, Any, Optional
+from opensearchpy import OpenSearch, helpers
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+from contextlib import contextmanager
 import hashlib
 import json
+import struct
+import threading
+import time
 from datetime import datetime
 import urllib3
 import os  # 이 줄 추가
 from dotenv import load_dotenv
+from file.opensearch_client import (
+    AsyncOpenSearch,
+    get_opensearch_client,
+    build_opensearch_client,
+    get_async_opensearch_client
+)
+from file.index_alias import ensure_alias_index, rebuild_index, get_live_mappings, vector_encoding_of
+from file.index_schema import get_index_profile, build_index_body, CHUNK_FIELD_MAPPINGS, CHUNK_RECORD_FIELDS
+from file.html_chunker import ChunkRecord
+from file.quantization import QUANTIZATION_PROFILES, fit_calibration, quantize_vector
+from file.search_cache import cached_search, bump_index_generation
+from file.embedding_cache import embed_texts_cached
 
 load_dotenv()
 
@@ -28,216 +44,1182 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 #     )
 
 # aws
-def create_opensearch_client() -> OpenSearch:
-    """OpenSearch 클라이언트를 생성합니다."""
-    username = os.getenv('OPENSEARCH_USERNAME')
-    password = os.getenv('OPENSEARCH_PASSWORD')
-    http_auth = (username, password) if username and password else None
-
-    return OpenSearch(
-        hosts=[{
-            'host': os.getenv('OPENSEARCH_HOST', 'localhost'),
-            'port': int(os.getenv('OPENSEARCH_PORT', '9200'))
-        }],
-        http_auth=http_auth,
-        use_ssl=os.getenv('OPENSEARCH_USE_SSL', 'true').lower() == 'true',
-        verify_certs=False  # 테스트 시 False, 운영에서는 True
-    )
+def create_opensearch_client(shared: bool = True) -> OpenSearch:
+    """
+    OpenSearch 클라이언트를 반환합니다.
+    
+    기본적으로 프로세스 전체에서 공유하는 클라이언트(커넥션 풀, 타임아웃, 백오프 재시도 포함)를
+    돌려주며, shared=False면 호출자가 직접 닫아야 하는 새 클라이언트를 만듭니다.
+    설정 환경변수는 file.opensearch_client.build_opensearch_client를 참고하세요.
+    """
+    if shared:
+        return get_opensearch_client()
+    return build_opensearch_client()
 
 
 
-def reset_index_with_embeddings(client: OpenSearch, index_name: str = "document-chunks"):
+def reset_index_with_embeddings(
+    client: OpenSearch,
+    index_name: str = "document-chunks",
+    profile: Optional[str] = None
+):
     """
-    기존 인덱스를 삭제하고 임베딩 지원이 포함된 새 인덱스를 생성합니다.
+    비어 있는 새 세대 인덱스를 만들고 alias를 전환합니다.
+    
+    기존 인덱스를 먼저 삭제하지 않으므로 전환 순간까지 검색이 실패하지 않으며,
+    이전 세대는 보존 정책(최신 2개)에 따라 롤백용으로 남습니다.
+    데이터를 유지한 채 매핑만 바꾸려면 rebuild_chunk_index를 사용하세요.
     
     Args:
         client: OpenSearch 클라이언트
-        index_name: 인덱스 이름
+        index_name: 인덱스(alias) 이름
+        profile: 인덱스 프로필 이름 (file.index_schema.INDEX_PROFILES)
     """
     try:
-        # 기존 인덱스가 있으면 삭제
-        if client.indices.exists(index=index_name):
-            print(f"🗑️ 기존 인덱스 {index_name} 삭제 중...")
-            client.indices.delete(index=index_name)
-            print(f"✅ 기존 인덱스 {index_name} 삭제 완료")
-        
-        # 새로운 인덱스 설정 (knn_vector 타입 사용)
-        index_settings = {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 1,
-                "index.knn": True  # KNN 플러그인 활성화
-            },
-            "mappings": {
-                "properties": {
-                    "chunk_id": {"type": "integer"},
-                    "content": {"type": "text"},
-                    "document_name": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
-                    "metadata": {"type": "object"},
-                    "embedding": {
-                        "type": "knn_vector",
-                        "dimension": 1536,
-                        "method": {
-                            "name": "hnsw",
-                            "space_type": "cosinesimil",
-                            "engine": "lucene"
-                        }
-                    }
-                }
-            }
-        }
-        
-        # 새 인덱스 생성
-        print(f"🔄 새 인덱스 {index_name} 생성 중...")
-        client.indices.create(index=index_name, body=index_settings)
-        print(f"✅ 새 인덱스 {index_name} 생성 완료!")
-        
+        result = rebuild_index(
+            client,
+            index_name,
+            _calibrate_index_body(client, index_name, build_index_body(get_index_profile(profile))),
+            reindex_from_live=False
+        )
+        print(f"✅ 새 인덱스 {result['index']} 생성 및 {index_name} 전환 완료!")
         return True
         
     except Exception as e:
         print(f"❌ 인덱스 재설정 실패: {e}")
         return False
 
+def rebuild_chunk_index(
+    client: OpenSearch,
+    index_name: str = "document-chunks",
+    reindex_from_live: bool = True,
+    fill_fn: Optional[Callable[[OpenSearch, str], Any]] = None,
+    warm_queries: Optional[List[Dict[str, Any]]] = None,
+    keep_generations: int = 2,
+    max_age_days: Optional[int] = None,
+    profile: Optional[str] = None,
+    calibration_embeddings: Optional[List[List[float]]] = None
+) -> Dict[str, Any]:
+    """
+    검색 중단 없이 청크 인덱스를 새 세대("{index_name}-v{n}")로 재구축합니다.
+    
+    자세한 단계는 file.index_alias.rebuild_index를 참고하세요. reindex로 복사하면 현재 세대의
+    양자화 보정 정보를 이어받고, 벡터 인코딩이 바뀌는 프로필 변경(예: float → int8)은 거부하므로
+    reindex_from_live=False와 fill_fn으로 다시 임베딩해야 합니다. 이때 새 프로필이 int8이면
+    calibration_embeddings(없으면 현재 세대의 float 벡터 표본)로 스케일을 한 번 계산해 새 세대에 기록합니다.
+    
+    Args:
+        client: OpenSearch 클라이언트
+        index_name: 인덱스(alias) 이름
+        reindex_from_live: True면 현재 인덱스의 문서를 새 세대로 복사
+        fill_fn: 새 세대를 채우는 콜백 (예: save_chunks_to_opensearch(..., index_name=새 인덱스))
+        warm_queries: alias 전환 전에 실행할 검색 본문 목록
+        keep_generations: 남겨둘 최신 세대 수
+        max_age_days: 이 일수보다 오래된 세대만 삭제
+        profile: 새 세대에 적용할 인덱스 프로필 이름 (엔진/HNSW 설정 변경 시 사용)
+        calibration_embeddings: int8 새 세대의 스케일 계산에 쓸 코퍼스 임베딩 표본
+        
+    Returns:
+        {"index", "previous", "copied", "deleted"}
+    """
+    index_body = build_index_body(get_index_profile(profile))
+    if not reindex_from_live:
+        index_body = _calibrate_index_body(client, index_name, index_body, calibration_embeddings)
+    return rebuild_index(
+        client,
+        index_name,
+        index_body,
+        reindex_from_live=reindex_from_live,
+        fill_fn=fill_fn,
+        warm_queries=warm_queries,
+        keep_generations=keep_generations,
+        max_age_days=max_age_days
+    )
+
+# int8 스케일 계산에 쓸 현재 세대 벡터 표본 수
+QUANTIZATION_SAMPLE_SIZE = int(os.getenv("QUANTIZATION_SAMPLE_SIZE", "2000"))
+
+def _sample_index_embeddings(client: OpenSearch, index_name: str, sample_size: int = QUANTIZATION_SAMPLE_SIZE) -> List[List[float]]:
+    """인덱스에 저장된 임베딩을 무작위로 sample_size개까지 가져옵니다."""
+    response = client.search(
+        index=index_name,
+        body={
+            "size": sample_size,
+            "query": {
+                "function_score": {
+                    "query": {"exists": {"field": "embedding"}},
+                    "random_score": {"seed": 0, "field": "_seq_no"}
+                }
+            },
+            "_source": ["embedding"]
+        }
+    )
+    return [
+        hit["_source"]["embedding"]
+        for hit in response["hits"]["hits"]
+        if hit.get("_source", {}).get("embedding")
+    ]
+
+def _calibrate_index_body(
+    client: OpenSearch,
+    index_name: str,
+    index_body: Dict[str, Any],
+    calibration_embeddings: Optional[List[List[float]]] = None
+) -> Dict[str, Any]:
+    """
+    int8 새 세대 본문에 코퍼스로 계산한 스케일을 채웁니다 (int8이 아니거나 표본이 없으면 그대로).
+    
+    표본을 주지 않으면 현재 세대가 float 벡터일 때 그 벡터를 표본으로 씁니다.
+    """
+    quantization = index_body["mappings"].get("_meta", {}).get("quantization") or {}
+    if quantization.get("mode") != "int8" or "scale" in quantization:
+        return index_body
+    
+    sample = [embedding for embedding in (calibration_embeddings or []) if embedding]
+    if not sample:
+        live = get_live_mappings(client, index_name) if client.indices.exists(index=index_name) else None
+        if live is not None and vector_encoding_of(live) == "float":
+            sample = _sample_index_embeddings(client, index_name)
+    if not sample:
+        print("⚠️ int8 스케일을 계산할 코퍼스 표본이 없어 새 세대의 첫 저장 배치로 계산합니다.")
+        return index_body
+    
+    calibration = fit_calibration("int8", sample)
+    print(f"📏 int8 양자화 보정: 코퍼스 표본 {len(sample)}개로 scale={calibration['scale']:.6f}")
+    body = {**index_body, "mappings": {**index_body["mappings"]}}
+    body["mappings"]["_meta"] = {**body["mappings"].get("_meta", {}), "quantization": calibration}
+    return body
+
+def _create_index_if_missing(client: OpenSearch, index_name: str, profile: Optional[str] = None):
+    """인덱스가 없다면 첫 세대 인덱스를 만들고 index_name alias를 연결합니다."""
+    if ensure_alias_index(client, index_name, build_index_body(get_index_profile(profile))):
+        _RECORD_MAPPED_INDICES.add(index_name)
+
+# 구조화 청크 필드 매핑을 확인한 인덱스 (프로세스당 한 번만 put_mapping)
+_RECORD_MAPPED_INDICES = set()
+
+def _ensure_record_field_mappings(client: OpenSearch, index_name: str):
+    """
+    구조화 청크 필드가 도입되기 전에 만든 인덱스에 keyword/integer 매핑을 추가합니다.
+    
+    필드가 동적 매핑으로 이미 다른 타입이 되었다면 경고만 출력합니다 (rebuild_chunk_index로 재구축 필요).
+    """
+    if index_name in _RECORD_MAPPED_INDICES:
+        return
+    try:
+        client.indices.put_mapping(
+            index=index_name,
+            body={"properties": {field: CHUNK_FIELD_MAPPINGS[field] for field in CHUNK_RECORD_FIELDS}}
+        )
+        _RECORD_MAPPED_INDICES.add(index_name)
+    except Exception as e:
+        print(f"⚠️ 구조화 청크 필드 매핑 추가 실패 (rebuild_chunk_index로 재구축하세요): {str(e)}")
+
 def save_chunks_to_opensearch(
-    chunks: List[str], 
+    chunks: List[Union[str, ChunkRecord]], 
     client: OpenSearch,
     document_name: str,
     metadata: Optional[Dict[str, Any]] = None,
     embeddings: Optional[List[List[float]]] = None,
-    index_name: str = "document-chunks"
+    index_name: str = "document-chunks",
+    use_bulk: bool = True,
+    batch_size: int = 500,
+    max_batch_bytes: int = 10 * 1024 * 1024,
+    thread_count: int = 4,
+    refresh: bool = True,
+    incremental: bool = False,
+    profile: Optional[str] = None,
+    quantization: Optional[str] = None
 ) -> List[str]:
     """
     Upstage에서 생성된 청크들을 OpenSearch에 저장합니다.
     
+    기본적으로 _bulk API로 배치를 나눠 병렬 저장하고, refresh는 마지막에 한 번만 수행합니다.
+    
     Args:
-        chunks: 저장할 청크 리스트
+        chunks: 저장할 청크 리스트 (문자열 또는 ChunkRecord; ChunkRecord면 섹션 번호, 헤더,
+            페이지 범위, 원본 위치를 keyword/integer 필드로 함께 저장)
         client: OpenSearch 클라이언트
         document_name: 문서 이름
         metadata: 추가 메타데이터
         embeddings: 청크에 대응하는 임베딩 벡터 리스트
         index_name: 인덱스 이름
+        use_bulk: False면 청크마다 index API를 호출하는 기존 방식으로 저장
+        batch_size: bulk 요청 하나에 담을 최대 청크 수
+        max_batch_bytes: bulk 요청 하나의 최대 바이트 수
+        thread_count: 동시에 보낼 bulk 요청 수
+        refresh: True면 저장이 끝난 뒤 한 번 refresh, False면 refresh 하지 않음
+        incremental: True면 sync_chunks_to_opensearch로 바뀐 청크만 저장하고 사라진 청크를 삭제
+        profile: 인덱스가 없을 때 생성에 사용할 인덱스 프로필 이름
+        quantization: "int8" 또는 "fp16"이면 양자화 인덱스에 저장 (인덱스가 없으면 해당 프로필로 생성)
         
     Returns:
         저장된 문서 ID 목록
     """
-    # 인덱스가 없다면 생성
-    if not client.indices.exists(index=index_name):
-        index_settings = {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 1,
-                "index.knn": True  # KNN 플러그인 활성화
-            },
-            "mappings": {
-                "properties": {
-                    "chunk_id": {"type": "integer"},
-                    "content": {"type": "text"},
-                    "document_name": {"type": "keyword"},
-                    "timestamp": {"type": "date"},
-                    "metadata": {"type": "object"},
-                    "embedding": {
-                        "type": "knn_vector",
-                        "dimension": 1536,
-                        "method": {
-                            "name": "hnsw",
-                            "space_type": "cosinesimil",
-                            "engine": "lucene"
-                        }
-                    }
-                }
-            }
+    if incremental:
+        return sync_chunks_to_opensearch(
+            chunks,
+            client,
+            document_name,
+            metadata=metadata,
+            embeddings=embeddings,
+            index_name=index_name,
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            thread_count=thread_count,
+            refresh=refresh,
+            profile=profile,
+            quantization=quantization
+        )["saved_ids"]
+    
+    _create_index_if_missing(client, index_name, profile or QUANTIZATION_PROFILES.get(quantization))
+    if any(isinstance(chunk, ChunkRecord) for chunk in chunks):
+        _ensure_record_field_mappings(client, index_name)
+    embeddings = _quantize_embeddings_for_index(client, index_name, embeddings, quantization)
+    
+    if not use_bulk:
+        return _save_chunks_one_by_one(
+            chunks, client, document_name, metadata, embeddings, index_name, refresh
+        )
+    
+    bulk_result = bulk_index_chunks(
+        chunks,
+        client,
+        document_name,
+        metadata=metadata,
+        embeddings=embeddings,
+        index_name=index_name,
+        batch_size=batch_size,
+        max_batch_bytes=max_batch_bytes,
+        thread_count=thread_count,
+        refresh=refresh,
+        bulk_refresh_interval=get_index_profile(profile)["bulk_refresh_interval"],
+        restore_refresh_interval=get_index_profile(profile)["refresh_interval"]
+    )
+    
+    for error in bulk_result["errors"]:
+        print(f"❌ 청크 {error['chunk_id']} 저장 실패: [{error['status']}] {error['error']}")
+    
+    print(f"✅ 총 {len(bulk_result['saved_ids'])}개의 청크가 저장되었습니다.")
+    return bulk_result["saved_ids"]
+
+def _build_chunk_doc(
+    chunk: Union[str, ChunkRecord],
+    i: int,
+    document_name: str,
+    timestamp: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    embeddings: Optional[List[List[float]]] = None
+) -> Dict[str, Any]:
+    """청크 하나에 대한 OpenSearch 문서 본문을 만듭니다."""
+    record = chunk if isinstance(chunk, ChunkRecord) else None
+    doc = {
+        "chunk_id": i,
+        "content": (record.text if record else chunk).strip(),
+        "document_name": document_name,
+        "timestamp": timestamp,
+        "metadata": metadata or {}
+    }
+    
+    # 구조화 청크면 섹션/페이지/위치 필드 추가 (값이 없는 필드는 생략)
+    structure = None
+    if record:
+        structure = {
+            "section_id": record.section_id,
+            "section_header": record.header,
+            "start_page": record.start_page,
+            "end_page": record.end_page,
+            "start_offset": record.start_offset,
+            "end_offset": record.end_offset
         }
-        client.indices.create(index=index_name, body=index_settings)
-        print(f"✅ 인덱스 생성됨: {index_name}")
+        structure = {field: value for field, value in structure.items() if value is not None}
+        doc.update(structure)
+    
+    # 임베딩이 있으면 추가
+    embedding = None
+    if embeddings and i < len(embeddings) and embeddings[i] is not None:
+        embedding = embeddings[i]
+        doc["embedding"] = embedding
+    
+    # 증분 동기화에서 변경 여부를 판단하기 위한 해시
+    doc["content_hash"] = _chunk_content_hash(doc["content"], embedding, structure)
     
+    return doc
+
+def _chunk_doc_id(document_name: str, i: int) -> str:
+    """문서 ID 생성 (문서명 + 청크 인덱스의 해시)"""
+    return hashlib.md5(f"{document_name}_chunk_{i}".encode()).hexdigest()
+
+def _save_chunks_one_by_one(
+    chunks: List[Union[str, ChunkRecord]],
+    client: OpenSearch,
+    document_name: str,
+    metadata: Optional[Dict[str, Any]],
+    embeddings: Optional[List[List[float]]],
+    index_name: str,
+    refresh: bool
+) -> List[str]:
+    """청크를 한 건씩 index API로 저장합니다 (bulk를 쓸 수 없는 환경용)."""
     saved_ids = []
     timestamp = datetime.now().isoformat()
     
     # 각 청크를 저장
     for i, chunk in enumerate(chunks):
-        # 문서 ID 생성 (문서명 + 청크 인덱스의 해시)
-        doc_id = hashlib.md5(f"{document_name}_chunk_{i}".encode()).hexdigest()
-        
-        doc = {
-            "chunk_id": i,
-            "content": chunk.strip(),
-            "document_name": document_name,
-            "timestamp": timestamp,
-            "metadata": metadata or {}
-        }
-        
-        # 임베딩이 있으면 추가
-        if embeddings and i < len(embeddings):
-            doc["embedding"] = embeddings[i]
+        doc_id = _chunk_doc_id(document_name, i)
+        doc = _build_chunk_doc(chunk, i, document_name, timestamp, metadata, embeddings)
         
         try:
-            response = client.index(
+            client.index(
                 index=index_name, 
                 id=doc_id,
-                body=doc, 
-                refresh=True
+                body=doc
             )
             saved_ids.append(doc_id)
             print(f"📦 저장됨: chunk {i} -> {doc_id}")
         except Exception as e:
             print(f"❌ 청크 {i} 저장 실패: {str(e)}")
     
+    if saved_ids:
+        bump_index_generation()
+    if refresh and saved_ids:
+        refresh_index(client, index_name)
+    
     print(f"✅ 총 {len(saved_ids)}개의 청크가 저장되었습니다.")
     return saved_ids
 
-def search_chunks(
+def bulk_index_chunks(
+    chunks: List[Union[str, ChunkRecord]],
     client: OpenSearch,
-    query: str,
+    document_name: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    embeddings: Optional[List[List[float]]] = None,
     index_name: str = "document-chunks",
-    size: int = 10
-) -> List[Dict[str, Any]]:
+    batch_size: int = 500,
+    max_batch_bytes: int = 10 * 1024 * 1024,
+    thread_count: int = 4,
+    refresh: bool = True,
+    bulk_refresh_interval: Optional[str] = None,
+    restore_refresh_interval: Optional[str] = None
+) -> Dict[str, Any]:
     """
-    OpenSearch에서 청크를 검색합니다.
+    _bulk API로 청크들을 병렬 저장합니다.
+    
+    청크 수(batch_size)와 요청 크기(max_batch_bytes) 중 먼저 닿는 기준으로
+    배치를 나누고, thread_count개의 bulk 요청을 동시에 보냅니다.
+    세그먼트 refresh는 청크마다 하지 않고 마지막에 한 번만(또는 전혀) 수행합니다.
     
     Args:
+        chunks: 저장할 청크 리스트
         client: OpenSearch 클라이언트
-        query: 검색 쿼리
+        document_name: 문서 이름
+        metadata: 추가 메타데이터
+        embeddings: 청크에 대응하는 임베딩 벡터 리스트
         index_name: 인덱스 이름
-        size: 반환할 결과 수
+        batch_size: bulk 요청 하나에 담을 최대 청크 수
+        max_batch_bytes: bulk 요청 하나의 최대 바이트 수
+        thread_count: 동시에 보낼 bulk 요청 수
+        refresh: True면 모든 배치가 끝난 뒤 한 번 refresh, False면 refresh 하지 않음
+        bulk_refresh_interval: 저장하는 동안 적용할 refresh_interval
+            (없으면 인덱스 프로필의 bulk_refresh_interval)
+        restore_refresh_interval: 저장이 끝난 뒤 복원할 refresh_interval
+            (없으면 인덱스 프로필의 refresh_interval)
         
     Returns:
-        검색 결과 목록
+        {"saved_ids": 저장된 문서 ID 목록, "errors": 항목별 실패 정보 목록}
+    """
+    if bulk_refresh_interval is None:
+        bulk_refresh_interval = get_index_profile()["bulk_refresh_interval"]
+    if restore_refresh_interval is None:
+        restore_refresh_interval = get_index_profile()["refresh_interval"]
+    
+    timestamp = datetime.now().isoformat()
+    doc_ids = [_chunk_doc_id(document_name, i) for i in range(len(chunks))]
+    
+    actions = [
+        {
+            "_op_type": "index",
+            "_index": index_name,
+            "_id": doc_ids[i],
+            "_source": _build_chunk_doc(chunk, i, document_name, timestamp, metadata, embeddings)
+        }
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    with _bulk_refresh_interval(client, index_name, bulk_refresh_interval, restore_refresh_interval):
+        result = _run_bulk_actions(
+            client,
+            actions,
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            thread_count=thread_count
+        )
+    
+    if refresh and result["ok_ids"]:
+        refresh_index(client, index_name)
+    
+    return {"saved_ids": result["ok_ids"], "errors": result["errors"]}
+
+# 인덱스별로 진행 중인 bulk 저장 수 (같은 프로세스의 동시 저장이 서로의 설정을 덮어쓰지 않도록)
+_bulk_refresh_lock = threading.Lock()
+_active_bulk_loads: Dict[str, int] = {}
+
+@contextmanager
+def _bulk_refresh_interval(
+    client: OpenSearch,
+    index_name: str,
+    interval: Optional[str],
+    restore_interval: Optional[str] = None
+):
     """
-    search_body = {
+    bulk 저장 동안 인덱스의 refresh_interval을 바꾸고 끝나면 프로필 설정값으로 되돌립니다.
+    
+    저장 시작 시점의 값을 기억했다가 되돌리면, 동시에 진행 중인 다른 저장이 바꿔 둔 값(-1)을
+    복원하게 되어 refresh가 꺼진 채 남을 수 있습니다. 그래서 같은 프로세스에서는 인덱스별로
+    진행 중인 저장 수를 세어 마지막 저장이 끝날 때만, 항상 restore_interval로 복원합니다.
+    다른 프로세스의 저장과 겹치면 refresh가 조금 일찍 켜질 수 있지만 꺼진 채 남지는 않습니다.
+    """
+    if not interval:
+        yield
+        return
+    
+    with _bulk_refresh_lock:
+        _active_bulk_loads[index_name] = _active_bulk_loads.get(index_name, 0) + 1
+        first = _active_bulk_loads[index_name] == 1
+        if first:
+            try:
+                client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": interval}})
+            except Exception as e:
+                print(f"⚠️ refresh_interval 변경 실패: {str(e)}")
+    
+    try:
+        yield
+    finally:
+        with _bulk_refresh_lock:
+            _active_bulk_loads[index_name] -= 1
+            last = _active_bulk_loads[index_name] == 0
+            if last:
+                del _active_bulk_loads[index_name]
+                try:
+                    # restore_interval이 None이면 클러스터 기본값으로 복원
+                    client.indices.put_settings(
+                        index=index_name,
+                        body={"index": {"refresh_interval": restore_interval}}
+                    )
+                except Exception as e:
+                    print(f"⚠️ refresh_interval 복원 실패 ({index_name}): {str(e)}")
+
+def _run_bulk_actions(
+    client: OpenSearch,
+    actions: List[Dict[str, Any]],
+    batch_size: int = 500,
+    max_batch_bytes: int = 10 * 1024 * 1024,
+    thread_count: int = 4
+) -> Dict[str, Any]:
+    """
+    bulk 액션 목록을 parallel_bulk로 실행하고 항목별 성공/실패를 모읍니다.
+    
+    Returns:
+        {"ok_ids": 성공한 문서 ID 목록(액션 순서), "errors": 항목별 실패 정보 목록}
+    """
+    positions = {action["_id"]: position for position, action in enumerate(actions)}
+    
+    def chunk_id_of(doc_id):
+        position = positions.get(doc_id)
+        if position is None:
+            return None
+        source = actions[position].get("_source") or {}
+        return source.get("chunk_id")
+    
+    ok_ids = []
+    errors = []
+    
+    try:
+        for ok, item in helpers.parallel_bulk(
+            client,
+            iter(actions),
+            thread_count=max(1, thread_count),
+            chunk_size=max(1, batch_size),
+            max_chunk_bytes=max_batch_bytes,
+            raise_on_error=False,
+            raise_on_exception=False
+        ):
+            op_type, op_result = next(iter(item.items()))
+            doc_id = op_result.get("_id")
+            # 이미 없는 문서를 삭제하는 것은 실패로 보지 않음
+            if ok or (op_type == "delete" and op_result.get("status") == 404):
+                ok_ids.append(doc_id)
+            else:
+                errors.append({
+                    "chunk_id": chunk_id_of(doc_id),
+                    "doc_id": doc_id,
+                    "op_type": op_type,
+                    "status": op_result.get("status"),
+                    "error": op_result.get("error") or op_result.get("exception")
+                })
+    except Exception as e:
+        # 요청 자체가 실패한 경우 아직 결과를 받지 못한 항목을 모두 실패로 기록
+        print(f"❌ bulk 요청 중 오류: {str(e)}")
+        reported = set(ok_ids) | {error["doc_id"] for error in errors}
+        for action in actions:
+            if action["_id"] not in reported:
+                errors.append({
+                    "chunk_id": chunk_id_of(action["_id"]),
+                    "doc_id": action["_id"],
+                    "op_type": action["_op_type"],
+                    "status": None,
+                    "error": str(e)
+                })
+    
+    # 저장/삭제가 하나라도 반영됐으면 이전 검색 결과 캐시를 무효화
+    if ok_ids:
+        bump_index_generation()
+    
+    # 결과는 스레드 실행 순서대로 오므로 액션 순서로 정렬
+    ok_ids.sort(key=lambda doc_id: positions.get(doc_id, -1))
+    errors.sort(key=lambda error: positions.get(error["doc_id"], -1))
+    
+    return {"ok_ids": ok_ids, "errors": errors}
+
+def refresh_index(client: OpenSearch, index_name: str):
+    """인덱스를 한 번 refresh 합니다. 실패해도 저장 결과에는 영향을 주지 않습니다."""
+    try:
+        client.indices.refresh(index=index_name)
+        # refresh 전 검색으로 캐시된 결과에는 방금 저장한 청크가 없으므로 다시 무효화
+        bump_index_generation()
+    except Exception as e:
+        print(f"⚠️ 인덱스 refresh 실패: {str(e)}")
+
+def _chunk_content_hash(
+    content: str,
+    embedding: Optional[List[float]] = None,
+    structure: Optional[Dict[str, Any]] = None
+) -> str:
+    """청크 내용과 임베딩 벡터(구조화 청크면 섹션/페이지 필드도)로 변경 감지용 해시를 계산합니다."""
+    digest = hashlib.sha256(content.encode("utf-8"))
+    if embedding:
+        digest.update(struct.pack(f"<{len(embedding)}f", *embedding))
+    if structure:
+        digest.update(json.dumps(structure, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+def _fetch_existing_chunk_hashes(
+    client: OpenSearch,
+    document_name: str,
+    index_name: str
+) -> Dict[str, Optional[str]]:
+    """인덱스에 저장된 문서의 청크 ID별 content_hash를 가져옵니다."""
+    existing = {}
+    for hit in helpers.scan(
+        client,
+        index=index_name,
+        query={
+            "query": {"term": {"document_name": document_name}},
+            "_source": ["content_hash"]
+        }
+    ):
+        existing[hit["_id"]] = hit.get("_source", {}).get("content_hash")
+    return existing
+
+def sync_chunks_to_opensearch(
+    chunks: List[Union[str, ChunkRecord]],
+    client: OpenSearch,
+    document_name: str,
+    metadata: Optional[Dict[str, Any]] = None,
+    embeddings: Optional[List[List[float]]] = None,
+    index_name: str = "document-chunks",
+    batch_size: int = 500,
+    max_batch_bytes: int = 10 * 1024 * 1024,
+    thread_count: int = 4,
+    refresh: bool = True,
+    profile: Optional[str] = None,
+    quantization: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    문서의 새 리비전을 기존 인덱스와 비교해 바뀐 청크만 저장합니다.
+    
+    청크마다 저장된 content_hash(내용 + 임베딩)를 비교해 그대로인 청크는 건너뛰고,
+    새 리비전에 없는 이전 청크는 삭제합니다. 내용이 같은 청크는 메타데이터와
+    timestamp도 이전 값을 유지합니다.
+    
+    Args:
+        chunks: 저장할 청크 리스트
+        client: OpenSearch 클라이언트
+        document_name: 문서 이름
+        metadata: 추가 메타데이터
+        embeddings: 청크에 대응하는 임베딩 벡터 리스트
+        index_name: 인덱스 이름
+        batch_size: bulk 요청 하나에 담을 최대 항목 수
+        max_batch_bytes: bulk 요청 하나의 최대 바이트 수
+        thread_count: 동시에 보낼 bulk 요청 수
+        refresh: True면 동기화가 끝난 뒤 한 번 refresh, False면 refresh 하지 않음
+        profile: 인덱스가 없을 때 생성에 사용할 인덱스 프로필 이름
+        quantization: "int8" 또는 "fp16"이면 양자화 인덱스에 저장 (인덱스가 없으면 해당 프로필로 생성)
+        
+    Returns:
+        added/updated/unchanged/removed 문서 ID 목록과 saved_ids(현재 인덱스에 있는
+        이 문서의 청크 ID), errors(항목별 실패 정보)를 담은 딕셔너리
+    """
+    _create_index_if_missing(client, index_name, profile or QUANTIZATION_PROFILES.get(quantization))
+    if any(isinstance(chunk, ChunkRecord) for chunk in chunks):
+        _ensure_record_field_mappings(client, index_name)
+    embeddings = _quantize_embeddings_for_index(client, index_name, embeddings, quantization)
+    
+    existing = _fetch_existing_chunk_hashes(client, document_name, index_name)
+    timestamp = datetime.now().isoformat()
+    
+    summary = {"added": [], "updated": [], "unchanged": [], "removed": []}
+    actions = []
+    current_ids = []
+    
+    for i, chunk in enumerate(chunks):
+        doc_id = _chunk_doc_id(document_name, i)
+        doc = _build_chunk_doc(chunk, i, document_name, timestamp, metadata, embeddings)
+        current_ids.append(doc_id)
+        
+        if doc_id not in existing:
+            summary["added"].append(doc_id)
+        elif existing[doc_id] != doc["content_hash"]:
+            summary["updated"].append(doc_id)
+        else:
+            summary["unchanged"].append(doc_id)
+            continue
+        
+        actions.append({"_op_type": "index", "_index": index_name, "_id": doc_id, "_source": doc})
+    
+    current = set(current_ids)
+    for doc_id in existing:
+        if doc_id not in current:
+            summary["removed"].append(doc_id)
+            actions.append({"_op_type": "delete", "_index": index_name, "_id": doc_id})
+    
+    result = {"ok_ids": [], "errors": []}
+    if actions:
+        result = _run_bulk_actions(
+            client,
+            actions,
+            batch_size=batch_size,
+            max_batch_bytes=max_batch_bytes,
+            thread_count=thread_count
+        )
+        if refresh:
+            refresh_index(client, index_name)
+    
+    failed = {error["doc_id"] for error in result["errors"]}
+    summary["saved_ids"] = [
+        doc_id for doc_id in current_ids
+        if doc_id not in failed and (existing.get(doc_id) is not None or doc_id in result["ok_ids"])
+    ]
+    summary["errors"] = result["errors"]
+    
+    for error in summary["errors"]:
+        print(f"❌ {error['op_type']} 실패 ({error['doc_id']}): [{error['status']}] {error['error']}")
+    
+    print(
+        f"✅ 동기화 완료: 추가 {len(summary['added'])}, 변경 {len(summary['updated'])}, "
+        f"유지 {len(summary['unchanged'])}, 삭제 {len(summary['removed'])}"
+    )
+    return summary
+
+# 인덱스별 _meta 캐시 {index_name: (조회 시각, _meta)} (양자화 보정 정보, kNN 검색 파라미터)
+_INDEX_META_CACHE: Dict[str, Any] = {}
+_INDEX_META_CACHE_TTL = 60
+
+def get_index_meta(client: OpenSearch, index_name: str, use_cache: bool = True) -> Dict[str, Any]:
+    """
+    인덱스 매핑의 _meta를 가져옵니다 (조회 실패 시 마지막으로 캐시된 값, 없으면 빈 딕셔너리).
+    """
+    cached = _INDEX_META_CACHE.get(index_name)
+    if use_cache and _index_meta_cache_fresh(cached):
+        return cached[1]
+    
+    try:
+        mappings = client.indices.get_mapping(index=index_name)
+    except Exception as e:
+        print(f"⚠️ 인덱스 매핑 조회 실패: {str(e)}")
+        return cached[1] if cached else {}
+    
+    return _cache_index_meta(index_name, mappings)
+
+def get_index_quantization(client: OpenSearch, index_name: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    인덱스 매핑 _meta에 기록된 양자화 보정 정보를 가져옵니다.
+    
+    Returns:
+        {"mode": "int8", "scale": ...} 같은 보정 정보, 양자화 인덱스가 아니면 None
+    """
+    return get_index_meta(client, index_name, use_cache).get("quantization")
+
+def _index_meta_cache_fresh(cached) -> bool:
+    return bool(cached) and time.time() - cached[0] < _INDEX_META_CACHE_TTL
+
+def _cache_index_meta(index_name: str, mappings: Dict[str, Any]) -> Dict[str, Any]:
+    meta = _meta_from_mappings(mappings)
+    _INDEX_META_CACHE[index_name] = (time.time(), meta)
+    return meta
+
+def _meta_from_mappings(mappings: Dict[str, Any]) -> Dict[str, Any]:
+    """get_mapping 응답에서 _meta를 꺼냅니다."""
+    # alias는 한 번에 하나의 세대만 가리킴
+    for mapping in mappings.values():
+        return mapping.get("mappings", {}).get("_meta", {})
+    return {}
+
+def _store_index_quantization(client: OpenSearch, index_name: str, calibration: Dict[str, Any]):
+    """보정 정보를 인덱스 매핑 _meta에 기록합니다 (기존 _meta 항목은 유지)."""
+    mappings = client.indices.get_mapping(index=index_name)
+    for concrete_index, mapping in mappings.items():
+        meta = dict(mapping.get("mappings", {}).get("_meta", {}))
+        meta["quantization"] = calibration
+        client.indices.put_mapping(index=concrete_index, body={"_meta": meta})
+    _INDEX_META_CACHE[index_name] = (time.time(), meta)
+
+def _quantize_embeddings_for_index(
+    client: OpenSearch,
+    index_name: str,
+    embeddings: Optional[List[List[float]]],
+    quantization: Optional[str] = None
+) -> Optional[List[List[float]]]:
+    """
+    인덱스의 양자화 설정에 맞춰 임베딩을 변환합니다.
+    
+    int8 스케일은 인덱스에 한 번만 기록되고 이후 저장에서 다시 계산하지 않습니다.
+    스케일이 없는 빈 int8 인덱스에 처음 저장할 때만 이번 배치 전체로 계산하며
+    (코퍼스로 미리 정하려면 calibrate_index_quantization 또는 rebuild_chunk_index 사용),
+    스케일 없이 이미 벡터가 들어 있는 인덱스에는 저장을 거부합니다.
+    """
+    calibration = get_index_quantization(client, index_name, use_cache=False)
+    
+    if quantization and (calibration or {}).get("mode") != quantization:
+        raise ValueError(
+            f"인덱스 {index_name}의 양자화 설정({(calibration or {}).get('mode')})이 "
+            f"요청한 모드({quantization})와 다릅니다. 해당 프로필로 인덱스를 재구축하세요."
+        )
+    
+    if not calibration or not embeddings:
+        return embeddings
+    
+    if calibration["mode"] == "int8" and "scale" not in calibration:
+        calibration = calibrate_index_quantization(client, index_name, embeddings)
+    
+    return [quantize_vector(embedding, calibration) if embedding else embedding for embedding in embeddings]
+
+def calibrate_index_quantization(
+    client: OpenSearch,
+    index_name: str,
+    embeddings: List[List[float]]
+) -> Dict[str, Any]:
+    """
+    int8 인덱스의 스케일을 코퍼스 임베딩(표본)으로 한 번 계산해 _meta에 기록합니다.
+    
+    이미 스케일이 있거나, 스케일 없이 벡터가 저장된 인덱스면 ValueError
+    (저장된 벡터와 다른 스케일이 섞이지 않도록 다시 계산하지 않음).
+    
+    Returns:
+        기록한 보정 정보 {"mode": "int8", "scale", "percentile", "samples"}
+    """
+    calibration = get_index_quantization(client, index_name, use_cache=False)
+    if (calibration or {}).get("mode") != "int8":
+        raise ValueError(f"인덱스 {index_name}는 int8 양자화 인덱스가 아닙니다.")
+    if "scale" in calibration:
+        raise ValueError(f"인덱스 {index_name}의 int8 스케일이 이미 정해져 있습니다 (scale={calibration['scale']}).")
+    stored = client.count(index=index_name, body={"query": {"exists": {"field": "embedding"}}})["count"]
+    if stored:
+        raise ValueError(
+            f"인덱스 {index_name}에 스케일 없이 저장된 벡터 {stored}개가 있어 보정할 수 없습니다. "
+            "rebuild_chunk_index(reindex_from_live=False, fill_fn=...)로 다시 임베딩하세요."
+        )
+    
+    calibration = fit_calibration("int8", [embedding for embedding in embeddings if embedding])
+    _store_index_quantization(client, index_name, calibration)
+    print(f"📏 int8 양자화 보정 완료: 임베딩 {calibration['samples']}개로 scale={calibration['scale']:.6f}")
+    return calibration
+
+def _prepare_query_vector(
+    client: OpenSearch,
+    index_name: str,
+    query_vector: List[float]
+) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """
+    검색 벡터에 인덱스 저장 시와 같은 양자화 변환을 적용합니다.
+    
+    Returns:
+        (변환된 벡터, 인덱스 _meta의 kNN method_parameters 또는 None)
+    """
+    return _apply_index_meta(get_index_meta(client, index_name), query_vector)
+
+def _apply_index_meta(meta: Dict[str, Any], query_vector: List[float]) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    return _apply_query_calibration(meta.get("quantization"), query_vector), meta.get("method_parameters")
+
+def _apply_query_calibration(calibration: Optional[Dict[str, Any]], query_vector: List[float]) -> List[Any]:
+    if calibration and (calibration["mode"] != "int8" or "scale" in calibration):
+        return quantize_vector(query_vector, calibration)
+    return query_vector
+
+_SOURCE_FIELDS = [
+    "chunk_id", "content", "document_name", "timestamp", "metadata",
+    "section_id", "section_header", "start_page", "end_page"
+]
+
+def build_search_filters(filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    구조화된 검색 범위를 OpenSearch filter 절 목록으로 변환합니다.
+    
+    Args:
+        filters: 검색 범위. 지원 항목:
+            "document_name": 문서 이름 또는 문서 이름 목록
+            "metadata": {필드: 값 또는 값 목록} (metadata.필드에 대한 term/terms)
+            "time_range": {"gte": ..., "lte": ...} (timestamp 범위, gt/lt도 가능)
+            "section_id": 섹션 번호 또는 목록 (예: "3.2")
+            "section_prefix": 섹션 번호 접두어 (예: "3." -> 3장의 모든 하위 섹션)
+            "pages": {"gte": ..., "lte": ...} 이 페이지 범위와 겹치는 청크 (구조화 청크만 해당)
+            
+    Returns:
+        bool.filter에 넣을 절 목록 (범위가 없으면 빈 목록)
+    """
+    if not filters:
+        return []
+    
+    clauses = []
+    
+    def term_clause(field, value):
+        if isinstance(value, (list, tuple, set)):
+            return {"terms": {field: list(value)}}
+        return {"term": {field: value}}
+    
+    if filters.get("document_name"):
+        clauses.append(term_clause("document_name", filters["document_name"]))
+    
+    for field, value in (filters.get("metadata") or {}).items():
+        if value is not None and value != []:
+            clauses.append(term_clause(f"metadata.{field}", value))
+    
+    time_range = {
+        key: value for key, value in (filters.get("time_range") or {}).items()
+        if key in ("gte", "gt", "lte", "lt") and value is not None
+    }
+    if time_range:
+        clauses.append({"range": {"timestamp": time_range}})
+    
+    if filters.get("section_id"):
+        clauses.append(term_clause("section_id", filters["section_id"]))
+    
+    if filters.get("section_prefix"):
+        clauses.append({"prefix": {"section_id": filters["section_prefix"]}})
+    
+    # 청크 구간 [start_page, end_page]가 요청 범위와 겹치면 포함
+    pages = filters.get("pages") or {}
+    if pages.get("gte") is not None:
+        clauses.append({"range": {"end_page": {"gte": pages["gte"]}}})
+    if pages.get("lte") is not None:
+        clauses.append({"range": {"start_page": {"lte": pages["lte"]}}})
+    
+    return clauses
+
+def _filtered_match(query_text: str, clauses: List[Dict[str, Any]], boost: Optional[float] = None) -> Dict[str, Any]:
+    """BM25 match 절 (범위가 있으면 bool.filter로 감쌈)"""
+    match = {"match": {"content": {"query": query_text, "boost": boost}}} if boost is not None \
+        else {"match": {"content": query_text}}
+    if not clauses:
+        return match
+    return {"bool": {"must": [match], "filter": clauses}}
+
+def _filtered_knn(
+    query_vector: List[Any],
+    k: int,
+    clauses: List[Dict[str, Any]],
+    boost: Optional[float] = None,
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    kNN 절. 범위는 kNN 내부 filter로 넣어 그래프 탐색 중에 적용되게 합니다
+    (post-filter처럼 k개를 찾은 뒤 걸러내서 결과가 줄어들지 않음).
+    method_parameters는 인덱스 _meta에 기록된 검색 파라미터입니다 (lucene 프로필의 ef_search).
+    """
+    knn = {"vector": query_vector, "k": k}
+    if boost is not None:
+        knn["boost"] = boost
+    if method_parameters:
+        knn["method_parameters"] = method_parameters
+    if clauses:
+        knn["filter"] = {"bool": {"filter": clauses}}
+    return {"knn": {"embedding": knn}}
+
+def _build_text_search_body(query: str, size: int, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """BM25 match 검색 본문"""
+    return {
+        "query": _filtered_match(query, build_search_filters(filters)),
+        "size": size,
+        "_source": _SOURCE_FIELDS
+    }
+
+def _build_vector_search_body(
+    query_vector: List[Any],
+    size: int,
+    min_score: float,
+    filters: Optional[Dict[str, Any]] = None,
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """kNN 검색 본문"""
+    return {
+        "query": _filtered_knn(query_vector, size, build_search_filters(filters), method_parameters=method_parameters),
+        "min_score": min_score,
+        "size": size,
+        "_source": _SOURCE_FIELDS
+    }
+
+def _build_hybrid_search_body(
+    query_text: str,
+    query_vector: List[Any],
+    size: int,
+    text_weight: float,
+    vector_weight: float,
+    filters: Optional[Dict[str, Any]] = None,
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """BM25 match와 kNN을 bool.should로 결합한 검색 본문"""
+    clauses = build_search_filters(filters)
+    body = {
+        "query": {
+            "bool": {
+                "should": [
+                    {
+                        "match": {
+                            "content": {
+                                "query": query_text,
+                                "boost": text_weight
+                            }
+                        }
+                    },
+                    _filtered_knn(query_vector, size, clauses, vector_weight, method_parameters)
+                ]
+            }
+        },
+        "size": size,
+        "_source": _SOURCE_FIELDS
+    }
+    if clauses:
+        body["query"]["bool"]["filter"] = clauses
+    return body
+
+HYBRID_FUSION_TYPES = ("rrf", "pipeline", "bool")
+
+# 기존 호출자의 순위와 점수 크기가 바뀌지 않도록 기본 결합 방식은 bool.should 합산
+DEFAULT_HYBRID_FUSION = "bool"
+
+def _hybrid_candidate_size(size: int, candidate_size: Optional[int]) -> int:
+    """융합 전에 BM25/kNN 각각에서 가져올 후보 수 (기본: size의 4배, 최소 20)"""
+    return max(size, candidate_size or max(size * 4, 20))
+
+def _build_pipeline_hybrid_body(
+    query_text: str,
+    query_vector: List[Any],
+    size: int,
+    candidate_size: int,
+    filters: Optional[Dict[str, Any]] = None,
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """search pipeline 정규화용 hybrid 쿼리 본문"""
+    clauses = build_search_filters(filters)
+    return {
         "query": {
-            "match": {
-                "content": query
+            "hybrid": {
+                "queries": [
+                    _filtered_match(query_text, clauses),
+                    _filtered_knn(query_vector, candidate_size, clauses, method_parameters=method_parameters)
+                ]
             }
         },
         "size": size,
-        "_source": ["chunk_id", "content", "document_name", "timestamp", "metadata"]
+        "_source": _SOURCE_FIELDS
     }
+
+def _hybrid_pipeline_name(normalization: str, text_weight: float, vector_weight: float) -> str:
+    """정규화 방식과 가중치별 search pipeline 이름"""
+    return f"chunks-hybrid-{normalization}-{text_weight:g}-{vector_weight:g}".replace(".", "_")
+
+def _hybrid_pipeline_body(normalization: str, text_weight: float, vector_weight: float) -> Dict[str, Any]:
+    total = (text_weight + vector_weight) or 1.0
+    return {
+        "description": "BM25/kNN 점수 정규화 후 가중 평균",
+        "phase_results_processors": [
+            {
+                "normalization-processor": {
+                    "normalization": {"technique": normalization},
+                    "combination": {
+                        "technique": "arithmetic_mean",
+                        "parameters": {"weights": [text_weight / total, vector_weight / total]}
+                    }
+                }
+            }
+        ]
+    }
+
+# 이미 생성한 search pipeline 이름 (프로세스 내 캐시)
+_CREATED_PIPELINES = set()
+
+def ensure_hybrid_search_pipeline(
+    client: OpenSearch,
+    normalization: str = "min_max",
+    text_weight: float = 0.5,
+    vector_weight: float = 0.5
+) -> str:
+    """
+    BM25와 kNN 점수를 정규화(min_max 또는 l2)해 결합하는 search pipeline을 만듭니다.
     
-    try:
-        response = client.search(index=index_name, body=search_body)
-        hits = response['hits']['hits']
+    Returns:
+        search pipeline 이름
+    """
+    name = _hybrid_pipeline_name(normalization, text_weight, vector_weight)
+    if name not in _CREATED_PIPELINES:
+        client.search_pipeline.put(
+            id=name,
+            body=_hybrid_pipeline_body(normalization, text_weight, vector_weight)
+        )
+        _CREATED_PIPELINES.add(name)
+    return name
+
+async def aensure_hybrid_search_pipeline(
+    client: "AsyncOpenSearch",
+    normalization: str = "min_max",
+    text_weight: float = 0.5,
+    vector_weight: float = 0.5
+) -> str:
+    """ensure_hybrid_search_pipeline의 비동기 버전입니다."""
+    name = _hybrid_pipeline_name(normalization, text_weight, vector_weight)
+    if name not in _CREATED_PIPELINES:
+        await client.search_pipeline.put(
+            id=name,
+            body=_hybrid_pipeline_body(normalization, text_weight, vector_weight)
+        )
+        _CREATED_PIPELINES.add(name)
+    return name
+
+def _rrf_fuse(
+    ranked_lists: List[List[Dict[str, Any]]],
+    weights: List[float],
+    size: int,
+    rrf_k: int = 60
+) -> List[Dict[str, Any]]:
+    """
+    reciprocal-rank fusion: 각 목록의 순위 r에 대해 weight / (rrf_k + r)을 더해 정렬합니다.
+    
+    점수 크기가 다른 BM25와 코사인 점수를 순위만으로 결합하므로 정규화가 필요 없습니다.
+    """
+    fused = {}
+    for results, weight in zip(ranked_lists, weights):
+        for rank, result in enumerate(results, 1):
+            entry = fused.setdefault(result["id"], {**result, "score": 0.0})
+            entry["score"] += weight / (rrf_k + rank)
+    
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:size]
+
+def _rrf_candidate_bodies(
+    query_text: str,
+    query_vector: List[Any],
+    candidate_size: int,
+    filters: Optional[Dict[str, Any]] = None,
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """RRF용 BM25 / kNN 후보 검색 본문 (kNN은 min_score 없이 candidate_size개)"""
+    return [
+        _build_text_search_body(query_text, candidate_size, filters),
+        _build_vector_search_body(query_vector, candidate_size, 0.0, filters, method_parameters)
+    ]
+
+def _msearch_lines(index_name: str, bodies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    lines = []
+    for body in bodies:
+        lines.append({"index": index_name})
+        lines.append(body)
+    return lines
+
+def _parse_msearch_response(response: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """_msearch 응답을 검색별 결과 목록으로 변환합니다 (실패한 검색이 있으면 예외)."""
+    parsed = []
+    for item in response["responses"]:
+        if "error" in item:
+            error = item["error"]
+            raise RuntimeError(error.get("reason", str(error)) if isinstance(error, dict) else str(error))
+        parsed.append(_parse_hits(item))
+    return parsed
+
+def _parse_hits(response: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """검색 응답의 hit 목록을 결과 딕셔너리 목록으로 변환합니다."""
+    results = []
+    for hit in response['hits']['hits']:
+        result = {
+            "id": hit["_id"],
+            "score": hit["_score"],
+            **hit["_source"]
+        }
+        results.append(result)
+    return results
+
+def list_document_names(
+    client: OpenSearch,
+    index_name: str = "document-chunks",
+    size: int = 1000
+) -> List[str]:
+    """
+    인덱스에 저장된 문서 이름 목록을 반환합니다 (검색 범위 선택용).
+    
+    Args:
+        client: OpenSearch 클라이언트
+        index_name: 인덱스 이름
+        size: 최대 문서 수
         
-        results = []
-        for hit in hits:
-            result = {
-                "id": hit["_id"],
-                "score": hit["_score"],
-                **hit["_source"]
+    Returns:
+        이름순으로 정렬된 문서 이름 목록
+    """
+    try:
+        response = client.search(
+            index=index_name,
+            body={
+                "size": 0,
+                "aggs": {"documents": {"terms": {"field": "document_name", "size": size}}}
             }
-            results.append(result)
+        )
+        return sorted(bucket["key"] for bucket in response["aggregations"]["documents"]["buckets"])
+    except Exception as e:
+        print(f"❌ 문서 목록 조회 실패: {str(e)}")
+        return []
+
+@cached_search("text")
+def search_chunks(
+    client: OpenSearch,
+    query: str,
+    index_name: str = "document-chunks",
+    size: int = 10,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    OpenSearch에서 청크를 검색합니다.
+    
+    Args:
+        client: OpenSearch 클라이언트
+        query: 검색 쿼리
+        index_name: 인덱스 이름
+        size: 반환할 결과 수
+        filters: 검색 범위 (build_search_filters 참고)
         
-        return results
+    Returns:
+        검색 결과 목록
+    """
+    try:
+        response = client.search(index=index_name, body=_build_text_search_body(query, size, filters))
+        return _parse_hits(response)
     except Exception as e:
         print(f"❌ 검색 실패: {str(e)}")
         return []
 
+@cached_search("vector")
 def vector_search_chunks(
     client: OpenSearch,
     query_vector: List[float],
     index_name: str = "document-chunks",
     size: int = 10,
-    min_score: float = 0.7
+    min_score: float = 0.7,
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     벡터 유사도를 이용해 OpenSearch에서 청크를 검색합니다.
@@ -248,42 +1230,24 @@ def vector_search_chunks(
         index_name: 인덱스 이름
         size: 반환할 결과 수
         min_score: 최소 유사도 점수
+        filters: 검색 범위 (build_search_filters 참고, kNN 내부 pre-filter로 적용)
         
     Returns:
         검색 결과 목록
     """
-    search_body = {
-        "query": {
-            "knn": {
-                "embedding": {
-                    "vector": query_vector,
-                    "k": size
-                }
-            }
-        },
-        "min_score": min_score,
-        "size": size,
-        "_source": ["chunk_id", "content", "document_name", "timestamp", "metadata"]
-    }
+    query_vector, method_parameters = _prepare_query_vector(client, index_name, query_vector)
     
     try:
-        response = client.search(index=index_name, body=search_body)
-        hits = response['hits']['hits']
-        
-        results = []
-        for hit in hits:
-            result = {
-                "id": hit["_id"],
-                "score": hit["_score"],
-                **hit["_source"]
-            }
-            results.append(result)
-        
-        return results
+        response = client.search(
+            index=index_name,
+            body=_build_vector_search_body(query_vector, size, min_score, filters, method_parameters)
+        )
+        return _parse_hits(response)
     except Exception as e:
         print(f"❌ 벡터 검색 실패: {str(e)}")
         return []
 
+@cached_search("hybrid")
 def hybrid_search_chunks(
     client: OpenSearch,
     query_text: str,
@@ -291,11 +1255,21 @@ def hybrid_search_chunks(
     index_name: str = "document-chunks",
     size: int = 10,
     text_weight: float = 0.5,
-    vector_weight: float = 0.5
+    vector_weight: float = 0.5,
+    fusion: str = DEFAULT_HYBRID_FUSION,
+    candidate_size: Optional[int] = None,
+    rrf_k: int = 60,
+    normalization: str = "min_max",
+    filters: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """
     텍스트 검색과 벡터 검색을 결합한 하이브리드 검색을 수행합니다.
     
+    기본값은 기존과 같은 "bool"(BM25와 kNN 점수 합산)입니다. BM25 점수는 상한이 없고
+    코사인 점수는 0~1이라 합산에서는 가중치가 거의 의미가 없으므로 순위 품질이 중요하면
+    fusion="rrf"나 "pipeline"을 사용하세요. 결합 방식마다 점수 크기가 다르므로
+    (RRF 점수는 1/(rrf_k+순위) 합이라 0.03 안팎) 점수 기준값을 쓰는 호출자는 방식에 맞춰야 합니다.
+    
     Args:
         client: OpenSearch 클라이언트
         query_text: 검색할 텍스트
@@ -304,56 +1278,358 @@ def hybrid_search_chunks(
         size: 반환할 결과 수
         text_weight: 텍스트 검색 가중치
         vector_weight: 벡터 검색 가중치
+        fusion: 결합 방식
+            "rrf" - BM25/kNN 후보를 _msearch로 함께 가져와 클라이언트에서 reciprocal-rank fusion
+            "pipeline" - search pipeline으로 점수를 정규화(normalization)한 뒤 가중 평균
+            "bool" - 기존 방식, 기본값 (bool.should에 boost로 합산)
+        candidate_size: 결합 전에 각 검색에서 가져올 후보 수 (기본: size의 4배, 최소 20)
+        rrf_k: RRF 순위 상수
+        normalization: "pipeline" 결합 시 정규화 방식 ("min_max" 또는 "l2")
+        filters: 검색 범위 (build_search_filters 참고, kNN 내부 pre-filter로 적용)
         
     Returns:
         검색 결과 목록
     """
     if query_vector is None:
         # 벡터가 없으면 텍스트 검색만 수행
-        return search_chunks(client, query_text, index_name, size)
+        return search_chunks(client, query_text, index_name, size, filters)
     
-    search_body = {
-        "query": {
-            "bool": {
-                "should": [
-                    {
-                        "match": {
-                            "content": {
-                                "query": query_text,
-                                "boost": text_weight
-                            }
-                        }
-                    },
-                    {
-                        "knn": {
-                            "embedding": {
-                                "vector": query_vector,
-                                "k": size,
-                                "boost": vector_weight
-                            }
-                        }
-                    }
-                ]
-            }
+    _check_fusion(fusion)
+    query_vector, method_parameters = _prepare_query_vector(client, index_name, query_vector)
+    request = _hybrid_search_request(
+        query_text, query_vector, index_name, size, text_weight, vector_weight,
+        fusion, candidate_size, rrf_k, normalization, filters, method_parameters
+    )
+    
+    try:
+        if request["pipeline"]:
+            ensure_hybrid_search_pipeline(client, normalization, text_weight, vector_weight)
+        response = getattr(client, request["method"])(**request["params"])
+        return request["parse"](response)
+    except Exception as e:
+        print(f"❌ 하이브리드 검색 실패: {str(e)}")
+        return []
+
+def _check_fusion(fusion: str):
+    if fusion not in HYBRID_FUSION_TYPES:
+        raise ValueError(f"지원하지 않는 결합 방식: {fusion} (사용 가능: {', '.join(HYBRID_FUSION_TYPES)})")
+
+def _hybrid_search_request(
+    query_text: str,
+    query_vector: List[Any],
+    index_name: str,
+    size: int,
+    text_weight: float,
+    vector_weight: float,
+    fusion: str,
+    candidate_size: Optional[int],
+    rrf_k: int,
+    normalization: str,
+    filters: Optional[Dict[str, Any]],
+    method_parameters: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    하이브리드 검색 요청을 만듭니다 (동기/비동기 공통, 전송만 호출 측에서 수행).
+    
+    Returns:
+        {"method": "search"|"msearch", "params": 클라이언트 메서드 인자,
+         "pipeline": search pipeline 이름 또는 None (호출 전에 생성 필요),
+         "parse": 응답을 결과 목록으로 바꾸는 함수}
+    """
+    candidates = _hybrid_candidate_size(size, candidate_size)
+    
+    if fusion == "rrf":
+        return {
+            "method": "msearch",
+            "params": {
+                "body": _msearch_lines(index_name, _rrf_candidate_bodies(
+                    query_text, query_vector, candidates, filters, method_parameters
+                ))
+            },
+            "pipeline": None,
+            "parse": lambda response: _rrf_fuse(
+                _parse_msearch_response(response), [text_weight, vector_weight], size, rrf_k
+            )
+        }
+    
+    if fusion == "pipeline":
+        pipeline = _hybrid_pipeline_name(normalization, text_weight, vector_weight)
+        return {
+            "method": "search",
+            "params": {
+                "index": index_name,
+                "body": _build_pipeline_hybrid_body(
+                    query_text, query_vector, size, candidates, filters, method_parameters
+                ),
+                "search_pipeline": pipeline
+            },
+            "pipeline": pipeline,
+            "parse": _parse_hits
+        }
+    
+    return {
+        "method": "search",
+        "params": {
+            "index": index_name,
+            "body": _build_hybrid_search_body(
+                query_text, query_vector, size, text_weight, vector_weight, filters, method_parameters
+            )
         },
-        "size": size,
-        "_source": ["chunk_id", "content", "document_name", "timestamp", "metadata"]
+        "pipeline": None,
+        "parse": _parse_hits
     }
+
+def _embed_search_texts(texts: List[str], embeddings_client=None) -> Dict[str, List[float]]:
+    """
+    배치 검색에 필요한 쿼리 임베딩을 한 번의 embed_documents 호출로 생성합니다.
+    임베딩 캐시에 있는 텍스트는 다시 만들지 않습니다.
+    
+    Returns:
+        {텍스트: 벡터}, 실패하면 빈 딕셔너리
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    if not unique_texts:
+        return {}
+    
+    if embeddings_client is None:
+        from file.upstage import create_embeddings_client
+        embeddings_client = create_embeddings_client()
+        if embeddings_client is None:
+            return {}
     
     try:
-        response = client.search(index=index_name, body=search_body)
-        hits = response['hits']['hits']
+        vectors = embed_texts_cached(embeddings_client, unique_texts)
+        return dict(zip(unique_texts, vectors))
+    except Exception as e:
+        print(f"⚠️ 배치 쿼리 임베딩 생성 실패, 텍스트 검색으로 대체: {e}")
+        return {}
+
+def _build_batch_search_bodies(
+    client: OpenSearch,
+    search: Dict[str, Any],
+    index_name: str,
+    query_vector: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    """
+    배치 검색 항목 하나의 검색 본문 목록을 만듭니다 (벡터가 없으면 텍스트 검색으로 대체).
+    
+    RRF 하이브리드 검색은 BM25/kNN 후보 본문 두 개를, 나머지는 본문 하나를 반환합니다.
+    """
+    search_type = search.get("search_type", "hybrid")
+    size = search.get("size", 10)
+    filters = search.get("filters")
+    
+    if search_type == "text" or query_vector is None:
+        return [_build_text_search_body(search["query"], size, filters)]
+    
+    query_vector, method_parameters = _prepare_query_vector(client, index_name, query_vector)
+    if search_type == "vector":
+        return [_build_vector_search_body(
+            query_vector, size, search.get("min_score", 0.7), filters, method_parameters
+        )]
+    
+    fusion = search.get("fusion", DEFAULT_HYBRID_FUSION)
+    if fusion == "bool":
+        return [_build_hybrid_search_body(
+            search["query"],
+            query_vector,
+            size,
+            search.get("text_weight", 0.5),
+            search.get("vector_weight", 0.5),
+            filters,
+            method_parameters
+        )]
+    
+    if fusion == "pipeline":
+        # _msearch에서는 search pipeline을 검색별로 지정할 수 없어 RRF로 결합
+        print(f"⚠️ 배치 검색에서는 fusion=\"pipeline\"을 지원하지 않아 RRF로 결합합니다 ({search['query']})")
+    candidates = _hybrid_candidate_size(size, search.get("candidate_size"))
+    return _rrf_candidate_bodies(search["query"], query_vector, candidates, filters, method_parameters)
+
+def multi_search_chunks(
+    client: OpenSearch,
+    searches: List[Dict[str, Any]],
+    index_name: str = "document-chunks",
+    embeddings_client=None,
+    max_searches_per_request: int = 50
+) -> List[Dict[str, Any]]:
+    """
+    여러 검색을 _msearch 요청 몇 번으로 묶어 실행합니다.
+    
+    벡터/하이브리드 검색에 필요한 쿼리 임베딩은 질문마다 embed_query를 부르지 않고
+    embed_documents 한 번으로 함께 생성합니다.
+    
+    Args:
+        client: OpenSearch 클라이언트
+        searches: 검색 목록. 각 항목은
+            {"query": 텍스트, "search_type": "text"|"vector"|"hybrid"(기본),
+             "size": 10, "query_vector": 선택, "min_score": 0.7,
+             "text_weight": 0.5, "vector_weight": 0.5,
+             "fusion": "bool"(기본)|"rrf"|"pipeline"("pipeline"은 RRF로 대체하며 경고 출력),
+             "candidate_size": 선택, "rrf_k": 60,
+             "filters": 검색 범위 (build_search_filters 참고)}
+        index_name: 인덱스 이름
+        embeddings_client: 쿼리 임베딩에 사용할 클라이언트 (None이면 새로 생성)
+        max_searches_per_request: _msearch 요청 하나에 담을 최대 검색 수
         
-        results = []
-        for hit in hits:
-            result = {
-                "id": hit["_id"],
-                "score": hit["_score"],
-                **hit["_source"]
-            }
-            results.append(result)
+    Returns:
+        입력 순서와 같은 [{"query", "search_type", "results", "error"}, ...]
+        (error는 해당 검색이 실패했을 때만 메시지, 나머지 검색 결과에는 영향 없음)
+    """
+    texts_to_embed = [
+        search["query"] for search in searches
+        if search.get("search_type", "hybrid") != "text" and search.get("query_vector") is None
+    ]
+    embedded = _embed_search_texts(texts_to_embed, embeddings_client)
+    
+    outputs = []
+    search_bodies = []
+    for search in searches:
+        outputs.append({
+            "query": search["query"],
+            "search_type": search.get("search_type", "hybrid"),
+            "results": [],
+            "error": None
+        })
+        query_vector = search.get("query_vector")
+        if query_vector is None:
+            query_vector = embedded.get(search["query"])
+        search_bodies.append(_build_batch_search_bodies(client, search, index_name, query_vector))
+    
+    step = max(1, max_searches_per_request)
+    for start in range(0, len(searches), step):
+        end = min(start + step, len(searches))
+        bodies = [body for position in range(start, end) for body in search_bodies[position]]
+        
+        try:
+            responses = client.msearch(body=_msearch_lines(index_name, bodies))["responses"]
+        except Exception as e:
+            print(f"❌ 배치 검색 실패 ({start}~{end - 1}): {str(e)}")
+            for output in outputs[start:end]:
+                output["error"] = str(e)
+            continue
         
-        return results
+        offset = 0
+        for position in range(start, end):
+            output = outputs[position]
+            count = len(search_bodies[position])
+            items = responses[offset:offset + count]
+            offset += count
+            
+            errors = [item["error"] for item in items if "error" in item]
+            if errors:
+                error = errors[0]
+                output["error"] = error.get("reason", str(error)) if isinstance(error, dict) else str(error)
+                print(f"❌ 검색 실패 ({output['query']}): {output['error']}")
+            elif count == 1:
+                output["results"] = _parse_hits(items[0])
+            else:
+                search = searches[position]
+                output["results"] = _rrf_fuse(
+                    [_parse_hits(item) for item in items],
+                    [search.get("text_weight", 0.5), search.get("vector_weight", 0.5)],
+                    search.get("size", 10),
+                    search.get("rrf_k", 60)
+                )
+    
+    return outputs
+
+# ---------------------------------------------------------------------------
+# 비동기 검색 (AsyncOpenSearch)
+# 요청 본문 생성과 응답 변환은 동기 함수와 같은 헬퍼(_build_*_body, _hybrid_search_request,
+# _parse_hits)를 사용하므로 각 동기/비동기 쌍은 클라이언트 호출(await 여부)만 다릅니다.
+# ---------------------------------------------------------------------------
+
+def create_async_opensearch_client() -> "AsyncOpenSearch":
+    """현재 이벤트 루프에서 공유하는 AsyncOpenSearch 클라이언트를 반환합니다."""
+    return get_async_opensearch_client()
+
+async def _aprepare_query_vector(
+    client: "AsyncOpenSearch",
+    index_name: str,
+    query_vector: List[float]
+) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """_prepare_query_vector의 비동기 버전입니다."""
+    cached = _INDEX_META_CACHE.get(index_name)
+    if _index_meta_cache_fresh(cached):
+        meta = cached[1]
+    else:
+        try:
+            meta = _cache_index_meta(index_name, await client.indices.get_mapping(index=index_name))
+        except Exception as e:
+            print(f"⚠️ 인덱스 매핑 조회 실패: {str(e)}")
+            meta = cached[1] if cached else {}
+    return _apply_index_meta(meta, query_vector)
+
+@cached_search("text")
+async def asearch_chunks(
+    client: "AsyncOpenSearch",
+    query: str,
+    index_name: str = "document-chunks",
+    size: int = 10,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """search_chunks의 비동기 버전입니다."""
+    try:
+        response = await client.search(index=index_name, body=_build_text_search_body(query, size, filters))
+        return _parse_hits(response)
+    except Exception as e:
+        print(f"❌ 검색 실패: {str(e)}")
+        return []
+
+@cached_search("vector")
+async def avector_search_chunks(
+    client: "AsyncOpenSearch",
+    query_vector: List[float],
+    index_name: str = "document-chunks",
+    size: int = 10,
+    min_score: float = 0.7,
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """vector_search_chunks의 비동기 버전입니다."""
+    query_vector, method_parameters = await _aprepare_query_vector(client, index_name, query_vector)
+    
+    try:
+        response = await client.search(
+            index=index_name,
+            body=_build_vector_search_body(query_vector, size, min_score, filters, method_parameters)
+        )
+        return _parse_hits(response)
+    except Exception as e:
+        print(f"❌ 벡터 검색 실패: {str(e)}")
+        return []
+
+@cached_search("hybrid")
+async def ahybrid_search_chunks(
+    client: "AsyncOpenSearch",
+    query_text: str,
+    query_vector: Optional[List[float]] = None,
+    index_name: str = "document-chunks",
+    size: int = 10,
+    text_weight: float = 0.5,
+    vector_weight: float = 0.5,
+    fusion: str = DEFAULT_HYBRID_FUSION,
+    candidate_size: Optional[int] = None,
+    rrf_k: int = 60,
+    normalization: str = "min_max",
+    filters: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """hybrid_search_chunks의 비동기 버전입니다."""
+    if query_vector is None:
+        return await asearch_chunks(client, query_text, index_name, size, filters)
+    
+    _check_fusion(fusion)
+    query_vector, method_parameters = await _aprepare_query_vector(client, index_name, query_vector)
+    request = _hybrid_search_request(
+        query_text, query_vector, index_name, size, text_weight, vector_weight,
+        fusion, candidate_size, rrf_k, normalization, filters, method_parameters
+    )
+    
+    try:
+        if request["pipeline"]:
+            await aensure_hybrid_search_pipeline(client, normalization, text_weight, vector_weight)
+        response = await getattr(client, request["method"])(**request["params"])
+        return request["parse"](response)
     except Exception as e:
         print(f"❌ 하이브리드 검색 실패: {str(e)}")
-        return []
\ No newline at end of file
+        return []
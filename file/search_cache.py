@@ -0,0 +1,253 @@
+from typing import List, Dict, Any, Optional, Callable
+from collections import OrderedDict
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows에서는 파일 잠금 없이 갱신
+    fcntl = None
+
+# 검색 결과 프로세스 내 캐시 (LRU + TTL + 메모리 상한)
+#
+# 키에는 인덱스 세대(generation) 번호가 들어갑니다. save_chunks_to_opensearch 등
+# 인덱스를 바꾸는 모든 경로가 bump_index_generation()을 호출하므로,
+# 저장/삭제 이후에는 이전 결과가 다시 사용되지 않습니다.
+#
+# 세대 번호는 프로세스 변수가 아니라 공유 파일(INDEX_GENERATION_FILE)에 기록하므로
+# 같은 호스트의 다른 프로세스(python -m file.ingest, python -m file.jobs worker)에서
+# 저장해도 Streamlit 프로세스의 캐시가 무효화됩니다. 다른 호스트에서 인덱스를 바꾸는 경우는
+# 감지하지 못하므로 SEARCH_CACHE_TTL이 최대 지연 시간입니다.
+
+DEFAULT_GENERATION_FILE = os.path.join(os.path.expanduser("~"), ".cache", "bom_search", "index_generation")
+
+_generation_lock = threading.Lock()
+_index_generation = 0          # 공유 파일을 쓸 수 없을 때 사용하는 프로세스 내 세대
+_generation_file_state = None  # (파일 식별자, 읽은 세대)
+_generation_file_warned = False
+
+
+def _generation_file() -> str:
+    return os.getenv("INDEX_GENERATION_FILE", DEFAULT_GENERATION_FILE)
+
+def _warn_generation_file(error: Exception):
+    global _generation_file_warned
+    if not _generation_file_warned:
+        _generation_file_warned = True
+        print(f"⚠️ 인덱스 세대 파일을 사용할 수 없어 프로세스 내 세대로 대체합니다: {error}")
+
+def _read_generation_file(path: str) -> Optional[int]:
+    """공유 세대 파일을 읽습니다. 파일이 바뀌지 않았으면 stat 한 번으로 끝납니다."""
+    global _generation_file_state
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # 갱신은 os.replace로 하므로 새 값이면 inode가 바뀜
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    state = _generation_file_state
+    if state is not None and state[0] == identity:
+        return state[1]
+    with open(path, "r", encoding="utf-8") as f:
+        generation = int(f.read().strip() or 0)
+    _generation_file_state = (identity, generation)
+    return generation
+
+def get_index_generation() -> int:
+    """현재 인덱스 세대 번호를 반환합니다 (같은 호스트의 프로세스끼리 공유)."""
+    try:
+        generation = _read_generation_file(_generation_file())
+    except (OSError, ValueError) as e:
+        _warn_generation_file(e)
+        return _index_generation
+    return _index_generation if generation is None else generation
+
+def bump_index_generation() -> int:
+    """인덱스 내용이 바뀌었음을 알리고 새 세대 번호를 반환합니다 (이전 캐시 항목은 모두 무효)."""
+    global _index_generation
+    with _generation_lock:
+        _index_generation += 1
+        path = _generation_file()
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path + ".lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    current = _read_generation_file(path)
+                    # 파일이 없어졌다가 다시 만들어져도 이전 세대 번호와 겹치지 않도록 시각에서 시작
+                    generation = max((current or 0) + 1, time.time_ns() // 1000 if current is None else 0)
+                    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        f.write(str(generation))
+                    os.replace(tmp_path, path)
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        except (OSError, ValueError) as e:
+            _warn_generation_file(e)
+            return _index_generation
+        return generation
+
+
+class SearchResultCache:
+    """
+    검색 결과 캐시.
+
+    max_entries개 또는 max_bytes(결과 JSON 크기 기준)를 넘으면 가장 오래 쓰지 않은 항목부터
+    지우고, ttl초가 지난 항목은 조회 시 버립니다.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, size, value = entry
+            if time.time() - stored_at > self.ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any):
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time(), size, copy.deepcopy(value))
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/실패 횟수와 현재 사용량을 반환합니다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "generation": get_index_generation()
+            }
+
+
+search_result_cache = SearchResultCache(
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", "300")),
+    max_bytes=int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
+
+
+def _normalize_query(text: str) -> str:
+    """대소문자와 공백 차이만 있는 질문을 같은 키로 취급합니다."""
+    return " ".join(text.split()).lower()
+
+def _vector_digest(vector: List[float]) -> str:
+    return hashlib.sha1(struct.pack(f"<{len(vector)}f", *vector)).hexdigest()
+
+def _cache_key(search_type: str, arguments: Dict[str, Any]) -> str:
+    parts = {"type": search_type, "generation": get_index_generation()}
+    for name, value in arguments.items():
+        if name == "client":
+            continue
+        if name in ("query", "query_text") and isinstance(value, str):
+            value = _normalize_query(value)
+        elif name == "query_vector" and value is not None:
+            value = _vector_digest(value)
+        parts[name] = value
+    return json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+
+def cached_search(search_type: str) -> Callable:
+    """
+    검색 함수 앞에 search_result_cache를 두는 데코레이터 (동기/비동기 함수 모두 지원).
+
+    키는 정규화된 질의, 검색 타입, 나머지 인자(size, filters 등), 인덱스 세대로 만듭니다.
+    빈 결과는 오류로 인한 것일 수 있으므로 캐시하지 않습니다.
+    SEARCH_CACHE_ENABLED=false면 캐시를 거치지 않습니다.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return _cache_key(search_type, dict(bound.arguments))
+
+        def enabled():
+            return os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not enabled():
+                    return await func(*args, **kwargs)
+                key = make_key(args, kwargs)
+                cached = search_result_cache.get(key)
+                if cached is not None:
+                    return cached
+                results = await func(*args, **kwargs)
+                if results:
+                    search_result_cache.put(key, results)
+                return results
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            key = make_key(args, kwargs)
+            cached = search_result_cache.get(key)
+            if cached is not None:
+                return cached
+            results = func(*args, **kwargs)
+            if results:
+                search_result_cache.put(key, results)
+            return results
+        return wrapper
+
+    return decorator
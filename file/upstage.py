@@ -2,108 +2,88 @@
 
 import requests
 import os
-import re
-from typing import Optional, Dict, Any, List, ClassVar
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, ClassVar, Tuple, Union
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-from langchain_openai import AzureOpenAIEmbeddings
+try:
+    from langchain_openai import AzureOpenAIEmbeddings
+except ImportError:  # langchain-openai가 없으면 파싱/청크 분할만 사용할 수 있음
+    AzureOpenAIEmbeddings = None
+from file.embedding_cache import embed_documents_cached
+from file.html_chunker import chunk_html, ChunkRecord
+from file.embedding_scheduler import EmbeddingScheduler, count_tokens
+from file.chunk_budget import budget_chunk_records, chunk_budget_enabled, token_distribution
+from file.parse_cache import get_parse_cache, parse_cache_key, file_sha256
+from file.pdf_shards import (
+    pypdf_available,
+    is_pdf,
+    count_pdf_pages,
+    plan_page_ranges,
+    split_pdf,
+    merge_shard_results,
+    detect_text_layer_pages,
+    plan_ocr_page_ranges
+)
 load_dotenv()
 
+# UPSTAGE_API_URL로 로컬 대체 서버를 지정할 수 있습니다 (테스트용, 요청할 때마다 읽음)
+DEFAULT_UPSTAGE_API_URL = "https://api.upstage.ai/v1/document-digitization"
 
-def extract_chunks_from_html(html_content: str, use_dynamic_headers: bool = True) -> List[str]:
+# 재시도할 HTTP 상태 코드 (구간별 병렬 파싱)
+_PARSE_RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+def extract_chunks_from_html(
+    html_content: str,
+    use_dynamic_headers: bool = True,
+    as_records: bool = False
+) -> Union[List[str], List[ChunkRecord]]:
     """
     HTML 컨텐츠를 청크 헤더 기준으로 분할합니다.
     
+    한 번의 스트리밍 파싱(file.html_chunker.chunk_html)으로 처리하며,
+    문자열 결과는 기존 BeautifulSoup 구현과 같습니다 (compat 모드).
+    
     Args:
         html_content: HTML 문자열
         use_dynamic_headers: True면 자동으로 "숫자.숫자" 패턴 감지, False면 기본 헤더 사용
+        as_records: True면 섹션 번호/헤더/페이지/위치가 담긴 ChunkRecord 목록 반환
+            (text에 "[페이지 N]" 표시를 붙이지 않음)
         
     Returns:
         분할된 청크 목록
     """
-    # BeautifulSoup으로 파싱
-    soup = BeautifulSoup(html_content, "html.parser")
-    
-    chunks = []
-    current_chunk = ""
-    collecting = False
-    current_page = None
-    
-    # 정규표현식 패턴: "숫자.숫자" 형태로 시작하는 모든 섹션 (서브섹션 포함)
-    # 예: "1.1", "1.2", "1.3", "2.1", "2.2" 등 모두 매치
-    section_pattern = re.compile(r'^\d+\.\d+(\s|$)')
-    
-    # 모든 요소를 순서대로 처리
-    all_elements = soup.find_all(['h1', 'h2', 'h3', 'p', 'footer'])
-    
-    for tag in all_elements:
-        text = tag.get_text(strip=True)
-        
-        # 페이지 번호 감지
-        is_footer = tag.name == 'footer'
-        is_page_number = False
-        
-        # footer 태그이거나 단순 숫자만 있는 경우 페이지 번호로 판단
-        if is_footer and text and text.isdigit():
-            is_page_number = True
-            current_page = text
-            continue  # 페이지 번호는 별도 처리하고 계속
-        elif text and text.isdigit() and len(text) <= 3 and tag.name == 'p':
-            # p 태그에서 단순 숫자인 경우도 페이지 번호로 간주
-            is_page_number = True
-            current_page = text
-            continue
-        
-        # 빈 텍스트 건너뛰기
-        if not text:
-            continue
-        
-        # 동적 헤더 감지: "숫자.숫자" 패턴으로 시작하는 텍스트
-        is_section_header = False
-        if use_dynamic_headers:
-            is_section_header = section_pattern.match(text)
-        else:
-            # 기본 헤더 목록 사용 (fallback)
-            default_headers = ["1.0 GENERAL", "2.0 SCOPE OF SUPPLY", "3.0", "4.0", "5.0"]
-            is_section_header = any(text.startswith(header) for header in default_headers)
-        
-        # 새로운 청크 시작 조건
-        if is_section_header:
-            # 이전 청크에 페이지 정보 추가 후 저장
-            if current_chunk:
-                if current_page:
-                    current_chunk += f"\n[페이지 {current_page}]"
-                chunks.append(current_chunk.strip())
-            # 새 청크 시작
-            current_chunk = text
-            collecting = True
-        elif collecting:
-            # 일반 텍스트 추가
-            current_chunk += "\n" + text
-    
-    # 마지막 청크에 페이지 정보 추가 후 저장
-    if current_chunk:
-        if current_page:
-            current_chunk += f"\n[페이지 {current_page}]"
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+    chunked = chunk_html(html_content, use_dynamic_headers, compat=True)
+    return chunked["records"] if as_records else chunked["chunks"]
 
-def create_embeddings_client():
-    """Azure OpenAI 임베딩 클라이언트를 생성합니다."""
+def create_embeddings_client(max_retries: Optional[int] = None):
+    """
+    Azure OpenAI 임베딩 클라이언트를 생성합니다.
+    
+    Args:
+        max_retries: 클라이언트 자체 재시도 횟수 (None이면 langchain 기본값).
+            EmbeddingScheduler가 재시도/백오프를 담당할 때는 0으로 두어 재시도가 겹치지 않게 합니다.
+    """
+    if AzureOpenAIEmbeddings is None:
+        print("⚠️ 임베딩 클라이언트 생성 실패: langchain-openai가 설치되어 있지 않습니다.")
+        return None
+    
+    options = {} if max_retries is None else {"max_retries": max_retries}
     try:
         embeddings = AzureOpenAIEmbeddings(
             azure_deployment=os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT"), 
             azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"), # Azure OpenAI 서비스의 실제 엔드포인트 URL
             api_key=os.getenv("AZURE_OPENAI_API_KEY"),
             api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+            **options
         )
         return embeddings
     except Exception as e:
         print(f"⚠️ 임베딩 클라이언트 생성 실패: {e}")
         return None
 
-def generate_embeddings_for_chunks(chunks: List[str]) -> List[List[float]]:
+def generate_embeddings_for_chunks(chunks: List[str]) -> List[Optional[List[float]]]:
     """
     청크 리스트를 임베딩 벡터로 변환합니다.
     
@@ -111,48 +91,318 @@ def generate_embeddings_for_chunks(chunks: List[str]) -> List[List[float]]:
         chunks: 임베딩할 텍스트 청크 리스트
         
     Returns:
-        임베딩 벡터 리스트 (각 청크당 하나의 벡터)
+        임베딩 벡터 리스트 (각 청크당 하나의 벡터, 임베딩에 실패한 청크는 None)
+    """
+    return generate_embeddings_with_cache(chunks)[0]
+
+def generate_embeddings_with_cache(chunks: List[str]) -> Tuple[List[Optional[List[float]]], Dict[str, Any]]:
+    """
+    청크 임베딩을 생성하되, 같은 모델로 이미 임베딩한 청크 텍스트는 캐시에서 가져옵니다.
+    
+    캐시에 없는 청크만 EmbeddingScheduler로 보내고(토큰 배치, TPM/RPM 제한, 배치별 재시도)
+    결과를 원래 순서대로 이어 붙이므로 같은 문서(또는 일부만 바뀐 개정판)를 다시 올려도
+    바뀐 청크만 비용이 듭니다. 일부 배치가 끝내 실패해도 나머지 임베딩은 반환합니다.
+    
+    Args:
+        chunks: 임베딩할 텍스트 청크 리스트
+        
+    Returns:
+        (임베딩 벡터 리스트 - 실패한 청크는 None,
+         {"hits": 캐시 적중 청크 수, "misses": 새로 임베딩한 청크 수, "embedded": API로 보낸 고유 텍스트 수,
+          "failures": [{"chunk_id", "status", "error"}] 임베딩에 실패한 청크, "truncated": 잘라서 임베딩한 청크 수})
     """
+    stats = {"hits": 0, "misses": 0, "embedded": 0, "failures": [], "truncated": 0}
     if not chunks:
-        return []
+        return [], stats
     
     try:
-        embeddings_client = create_embeddings_client()
+        # 재시도와 백오프는 스케줄러가 배치 단위로 하므로 클라이언트 자체 재시도는 끔
+        embeddings_client = create_embeddings_client(max_retries=0)
         if embeddings_client is None:
             print("❌ 임베딩 클라이언트를 생성할 수 없습니다.")
-            return []
+            return [], stats
         
         print(f"🔄 {len(chunks)}개 청크에 대한 임베딩 생성 중...")
         
-        # 청크를 배치로 처리하여 임베딩 생성
-        embeddings = embeddings_client.embed_documents(chunks)
+        scheduler = EmbeddingScheduler.from_env(embeddings_client.embed_documents)
+        errors_by_text = {}
         
-        print(f"✅ {len(embeddings)}개 임베딩 벡터 생성 완료")
-        return embeddings
+        def embed_misses(texts: List[str]) -> List[Optional[List[float]]]:
+            outcome = scheduler.embed(texts)
+            for failure in outcome["failures"]:
+                errors_by_text[texts[failure["index"]]] = failure
+            stats["truncated"] += len(outcome["truncated"])
+            return outcome["embeddings"]
+        
+        # 캐시에 없는 청크만 스케줄러로 임베딩 생성
+        embeddings, cache_stats = embed_documents_cached(embeddings_client, chunks, embed_fn=embed_misses)
+        stats.update(cache_stats)
+        stats["failures"] = [
+            {"chunk_id": i, "status": errors_by_text[chunk]["status"], "error": errors_by_text[chunk]["error"]}
+            for i, chunk in enumerate(chunks)
+            if embeddings[i] is None and chunk in errors_by_text
+        ]
+        
+        print(
+            f"✅ {len(embeddings) - len(stats['failures'])}개 임베딩 벡터 준비 완료 "
+            f"(캐시 {stats['hits']}개, 신규 {stats['misses']}개, 실패 {len(stats['failures'])}개)"
+        )
+        return embeddings, stats
         
     except Exception as e:
         print(f"❌ 임베딩 생성 중 오류: {e}")
-        return []
+        return [], stats
+
+def call_upstage_document_parse(
+    file_path: str,
+    api_key: str,
+    ocr: str = "force",
+    base64_encoding: str = "['table']",
+    model: str = "document-parse",
+    timeout: Optional[float] = None
+) -> Dict[Any, Any]:
+    """
+    Upstage API에 파일을 보내 원본 파싱 응답을 반환합니다.
+    
+    Args:
+        timeout: 요청 타임아웃 초 (없으면 UPSTAGE_TIMEOUT 환경변수, 기본 600)
+    
+    Raises:
+        requests.exceptions.RequestException: API 요청 실패
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    if timeout is None:
+        timeout = float(os.getenv("UPSTAGE_TIMEOUT", "600"))
+    
+    with open(file_path, "rb") as file:
+        files = {"document": file}
+        data = {
+            "ocr": ocr, 
+            "base64_encoding": base64_encoding, 
+            "model": model
+        }
+        api_url = os.getenv("UPSTAGE_API_URL", DEFAULT_UPSTAGE_API_URL)
+        response = requests.post(api_url, headers=headers, files=files, data=data, timeout=timeout)
+        response.raise_for_status()
+        
+        # API 응답 JSON 파싱
+        return response.json()
+
+def _is_retryable_parse_error(error: requests.exceptions.RequestException) -> bool:
+    response = getattr(error, "response", None)
+    if response is not None:
+        return response.status_code in _PARSE_RETRY_STATUSES
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def parse_document_in_shards(
+    file_path: str,
+    api_key: str,
+    ocr: str = "force",
+    base64_encoding: str = "['table']",
+    model: str = "document-parse",
+    pages_per_shard: int = 20,
+    max_workers: int = 4,
+    max_retries: int = 2,
+    timeout: Optional[float] = None,
+    page_ranges: Optional[List[Dict[str, Any]]] = None
+) -> Dict[Any, Any]:
+    """
+    PDF를 페이지 구간으로 나눠 동시에 파싱하고, 응답을 페이지 순서대로 합쳐 반환합니다.
+    
+    실패한 구간은 그 구간만 백오프 후 다시 요청합니다 (429/5xx/연결 오류/타임아웃).
+    합친 응답은 단일 호출 응답과 같은 형태이며, 구간별 처리 정보는 parse_shards에 기록됩니다.
+    
+    Args:
+        file_path: PDF 파일 경로
+        api_key: Upstage API 키
+        ocr / base64_encoding / model: 파싱 파라미터 (모든 구간에 동일하게 적용)
+        pages_per_shard: 구간 하나의 페이지 수
+        page_ranges: 미리 정한 구간 목록 [{"start_page", "end_page", "ocr"(선택)}]
+            (구간에 ocr이 있으면 그 구간은 해당 값으로 요청)
+        max_workers: 동시에 보낼 요청 수
+        max_retries: 구간별 재시도 횟수
+        timeout: 구간 요청 하나의 타임아웃 초
+        
+    Raises:
+        Exception: 재시도 후에도 실패한 구간이 있을 때 (실패 구간의 페이지 범위 포함)
+    """
+    shards = split_pdf(file_path, pages_per_shard, page_ranges=page_ranges)
+    print(f"🔀 {len(shards)}개 구간으로 나눠 병렬 파싱합니다.")
+    
+    def parse_shard(shard):
+        started = time.time()
+        for attempt in range(max_retries + 1):
+            try:
+                result = call_upstage_document_parse(
+                    shard["path"], api_key, shard.get("ocr", ocr), base64_encoding, model, timeout
+                )
+                shard.update(attempts=attempt + 1, elapsed=round(time.time() - started, 2))
+                return result
+            except requests.exceptions.RequestException as e:
+                if attempt == max_retries or not _is_retryable_parse_error(e):
+                    shard.update(attempts=attempt + 1, error=str(e))
+                    return None
+                print(f"⚠️ {shard['start_page']}-{shard['end_page']}페이지 파싱 실패, 재시도 {attempt + 1}/{max_retries}: {e}")
+                time.sleep(2 ** attempt)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shards)))) as executor:
+            shard_results = list(executor.map(parse_shard, shards))
+    finally:
+        for shard in shards:
+            try:
+                os.unlink(shard["path"])
+            except OSError:
+                pass
+    
+    failed = [shard for shard, result in zip(shards, shard_results) if result is None]
+    if failed:
+        ranges = ", ".join(f"{shard['start_page']}-{shard['end_page']}" for shard in failed)
+        raise Exception(f"API 요청 중 오류가 발생했습니다: {ranges}페이지 구간 파싱 실패 ({failed[0]['error']})")
+    
+    result = merge_shard_results(shard_results, [shard["start_page"] for shard in shards])
+    result["parse_shards"] = [
+        {"ocr": shard.get("ocr", ocr), **{key: shard[key] for key in ("start_page", "end_page", "attempts", "elapsed")}}
+        for shard in shards
+    ]
+    return result
+
+def postprocess_upstage_result(result: Dict[Any, Any], embed: bool = True) -> Dict[Any, Any]:
+    """
+    Upstage 원본 응답에 청크 분할, 감지된 헤더, 임베딩 결과를 추가합니다.
+    
+    Args:
+        result: call_upstage_document_parse 응답 (또는 파싱 캐시에서 읽은 응답)
+        embed: False면 청크 분할까지만 하고 임베딩은 embed_result_chunks로 따로 생성
+        
+    Returns:
+        chunks/chunks_count/detected_headers/chunk_records/chunk_token_stats/embeddings/embeddings_count 등이 추가된 결과
+    """
+    # HTML 컨텐츠가 있으면 청크로 분할
+    if 'content' in result and 'html' in result['content']:
+        html_content = result['content']['html']
+        try:
+            # 감지된 헤더(디버깅용)와 구조화 청크를 한 번의 파싱으로 생성
+            chunked = chunk_html(html_content, compat=True)
+            result['detected_headers'] = chunked['detected_headers']
+            records = chunked['records']
+            
+            # CHUNK_TOKEN_BUDGET=true면 큰 섹션은 나누고 작은 섹션은 합쳐 토큰 예산에 맞춤
+            if chunk_budget_enabled():
+                records, budget_stats = budget_chunk_records(records)
+                result['chunk_budget'] = budget_stats
+                result['chunk_token_stats'] = budget_stats['after']
+            else:
+                result['chunk_token_stats'] = token_distribution(
+                    [count_tokens(record.text) for record in records]
+                )
+            
+            # chunks는 임베딩하고 OpenSearch content로 저장하는 문자열과 같게 레코드 본문으로 채움
+            # (페이지는 본문에 "[페이지 N]"으로 붙이지 않고 chunk_records의 페이지 필드로 전달)
+            chunks = [record.text for record in records]
+            result['chunks'] = chunks
+            result['chunks_count'] = len(chunks)
+            
+            # 저장/검색용 구조화 청크 (JSON으로 저장되도록 dict 형태)
+            result['chunk_records'] = [record.to_dict() for record in records]
+            
+            if embed:
+                embed_result_chunks(result)
+            
+        except Exception as e:
+            # 청크 분할 실패해도 원본 결과는 반환
+            result['chunks_error'] = f"청크 분할 중 오류: {str(e)}"
+            result['chunks'] = []
+            result['embeddings'] = []
+            result['embeddings_count'] = 0
+    else:
+        result['chunks'] = []
+        result['chunks_count'] = 0
+        result['embeddings'] = []
+        result['embeddings_count'] = 0
+    
+    return result
+
+def embed_result_chunks(result: Dict[Any, Any]) -> Dict[Any, Any]:
+    """
+    postprocess_upstage_result로 분할한 청크의 임베딩을 생성해 결과에 추가합니다.
+    
+    result['chunks'] 문자열(= chunk_records 본문, OpenSearch에 저장되는 content)을 그대로
+    임베딩하므로 embeddings[i]는 chunks[i], chunk_records[i]와 같은 내용에 대응합니다.
+    
+    Returns:
+        embeddings/embeddings_count(/embeddings_failures/embeddings_error)가 추가된 결과
+    """
+    chunks = result.get('chunks') or []
+    if not chunks:
+        result['embeddings'] = []
+        result['embeddings_count'] = 0
+        return result
+    
+    try:
+        print("🔄 청크 임베딩 생성 시작...")
+        embeddings, cache_stats = generate_embeddings_with_cache(chunks)
+        result['embeddings_cache_hits'] = cache_stats['hits']
+        result['embeddings_cache_misses'] = cache_stats['misses']
+        embedded_count = sum(1 for embedding in embeddings if embedding is not None)
+        if embedded_count:
+            result['embeddings'] = embeddings
+            result['embeddings_count'] = embedded_count
+            if cache_stats['failures']:
+                # 실패한 청크는 embeddings에 None으로 남기고 목록을 함께 반환
+                result['embeddings_failures'] = cache_stats['failures']
+                result['embeddings_error'] = f"{len(cache_stats['failures'])}개 청크 임베딩 실패"
+            print(f"✅ {embedded_count}개 임베딩 벡터가 생성되었습니다.")
+        else:
+            result['embeddings'] = []
+            result['embeddings_count'] = 0
+            result['embeddings_error'] = "임베딩 생성 실패"
+    except Exception as embed_e:
+        print(f"⚠️ 임베딩 생성 중 오류: {embed_e}")
+        result['embeddings'] = []
+        result['embeddings_count'] = 0
+        result['embeddings_error'] = f"임베딩 생성 중 오류: {str(embed_e)}"
+    
+    return result
 
 def process_document_with_upstage(
     file_path: str, 
     api_key: Optional[str] = None,
     ocr: str = "force",
     base64_encoding: str = "['table']",
-    model: str = "document-parse"
+    model: str = "document-parse",
+    use_cache: bool = True,
+    parallel: Optional[bool] = None,
+    pages_per_shard: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    ocr_precheck: Optional[bool] = None,
+    chunk_and_embed: bool = True
 ) -> Dict[Any, Any]:
     """
     Upstage API를 사용하여 문서를 처리합니다.
     
+    같은 파일(sha256)과 같은 파싱 파라미터의 응답이 파싱 캐시에 있으면 API를 호출하지 않고
+    저장된 원본 응답으로 청크 분할과 임베딩만 다시 수행합니다.
+    
     Args:
         file_path: 처리할 파일 경로
         api_key: Upstage API 키 (없으면 환경변수에서 가져옴)
         ocr: OCR 설정
         base64_encoding: Base64 인코딩 설정  
         model: 사용할 모델
+        use_cache: False면 캐시를 읽지 않고 다시 파싱합니다 (새 응답으로 캐시 갱신)
+        parallel: True면 PDF를 페이지 구간으로 나눠 병렬 파싱 (없으면 UPSTAGE_PARALLEL_PARSE 환경변수).
+            pypdf가 없거나 PDF가 아니거나 한 구간에 들어가는 문서면 한 번에 파싱합니다.
+        pages_per_shard: 병렬 파싱 구간 하나의 페이지 수 (없으면 UPSTAGE_PAGES_PER_SHARD, 기본 20)
+        max_workers: 병렬 파싱 동시 요청 수 (없으면 UPSTAGE_PARSE_WORKERS, 기본 4)
+        ocr_precheck: True면 PDF 페이지마다 텍스트 레이어를 먼저 확인해 디지털 페이지는 ocr="auto"로,
+            스캔 페이지만 ocr 값(기본 "force")으로 요청합니다 (없으면 UPSTAGE_OCR_PRECHECK 환경변수).
+            페이지별 모드는 결과의 page_ocr_modes에 기록됩니다.
+        chunk_and_embed: False면 청크 분할/임베딩(postprocess_upstage_result)을 하지 않고
+            파싱 응답만 반환합니다 (단계별로 나눠 처리하는 배치 적재용).
         
     Returns:
-        API 응답 결과
+        API 응답 결과 (parse_cache_hit: 캐시된 응답을 사용했는지 여부)
     """
     if api_key is None:
         api_key = os.getenv("UPSTAGE_API_KEY", "UPSTAGE_API_KEY")
@@ -160,78 +410,92 @@ def process_document_with_upstage(
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
     
-    url = "https://api.upstage.ai/v1/document-digitization"
-    headers = {"Authorization": f"Bearer {api_key}"}
+    if ocr_precheck is None:
+        ocr_precheck = os.getenv("UPSTAGE_OCR_PRECHECK", "false").lower() == "true"
+    can_split = pypdf_available() and is_pdf(file_path)
+    if ocr_precheck and not can_split:
+        if is_pdf(file_path):
+            print("⚠️ pypdf가 없어 페이지별 OCR 사전 확인을 건너뜁니다 (pip install pypdf).")
+        ocr_precheck = False
     
-    try:
-        with open(file_path, "rb") as file:
-            files = {"document": file}
-            data = {
-                "ocr": ocr, 
-                "base64_encoding": base64_encoding, 
-                "model": model
+    cache = get_parse_cache()
+    cache_key = None
+    result = None
+    if cache is not None:
+        cache_params = {"ocr": ocr, "base64_encoding": base64_encoding, "model": model}
+        if ocr_precheck:
+            cache_params["ocr_precheck"] = True
+        cache_key = parse_cache_key(file_sha256(file_path), **cache_params)
+        if use_cache:
+            result = cache.get(cache_key)
+    
+    parse_cache_hit = result is not None
+    if parse_cache_hit:
+        print("📦 파싱 캐시 적중: Upstage API 호출을 건너뜁니다.")
+    else:
+        if parallel is None:
+            parallel = os.getenv("UPSTAGE_PARALLEL_PARSE", "false").lower() == "true"
+        pages_per_shard = pages_per_shard or int(os.getenv("UPSTAGE_PAGES_PER_SHARD", "20"))
+        max_workers = max_workers or int(os.getenv("UPSTAGE_PARSE_WORKERS", "4"))
+        
+        if parallel and not pypdf_available():
+            print("⚠️ pypdf가 없어 병렬 파싱 대신 한 번에 파싱합니다 (pip install pypdf).")
+        
+        started = time.time()
+        page_ranges = None
+        text_layers = None
+        if ocr_precheck:
+            # 텍스트 레이어가 있는 페이지는 OCR 없이, 스캔 페이지만 OCR 강제
+            text_layers = detect_text_layer_pages(
+                file_path, min_chars=int(os.getenv("UPSTAGE_TEXT_LAYER_MIN_CHARS", "20"))
+            )
+            page_ranges = plan_ocr_page_ranges(
+                text_layers,
+                pages_per_shard=pages_per_shard if parallel else None,
+                scanned_ocr=ocr
+            )
+        elif parallel and can_split and count_pdf_pages(file_path) > pages_per_shard:
+            page_ranges = plan_page_ranges(count_pdf_pages(file_path), pages_per_shard)
+        
+        if page_ranges and len(page_ranges) > 1:
+            result = parse_document_in_shards(
+                file_path, api_key, ocr, base64_encoding, model,
+                pages_per_shard=pages_per_shard,
+                max_workers=max_workers,
+                page_ranges=page_ranges
+            )
+        else:
+            request_ocr = page_ranges[0].get("ocr", ocr) if page_ranges else ocr
+            try:
+                result = call_upstage_document_parse(file_path, api_key, request_ocr, base64_encoding, model)
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"API 요청 중 오류가 발생했습니다: {str(e)}")
+        
+        if text_layers is not None:
+            modes = {}
+            for page_range in page_ranges:
+                for page in range(page_range["start_page"], page_range["end_page"] + 1):
+                    modes[page] = page_range["ocr"]
+            result['page_ocr_modes'] = [
+                {"page": layer["page"], "ocr": modes[layer["page"]], "text_chars": layer["text_chars"]}
+                for layer in text_layers
+            ]
+            result['ocr_page_counts'] = {
+                mode: sum(1 for page_mode in modes.values() if page_mode == mode)
+                for mode in sorted(set(modes.values()))
             }
-            response = requests.post(url, headers=headers, files=files, data=data)
-            response.raise_for_status()
-            
-            # API 응답 JSON 파싱
-            result = response.json()
-            
-            # HTML 컨텐츠가 있으면 청크로 분할
-            if 'content' in result and 'html' in result['content']:
-                html_content = result['content']['html']
-                try:
-                    chunks = extract_chunks_from_html(html_content)
-                    result['chunks'] = chunks
-                    result['chunks_count'] = len(chunks)
-                    
-                    # 디버깅: 감지된 헤더들 추가
-                    soup = BeautifulSoup(html_content, "html.parser")
-                    section_pattern = re.compile(r'^\d+\.\d+(\s|$)')
-                    detected_headers = []
-                    
-                    for tag in soup.find_all(['h1', 'h2', 'h3', 'p', 'footer']):
-                        text = tag.get_text(strip=True)
-                        if section_pattern.match(text):
-                            detected_headers.append(text)
-                    
-                    result['detected_headers'] = detected_headers
-                    
-                    # 청크에 대한 임베딩 생성
-                    if chunks:
-                        try:
-                            print("🔄 청크 임베딩 생성 시작...")
-                            embeddings = generate_embeddings_for_chunks(chunks)
-                            if embeddings:
-                                result['embeddings'] = embeddings
-                                result['embeddings_count'] = len(embeddings)
-                                print(f"✅ {len(embeddings)}개 임베딩 벡터가 생성되었습니다.")
-                            else:
-                                result['embeddings'] = []
-                                result['embeddings_count'] = 0
-                                result['embeddings_error'] = "임베딩 생성 실패"
-                        except Exception as embed_e:
-                            print(f"⚠️ 임베딩 생성 중 오류: {embed_e}")
-                            result['embeddings'] = []
-                            result['embeddings_count'] = 0
-                            result['embeddings_error'] = f"임베딩 생성 중 오류: {str(embed_e)}"
-                    else:
-                        result['embeddings'] = []
-                        result['embeddings_count'] = 0
-                    
-                except Exception as e:
-                    # 청크 분할 실패해도 원본 결과는 반환
-                    result['chunks_error'] = f"청크 분할 중 오류: {str(e)}"
-                    result['chunks'] = []
-                    result['embeddings'] = []
-                    result['embeddings_count'] = 0
-            else:
-                result['chunks'] = []
-                result['chunks_count'] = 0
-                result['embeddings'] = []
-                result['embeddings_count'] = 0
-            
-            return result
-            
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"API 요청 중 오류가 발생했습니다: {str(e)}")
+            print(f"🔎 페이지별 OCR 모드: {result['ocr_page_counts']}")
+        
+        if cache is not None:
+            try:
+                cache.put(cache_key, result)
+            except Exception as e:
+                print(f"⚠️ 파싱 결과 캐시 저장 실패: {e}")
+        
+        # 캐시 재사용 시에는 기록하지 않음 (이번 호출의 실제 파싱 시간)
+        result['parse_seconds'] = round(time.time() - started, 2)
+    
+    if chunk_and_embed:
+        result = postprocess_upstage_result(result)
+    result['parse_cache_hit'] = parse_cache_hit
+    return result
@@ -10,9 +10,18 @@ load_dotenv()
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from file.upstage import process_document_with_upstage
-from file.search import create_opensearch_client, save_chunks_to_opensearch
+from file.search import create_opensearch_client, save_chunks_to_opensearch, list_document_names
+from file.upstage import create_embeddings_client
+from file.html_chunker import ChunkRecord
+from file.chunk_budget import format_chunk_text
+from file.opensearch_client import get_opensearch_health, close_opensearch_client
+from file.search_cache import search_result_cache, get_index_generation
+from file.embedding_cache import embed_query_cached
+from file.embedding_cache import prewarm_on_startup
+from file.jobs import get_job_queue, job_api_key, JOB_STAGES
+from file.blob_store import get_blob_store, slim_result, slim_results_enabled, hydrate_result, load_result_embeddings
 from check.check_data import tech_sections, QA_sections
-from rag.rag import rag_query, generate_answer_with_llm, create_llm_client
+from rag.rag import rag_query, stream_answer_with_llm, create_llm_client, client_config_fingerprint
 
 
 
@@ -29,6 +38,9 @@ def document_processing_page():
     st.title("📄 문서 디지털화 시스템")
     st.markdown("---")
     
+    # JOB_QUEUE_ENABLED=false면 기존처럼 화면 안에서 바로 처리
+    use_job_queue = os.getenv("JOB_QUEUE_ENABLED", "true").lower() == "true"
+    
     # 사이드바에서 API 키 설정
     with st.sidebar:
         st.header("⚙️ 설정")
@@ -52,6 +64,28 @@ def document_processing_page():
             if api_key:
                 st.success("✅ API 키가 입력되었습니다!")
         
+        use_parse_cache = st.checkbox(
+            "파싱 캐시 사용",
+            value=True,
+            help="같은 파일을 같은 설정으로 처리한 적이 있으면 Upstage API를 다시 호출하지 않습니다. 끄면 새로 파싱합니다."
+        )
+        parallel_parse = st.checkbox(
+            "대용량 PDF 병렬 파싱",
+            value=os.getenv("UPSTAGE_PARALLEL_PARSE", "false").lower() == "true",
+            help="PDF를 페이지 구간으로 나눠 동시에 파싱하고 결과를 페이지 순서대로 합칩니다."
+        )
+        ocr_precheck = st.checkbox(
+            "텍스트 PDF는 OCR 생략",
+            value=os.getenv("UPSTAGE_OCR_PRECHECK", "false").lower() == "true",
+            help="페이지마다 텍스트 레이어를 확인해 스캔 페이지만 OCR을 강제합니다."
+        )
+        index_after_processing = st.checkbox(
+            "처리 후 OpenSearch에 바로 저장",
+            value=False,
+            disabled=not use_job_queue,
+            help="백그라운드 작업이 임베딩까지 끝나면 청크를 바로 저장합니다."
+        )
+        
     # 메인 컨텐츠
     col1, col2 = st.columns([1, 1])
     
@@ -71,17 +105,41 @@ def document_processing_page():
             
             # 처리 버튼
             if st.button("🚀 문서 처리 시작", type="primary", use_container_width=True):
-                # 처리 결과를 session_state에 저장
-                result = process_document(uploaded_file, api_key)
-                if result:
-                    st.session_state.processing_result = result
-                    st.session_state.uploaded_file_name = uploaded_file.name
-                    st.session_state.uploaded_file_size = uploaded_file.size
+                if use_job_queue:
+                    # 작업만 등록하고 처리는 백그라운드 워커가 수행
+                    job_id = submit_processing_job(
+                        uploaded_file,
+                        api_key,
+                        {
+                            "use_cache": use_parse_cache,
+                            "parallel": parallel_parse,
+                            "ocr_precheck": ocr_precheck,
+                            "index": index_after_processing
+                        }
+                    )
+                    if job_id:
+                        st.session_state.setdefault('job_ids', []).append(job_id)
+                        st.success(f"📥 처리 작업이 등록되었습니다: {uploaded_file.name}")
+                else:
+                    # 처리 결과를 session_state에 저장
+                    result = process_document(
+                        uploaded_file,
+                        api_key,
+                        use_cache=use_parse_cache,
+                        parallel=parallel_parse,
+                        ocr_precheck=ocr_precheck
+                    )
+                    if result:
+                        keep_processing_result(result, uploaded_file.name, uploaded_file.size)
+        
+        if use_job_queue:
+            display_jobs(api_key)
     
     # 처리 결과가 session_state에 있으면 표시
     if 'processing_result' in st.session_state:
         display_results(st.session_state.processing_result, col2)
 
+
 def checklist_page():
     """체크리스트 페이지"""
     st.title("📝 Checklist")
@@ -145,20 +203,38 @@ def bom_qa_page():
     st.markdown("---")
     st.info("📚 문서에 대해 질문하고 AI가 답변해 드립니다.")
     
-    # OpenSearch 연결 상태 확인
+    # OpenSearch 연결 상태 확인 (클라이언트는 설정 지문별로 캐시되어 재실행마다 새로 만들지 않음)
+    config_fingerprint = client_config_fingerprint()
     try:
-        opensearch_client = create_opensearch_client()
-        llm_client = create_llm_client()
+        llm_client = get_cached_llm_client(config_fingerprint)
         
         if not llm_client:
             st.error("❌ LLM 클라이언트 연결에 실패했습니다. 환경변수를 확인해주세요.")
             return
-            
-        st.success("✅ OpenSearch 및 LLM 연결 완료")
+        
+        # 공유 클라이언트로 상태 확인 (결과는 잠시 캐시되어 재실행마다 요청하지 않음)
+        health = get_opensearch_health()
+        if health["ok"]:
+            st.success(f"✅ OpenSearch({health['status']}, 노드 {health['nodes']}개) 및 LLM 연결 완료")
+        else:
+            st.warning(f"⚠️ OpenSearch 상태 확인 실패: {health['error'] or health['status']}")
     except Exception as e:
         st.error(f"❌ 서비스 연결 실패: {str(e)}")
         return
     
+    # 검색 범위 선택
+    search_filters = select_search_scope(config_fingerprint)
+    
+    # 하이브리드 점수 결합 방식 (기본 RRF: 텍스트/벡터 점수 척도가 달라도 순위로 결합)
+    with st.sidebar:
+        search_fusion = st.selectbox(
+            "하이브리드 결합 방식",
+            QA_FUSION_OPTIONS,
+            index=QA_FUSION_OPTIONS.index(QA_HYBRID_FUSION),
+            help="rrf: 텍스트/벡터 순위 결합, pipeline: 정규화 점수 결합(search pipeline), bool: 점수 단순 합",
+            key="qa_fusion"
+        )
+    
     # 채팅 히스토리 초기화
     if "messages" not in st.session_state:
         st.session_state.messages = []
@@ -177,53 +253,61 @@ def bom_qa_page():
         
         # AI 응답 생성
         with st.chat_message("assistant"):
-            with st.spinner("답변을 생성중입니다..."):
-                try:
-                    # RAG 검색 수행
-                    result = rag_query(
-                        question=prompt,
-                        client=opensearch_client,
+            try:
+                with st.spinner("관련 문서를 검색중입니다..."):
+                    # RAG 검색 수행 (같은 질문/범위/인덱스 세대면 캐시된 결과 사용)
+                    result = cached_rag_query(
+                        question=prompt.strip(),
                         search_type="hybrid",
-                        context_size=5
+                        context_size=5,
+                        filters=search_filters,
+                        fusion=search_fusion,
+                        candidate_size=QA_CANDIDATE_SIZE,
+                        index_generation=get_index_generation(),
+                        config_fingerprint=config_fingerprint
                     )
-                    
-                    if result['context']:
-                        # LLM으로 답변 생성
-                        answer = generate_answer_with_llm(
-                            question=prompt,
-                            context=result['context'],
-                            llm_client=llm_client
+                
+                if result['context']:
+                    # LLM 답변을 토큰이 도착하는 대로 표시
+                    stream_stats = {}
+                    answer = render_answer_stream(stream_answer_with_llm(
+                        question=prompt,
+                        context=result['context'],
+                        llm_client=llm_client,
+                        stats=stream_stats
+                    ))
+                    if stream_stats.get("first_token_seconds") is not None:
+                        st.caption(
+                            f"⏱️ 첫 토큰 {stream_stats['first_token_seconds']:.1f}초 / "
+                            f"전체 {stream_stats['total_seconds']:.1f}초"
                         )
+                    
+                    # 참고 정보 표시
+                    with st.expander("📊 검색 정보"):
+                        chunk_ids = [str(res.get('chunk_id', 'unknown')) for res in result['search_results'] if res.get('content')]
+                        st.write(f"**참고한 청크:** {', '.join(chunk_ids[:5])}")
+                        st.write(f"**총 검색 결과 수:** {result['search_metadata']['total_results']}")
                         
-                        # 답변 표시
-                        st.markdown(answer)
-                        
-                        # 참고 정보 표시
-                        with st.expander("📊 검색 정보"):
-                            chunk_ids = [str(res.get('chunk_id', 'unknown')) for res in result['search_results'] if res.get('content')]
-                            st.write(f"**참고한 청크:** {', '.join(chunk_ids[:5])}")
-                            st.write(f"**총 검색 결과 수:** {result['search_metadata']['total_results']}")
-                            
-                            # 검색된 청크 내용 미리보기
-                            st.write("**검색된 청크 미리보기:**")
-                            for i, res in enumerate(result['search_results'][:3], 1):
-                                content = res.get('content', '')
-                                if content:
-                                    preview = content[:200] + "..." if len(content) > 200 else content
-                                    st.text_area(f"청크 {res.get('chunk_id', 'unknown')}", preview, height=100, key=f"preview_{i}")
-                        
-                        # 세션에 AI 응답 저장
-                        st.session_state.messages.append({"role": "assistant", "content": answer})
-                        
-                    else:
-                        error_msg = "관련된 정보를 찾을 수 없습니다. 다른 질문을 시도해보세요."
-                        st.markdown(error_msg)
-                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                        
-                except Exception as e:
-                    error_msg = f"답변 생성 중 오류가 발생했습니다: {str(e)}"
-                    st.error(error_msg)
+                        # 검색된 청크 내용 미리보기
+                        st.write("**검색된 청크 미리보기:**")
+                        for i, res in enumerate(result['search_results'][:3], 1):
+                            content = res.get('content', '')
+                            if content:
+                                preview = content[:200] + "..." if len(content) > 200 else content
+                                st.text_area(f"청크 {res.get('chunk_id', 'unknown')}", preview, height=100, key=f"preview_{i}")
+                    
+                    # 세션에 AI 응답 저장
+                    st.session_state.messages.append({"role": "assistant", "content": answer})
+                    
+                else:
+                    error_msg = "관련된 정보를 찾을 수 없습니다. 다른 질문을 시도해보세요."
+                    st.markdown(error_msg)
                     st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    
+            except Exception as e:
+                error_msg = f"답변 생성 중 오류가 발생했습니다: {str(e)}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
     
     # 채팅 초기화 버튼
     col1, col2, col3 = st.columns([1, 1, 1])
@@ -231,6 +315,11 @@ def bom_qa_page():
         if st.button("🗑️ 채팅 초기화", type="secondary", use_container_width=True):
             st.session_state.messages = []
             st.rerun()
+    with col3:
+        if st.button("🔄 연결 및 캐시 초기화", type="secondary", use_container_width=True,
+                     help="환경변수나 인덱스를 외부에서 바꾼 경우 클라이언트와 검색 캐시를 다시 만듭니다."):
+            clear_qa_caches()
+            st.rerun()
     
     # 사이드바에 사용 팁 추가
     with st.sidebar:
@@ -249,6 +338,161 @@ def bom_qa_page():
         - "품질보증 절차"
         """)
 
+def select_search_scope(config_fingerprint):
+    """사이드바에서 검색할 문서, 기간, 섹션, 페이지를 선택하고 검색 범위(filters)를 반환합니다."""
+    with st.sidebar:
+        st.markdown("---")
+        st.header("🎯 검색 범위")
+        
+        document_names = cached_document_names(get_index_generation(), config_fingerprint)
+        selected_documents = st.multiselect(
+            "검색할 문서",
+            document_names,
+            key="scope_documents",
+            help="선택하지 않으면 모든 문서에서 검색합니다."
+        )
+        
+        time_range = None
+        if st.checkbox("저장 기간으로 제한", key="scope_use_dates"):
+            dates = st.date_input("저장 기간", value=(), key="scope_dates")
+            if isinstance(dates, (list, tuple)) and len(dates) == 2:
+                time_range = {
+                    "gte": dates[0].isoformat(),
+                    "lte": f"{dates[1].isoformat()}T23:59:59"
+                }
+        
+        section_prefix = st.text_input(
+            "섹션 번호",
+            key="scope_section",
+            help="예: 3.2 또는 3. (해당 섹션과 하위 섹션만 검색, 구조화 청크로 저장된 문서만 해당)"
+        ).strip()
+        
+        pages = None
+        if st.checkbox("페이지 범위로 제한", key="scope_use_pages"):
+            col_from, col_to = st.columns(2)
+            with col_from:
+                page_from = st.number_input("시작 페이지", min_value=1, value=1, step=1, key="scope_page_from")
+            with col_to:
+                page_to = st.number_input("끝 페이지", min_value=1, value=9999, step=1, key="scope_page_to")
+            pages = {"gte": int(page_from), "lte": int(page_to)}
+        
+        cache_stats = search_result_cache.stats()
+        st.caption(
+            f"검색 캐시: 적중 {cache_stats['hits']} / 실패 {cache_stats['misses']} "
+            f"({cache_stats['entries']}개, {cache_stats['bytes'] / 1024:.0f} KB)"
+        )
+    
+    filters = {}
+    if selected_documents:
+        filters["document_name"] = selected_documents
+    if time_range:
+        filters["time_range"] = time_range
+    if section_prefix:
+        filters["section_prefix"] = section_prefix
+    if pages:
+        filters["pages"] = pages
+    return filters or None
+
+# QA 검색 결과 캐시 유지 시간 (초). 인덱스 세대가 바뀌면 시간과 관계없이 새로 검색합니다.
+# 세대는 같은 호스트의 프로세스끼리 공유되므로(file.search_cache) 이 시간은 다른 호스트에서
+# 인덱스를 바꾼 경우의 최대 지연입니다. 기본값은 검색 결과 캐시(SEARCH_CACHE_TTL)와 같습니다.
+RAG_CACHE_TTL = int(os.getenv("RAG_CACHE_TTL", os.getenv("SEARCH_CACHE_TTL", "300")))
+
+# QA 페이지 하이브리드 검색 설정. 라이브러리 기본(bool)과 달리 QA는 RRF로 순위를 결합하고,
+# 후보 수를 따로 주지 않으면 hybrid_search_chunks가 context_size 기준으로 정합니다.
+QA_FUSION_OPTIONS = ["rrf", "pipeline", "bool"]
+QA_HYBRID_FUSION = os.getenv("QA_HYBRID_FUSION", "rrf")
+if QA_HYBRID_FUSION not in QA_FUSION_OPTIONS:
+    QA_HYBRID_FUSION = "rrf"
+QA_CANDIDATE_SIZE = int(os.getenv("QA_CANDIDATE_SIZE")) if os.getenv("QA_CANDIDATE_SIZE") else None
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_cached_llm_client(config_fingerprint):
+    """
+    설정 지문별 LLM 클라이언트를 모든 세션과 재실행에서 공유합니다.
+    
+    설정이 바뀌면 지문이 달라져 새 클라이언트를 만들고, max_entries=1이라 이전 클라이언트는 버려집니다.
+    """
+    return create_llm_client()
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_cached_embeddings_client(config_fingerprint):
+    """설정 지문별 쿼리 임베딩 클라이언트를 공유합니다 (get_cached_llm_client와 같은 방식)."""
+    return create_embeddings_client()
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def cached_query_embedding(question, config_fingerprint):
+    """
+    질문의 쿼리 임베딩을 캐시합니다 (인덱스 내용과 무관하므로 세대는 키에 넣지 않음).
+    
+    실패하면 예외를 그대로 올려 실패 결과가 캐시되지 않게 합니다.
+    """
+    embeddings_client = get_cached_embeddings_client(config_fingerprint)
+    if embeddings_client is None:
+        raise RuntimeError("임베딩 클라이언트를 만들 수 없습니다.")
+    return embed_query_cached(embeddings_client, question)
+
+@st.cache_data(ttl=RAG_CACHE_TTL, max_entries=256, show_spinner=False)
+def cached_rag_query(question, search_type, context_size, filters, fusion, candidate_size, index_generation, config_fingerprint):
+    """
+    같은 질문/검색 범위/결합 방식/인덱스 세대/설정이면 검색과 컨텍스트 생성을 다시 하지 않습니다.
+    
+    index_generation은 키로만 쓰입니다. 호출 시점의 get_index_generation() 값을 넘기므로
+    이 프로세스뿐 아니라 ingest CLI나 작업 워커 프로세스의 저장/삭제로 세대가 올라가도
+    이전 결과는 사용되지 않습니다.
+    """
+    query_vector = None
+    if search_type != "text":
+        try:
+            query_vector = cached_query_embedding(question, config_fingerprint)
+        except Exception as e:
+            print(f"⚠️ 쿼리 임베딩 실패, 텍스트 검색만 사용: {e}")
+    
+    return rag_query(
+        question=question,
+        client=create_opensearch_client(),
+        search_type="text" if search_type == "vector" and query_vector is None else search_type,
+        context_size=context_size,
+        filters=filters,
+        query_vector=query_vector,
+        fusion=fusion,
+        candidate_size=candidate_size
+    )
+
+@st.cache_data(ttl=RAG_CACHE_TTL, show_spinner=False)
+def cached_document_names(index_generation, config_fingerprint):
+    """검색 범위 선택용 문서 이름 목록을 인덱스 세대별로 캐시합니다."""
+    return list_document_names(create_opensearch_client())
+
+def render_answer_stream(stream):
+    """
+    답변 조각을 받는 대로 화면에 이어 쓰고 전체 답변을 반환합니다.
+    
+    st.write_stream이 없는 이전 Streamlit에서는 placeholder를 조각마다 갱신합니다.
+    """
+    if hasattr(st, "write_stream"):
+        answer = st.write_stream(stream)
+        return answer if isinstance(answer, str) else "".join(str(part) for part in answer)
+    
+    placeholder = st.empty()
+    parts = []
+    for piece in stream:
+        parts.append(piece)
+        placeholder.markdown("".join(parts) + "▌")
+    answer = "".join(parts)
+    placeholder.markdown(answer)
+    return answer
+
+def clear_qa_caches():
+    """QA 페이지의 클라이언트/검색 캐시를 모두 비우고 OpenSearch 공유 클라이언트를 닫습니다."""
+    get_cached_llm_client.clear()
+    get_cached_embeddings_client.clear()
+    cached_query_embedding.clear()
+    cached_rag_query.clear()
+    cached_document_names.clear()
+    search_result_cache.clear()
+    close_opensearch_client()
+
 def main():
     st.set_page_config(
         page_title="문서 처리 시스템",
@@ -256,6 +500,9 @@ def main():
         layout="wide"
     )
     
+    # EMBEDDING_CACHE_PREWARM=true면 체크리스트 항목 임베딩을 백그라운드에서 미리 캐시 (프로세스당 한 번)
+    prewarm_on_startup()
+    
     # 사이드바에서 페이지 선택
     with st.sidebar:
         st.title("📄 Navigation")
@@ -274,7 +521,116 @@ def main():
         bom_qa_page()
     
     
-def process_document(uploaded_file, api_key):
+# 세션 결과가 참조하는 파일(임베딩, 이미지, 다운로드 파일)이 결과 저장소에서 지워졌을 때 안내
+EVICTED_RESULT_MESSAGE = "처리 결과 파일이 저장소 정리로 삭제되었습니다. 문서를 다시 처리해주세요."
+
+# 진행 중인 작업 목록을 다시 그리는 간격(초)
+JOBS_REFRESH_SECONDS = float(os.getenv("JOBS_REFRESH_SECONDS", "2"))
+
+_JOB_STATUS_ICONS = {"queued": "⏳", "running": "🔄", "done": "✅", "failed": "❌"}
+_STAGE_STATUS_ICONS = {"pending": "▫️", "running": "🔄", "done": "✅", "skipped": "⏭️", "failed": "❌"}
+
+def keep_processing_result(result, file_name, file_size):
+    """
+    처리 결과를 세션에 보관합니다.
+    
+    SLIM_RESULTS(기본 true)면 base64 이미지와 임베딩은 디스크 저장소로 옮기고 참조만 세션에 둡니다.
+    """
+    st.session_state.processing_result = slim_result(result) if slim_results_enabled() else result
+    st.session_state.uploaded_file_name = file_name
+    st.session_state.uploaded_file_size = file_size
+    # 이전 결과로 만든 다운로드 파일은 더 이상 쓰지 않음
+    st.session_state.download_refs = {}
+
+def submit_processing_job(uploaded_file, api_key, options):
+    """업로드된 파일을 백그라운드 처리 작업으로 등록하고 작업 ID를 반환합니다."""
+    final_api_key = api_key or os.getenv("UPSTAGE_API_KEY")
+    if not final_api_key or final_api_key == "UPSTAGE_API_KEY":
+        st.error("❌ API 키가 설정되지 않았습니다.")
+        st.info("프로젝트 루트에 .env 파일을 생성하거나 사이드바에서 API 키를 입력해주세요.")
+        return None
+    
+    try:
+        return get_job_queue().submit(uploaded_file.getvalue(), uploaded_file.name, options, api_key=final_api_key)
+    except Exception as e:
+        st.error(f"❌ 작업 등록 실패: {str(e)}")
+        return None
+
+def display_jobs(api_key=None):
+    """
+    이 세션에서 등록한 작업과 최근 작업의 진행 상태를 표시합니다.
+    
+    실패한 작업의 다시 시도 버튼은 쓸 API 키(작업에 기억된 키, 환경변수, 사이드바 입력 api_key)가
+    있을 때만 표시하고, 사이드바에서 입력한 키는 다시 시도하는 작업에 함께 넘깁니다.
+    
+    진행 중인 작업이 있으면 작업 목록만 st.fragment(run_every)로 JOBS_REFRESH_SECONDS마다 다시 그리고
+    (스크립트 스레드를 sleep으로 붙잡지 않음), fragment가 없는 Streamlit에서는 새로고침 버튼을 표시합니다.
+    """
+    job_queue = get_job_queue()
+    store = job_queue.store
+    
+    st.markdown("---")
+    st.subheader("📋 처리 작업")
+    
+    def render_job(job, key_prefix):
+        stages = " · ".join(
+            f"{stage} {_STAGE_STATUS_ICONS.get(job['progress'][stage]['status'], '')}"
+            for stage in JOB_STAGES
+        )
+        st.markdown(f"{_JOB_STATUS_ICONS.get(job['status'], '')} **{job['file_name']}** — {stages}")
+        if job['status'] == 'done':
+            if st.button("📂 결과 보기", key=f"{key_prefix}_load_{job['id']}"):
+                result = store.load_result(job['id'])
+                if result is not None:
+                    keep_processing_result(result, job['file_name'], job['file_size'])
+                    st.session_state.save_success = job['progress']['index']['status'] == 'done'
+                    st.rerun()
+        elif job['status'] == 'failed':
+            st.caption(f"❌ {job['error']}")
+            if not job['input_path']:
+                return
+            if not (api_key or job_api_key(job['id'])):
+                st.caption("🔑 다시 시도하려면 사이드바에 Upstage API 키를 입력하세요.")
+            elif st.button("🔁 다시 시도", key=f"{key_prefix}_retry_{job['id']}"):
+                job_queue.retry(job['id'], api_key=api_key or None)
+                st.rerun()
+    
+    def session_jobs_running():
+        return any(
+            job['status'] in ('queued', 'running')
+            for job in store.list_jobs(job_ids=st.session_state.get('job_ids', []))
+        )
+    
+    def render_jobs(polling=False):
+        session_jobs = store.list_jobs(job_ids=st.session_state.get('job_ids', []))
+        if session_jobs:
+            for job in session_jobs:
+                render_job(job, "session")
+        else:
+            st.caption("이 세션에서 등록한 작업이 없습니다.")
+        
+        # 새로고침 등으로 세션이 바뀌어도 최근 작업 결과를 다시 불러올 수 있음
+        session_ids = {job['id'] for job in session_jobs}
+        recent_jobs = [job for job in store.list_jobs(limit=20) if job['id'] not in session_ids]
+        if recent_jobs:
+            with st.expander(f"최근 작업 ({len(recent_jobs)}개)"):
+                for job in recent_jobs:
+                    render_job(job, "recent")
+        
+        # 작업이 모두 끝나면 전체 화면을 한 번 다시 그려 주기적 갱신을 멈춤
+        if polling and not any(job['status'] in ('queued', 'running') for job in session_jobs):
+            st.rerun()
+    
+    if hasattr(st, "fragment"):
+        st.checkbox("진행 상태 자동 새로고침", value=True, key="jobs_auto_refresh")
+        polling = st.session_state.get('jobs_auto_refresh', True) and session_jobs_running()
+        st.fragment(run_every=JOBS_REFRESH_SECONDS if polling else None)(render_jobs)(polling=polling)
+    else:
+        if st.button("🔄 진행 상태 새로고침", key="jobs_refresh"):
+            st.rerun()
+        render_jobs()
+
+def process_document(uploaded_file, api_key, use_cache=True, parallel=None, ocr_precheck=None):
     """업로드된 파일을 처리하는 함수"""
     
     # 진행 상태 표시
@@ -304,7 +660,10 @@ def process_document(uploaded_file, api_key):
         # 문서 처리 (기본 설정 사용)
         result = process_document_with_upstage(
             file_path=tmp_file_path,
-            api_key=final_api_key
+            api_key=final_api_key,
+            use_cache=use_cache,
+            parallel=parallel,
+            ocr_precheck=ocr_precheck
         )
         
         status_text.text("✅ 처리 완료!")
@@ -344,6 +703,14 @@ def display_results(result, result_col):
                 st.metric("청크 수", result.get('chunks_count', 0))
             with col2:
                 st.metric("임베딩 수", result.get('embeddings_count', 0))
+                if 'embeddings_cache_hits' in result:
+                    st.caption(f"캐시 재사용 {result['embeddings_cache_hits']}개 / 신규 {result['embeddings_cache_misses']}개")
+                if result.get('chunk_token_stats', {}).get('count'):
+                    token_stats = result['chunk_token_stats']
+                    st.caption(
+                        f"청크 토큰: 총 {token_stats['total']} / 평균 {token_stats['mean']} / "
+                        f"p90 {token_stats['p90']} / 최대 {token_stats['max']}"
+                    )
             with col3:
                 if 'detected_headers' in result:
                     st.metric("감지된 헤더", len(result['detected_headers']))
@@ -351,6 +718,14 @@ def display_results(result, result_col):
                     st.metric("감지된 헤더", 0)
             with col4:
                 st.metric("처리 상태", "✅ 완료" if result.get('chunks_count', 0) > 0 else "⚠️ 미완료")
+                if result.get('parse_cache_hit'):
+                    st.caption("📦 파싱 캐시 사용")
+                elif 'parse_seconds' in result:
+                    st.caption(f"⏱️ 파싱 {result['parse_seconds']}초")
+                if result.get('ocr_page_counts'):
+                    st.caption("OCR 모드별 페이지: " + ", ".join(
+                        f"{mode} {count}" for mode, count in result['ocr_page_counts'].items()
+                    ))
             
             # 원본 텍스트 표시
             if 'content' in result and result['content']:
@@ -364,12 +739,22 @@ def display_results(result, result_col):
             else:
                 st.info("추출된 텍스트가 없습니다.")
                 
-            # 임베딩 정보 표시
-            if 'embeddings' in result and result['embeddings']:
+            # 임베딩 정보 표시 (slim 결과는 벡터 대신 embeddings_ref만 있음)
+            if result.get('embeddings') or result.get('embeddings_ref'):
                 st.subheader("🔗 임베딩 정보")
-                st.info(f"✅ {len(result['embeddings'])}개 청크에 대한 임베딩 벡터가 생성되었습니다.")
-                if result['embeddings']:
-                    st.text(f"벡터 차원: {len(result['embeddings'][0])}차원")
+                if result.get('embeddings_ref'):
+                    embeddings_total = result['embeddings_ref']['count']
+                    dimension = result['embeddings_ref']['dimension']
+                else:
+                    embeddings_total = len(result['embeddings'])
+                    first_embedding = next((embedding for embedding in result['embeddings'] if embedding is not None), None)
+                    dimension = len(first_embedding) if first_embedding else 0
+                st.info(f"✅ {result.get('embeddings_count', embeddings_total)}개 청크에 대한 임베딩 벡터가 생성되었습니다.")
+                if dimension:
+                    st.text(f"벡터 차원: {dimension}차원")
+                if result.get('embeddings_failures'):
+                    failed_ids = ", ".join(str(failure['chunk_id']) for failure in result['embeddings_failures'])
+                    st.warning(f"⚠️ 임베딩에 실패한 청크 (벡터 없이 저장됨): {failed_ids}")
             elif 'embeddings_error' in result:
                 st.subheader("🔗 임베딩 정보")
                 st.error(f"❌ 임베딩 생성 실패: {result['embeddings_error']}")
@@ -401,22 +786,30 @@ def display_results(result, result_col):
                             
                             # 청크 저장 (임베딩 포함)
                             with st.spinner("OpenSearch에 저장 중..."):
-                                embeddings = result.get('embeddings', [])
+                                embeddings = load_result_embeddings(result)
+                                # 구조화 청크가 있으면 섹션/페이지 필드와 함께 저장 (chunks, 임베딩과 같은 레코드 본문)
+                                chunks_to_save = [
+                                    ChunkRecord.from_dict(record) for record in result['chunk_records']
+                                ] if result.get('chunk_records') else result['chunks']
                                 saved_ids = save_chunks_to_opensearch(
-                                    chunks=result['chunks'],
+                                    chunks=chunks_to_save,
                                     client=opensearch_client,
                                     document_name=st.session_state.get('uploaded_file_name', 'unknown'),
                                     metadata=metadata,
-                                    embeddings=embeddings
+                                    embeddings=embeddings,
+                                    incremental=True
                                 )
                             
                             st.success(f"✅ {len(saved_ids)}개 청크가 OpenSearch에 저장되었습니다!")
                             if embeddings:
-                                st.info(f"🔗 {len(embeddings)}개 임베딩 벡터도 함께 저장되었습니다.")
+                                st.info(f"🔗 {result.get('embeddings_count', len(embeddings))}개 임베딩 벡터도 함께 저장되었습니다.")
                             st.text(f"저장된 문서 ID 예시: {saved_ids[0] if saved_ids else 'N/A'}")
                             # 저장 상태를 session_state에 기록
                             st.session_state.save_success = True
                             
+                        except FileNotFoundError:
+                            # 세션의 임베딩이 결과 저장소 정리(LRU)로 지워진 경우
+                            st.error(f"❌ OpenSearch 저장 실패: {EVICTED_RESULT_MESSAGE}")
                         except Exception as e:
                             st.error(f"❌ OpenSearch 저장 실패: {str(e)}")
                 
@@ -431,11 +824,22 @@ def display_results(result, result_col):
                         for i, header in enumerate(result['detected_headers'], 1):
                             st.text(f"{i}. {header}")
                 
+                # 청크 본문에는 페이지 표시가 없으므로 선택지에 chunk_records의 페이지를 함께 표시
+                chunk_records = result.get('chunk_records') or []
+                
+                def chunk_label(x):
+                    record = chunk_records[x] if x < len(chunk_records) else {}
+                    start_page, end_page = record.get('start_page'), record.get('end_page')
+                    if start_page is None:
+                        return f"청크 {x+1}"
+                    pages = start_page if end_page in (None, start_page) else f"{start_page}-{end_page}"
+                    return f"청크 {x+1} (페이지 {pages})"
+                
                 # 청크 선택기 - key 추가하여 상태 유지
                 chunk_idx = st.selectbox(
                     "청크 선택:",
                     range(len(result['chunks'])),
-                    format_func=lambda x: f"청크 {x+1}",
+                    format_func=chunk_label,
                     key="chunk_selector"
                 )
                 
@@ -451,7 +855,7 @@ def display_results(result, result_col):
                 # 모든 청크 미리보기
                 with st.expander("모든 청크 미리보기"):
                     for i, chunk in enumerate(result['chunks'], 1):
-                        st.markdown(f"**--- 청크 {i} ---**")
+                        st.markdown(f"**--- {chunk_label(i - 1)} ---**")
                         st.text(chunk[:200] + "..." if len(chunk) > 200 else chunk)
                         st.markdown("---")
                         
@@ -467,21 +871,57 @@ def display_results(result, result_col):
         with tab4:
             st.subheader("결과 다운로드")
             
-            # JSON 파일로 다운로드
-            json_str = json.dumps(result, ensure_ascii=False, indent=2)
-            st.download_button(
-                label="📥 JSON 파일 다운로드",
-                data=json_str,
-                file_name=f"processed_{st.session_state.get('uploaded_file_name', 'unknown')}.json",
-                mime="application/json"
-            )
+            # 다운로드 파일은 요청할 때 한 번만 만들어 저장소에 두고, 재실행 때는 저장된 파일을 사용
+            download_refs = st.session_state.setdefault('download_refs', {}).setdefault(result.get('result_id', 'current'), {})
+            downloads = {}
+            for name in list(download_refs):
+                try:
+                    downloads[name] = get_blob_store().get(download_refs[name])
+                except FileNotFoundError:
+                    # 저장소 정리로 지워진 다운로드 파일은 참조를 지워 다시 만들 수 있게 함
+                    download_refs.clear()
+                    downloads = {}
+                    st.warning("⚠️ 다운로드 파일이 저장소 정리로 삭제되었습니다. 다시 만들어주세요.")
+                    break
+            
+            if 'json' not in downloads:
+                if st.button("📦 다운로드 파일 만들기", key="build_downloads"):
+                    try:
+                        with st.spinner("다운로드 파일을 만드는 중..."):
+                            store = get_blob_store()
+                            full_result = hydrate_result(result)
+                            download_refs['json'] = store.put(
+                                json.dumps(full_result, ensure_ascii=False, indent=2).encode("utf-8")
+                            )
+                            if result.get('chunks'):
+                                # 텍스트 파일에는 기존 형식대로 청크 끝에 "[페이지 N]" 표시를 붙임
+                                chunk_texts = [
+                                    format_chunk_text(ChunkRecord.from_dict(record)) for record in result['chunk_records']
+                                ] if result.get('chunk_records') else result['chunks']
+                                chunks_text = "\n\n".join([f"--- 청크 {i} ---\n{chunk}" for i, chunk in enumerate(chunk_texts, 1)])
+                                download_refs['chunks'] = store.put(chunks_text.encode("utf-8"))
+                        st.rerun()
+                    except FileNotFoundError:
+                        # 결과의 이미지/임베딩 원본이 저장소 정리로 지워진 경우
+                        download_refs.clear()
+                        st.error(f"❌ 다운로드 파일을 만들 수 없습니다: {EVICTED_RESULT_MESSAGE}")
+                else:
+                    st.caption("전체 결과 JSON과 청크 텍스트 파일은 버튼을 누르면 한 번만 만들어집니다.")
+            
+            if 'json' in downloads:
+                # JSON 파일로 다운로드
+                st.download_button(
+                    label="📥 JSON 파일 다운로드",
+                    data=downloads['json'],
+                    file_name=f"processed_{st.session_state.get('uploaded_file_name', 'unknown')}.json",
+                    mime="application/json"
+                )
             
             # 청크 텍스트 파일로 다운로드
-            if 'chunks' in result and result['chunks']:
-                chunks_text = "\n\n".join([f"--- 청크 {i} ---\n{chunk}" for i, chunk in enumerate(result['chunks'], 1)])
+            if 'chunks' in downloads:
                 st.download_button(
                     label="📥 청크 텍스트 파일 다운로드",
-                    data=chunks_text,
+                    data=downloads['chunks'],
                     file_name=f"chunks_{st.session_state.get('uploaded_file_name', 'unknown')}.txt",
                     mime="text/plain"
                 )
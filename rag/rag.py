@@ -1,12 +1,26 @@
 from opensearchpy import OpenSearch
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+import hashlib
 import sys
 import os
+import threading
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from file.search import create_opensearch_client, search_chunks, vector_search_chunks, hybrid_search_chunks
+from file.search import (
+    create_opensearch_client,
+    create_async_opensearch_client,
+    search_chunks,
+    vector_search_chunks,
+    hybrid_search_chunks,
+    multi_search_chunks,
+    asearch_chunks,
+    avector_search_chunks,
+    ahybrid_search_chunks
+)
 from file.upstage import create_embeddings_client
+from file.embedding_cache import embed_query_cached, aembed_query_cached
 from langchain_openai import AzureChatOpenAI
 import os
 from dotenv import load_dotenv
@@ -14,11 +28,61 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _needs_query_embedding(search_type: str, query_vector: Optional[List[float]]) -> bool:
+    return search_type != "text" and query_vector is None
+
+def _search_call(
+    search_type: str,
+    query: str,
+    query_vector: Optional[List[float]],
+    size: int,
+    filters: Optional[Dict[str, Any]],
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
+):
+    """
+    검색 타입과 쿼리 벡터로 실제 검색 종류와 인자를 정합니다 (동기/비동기 공통).
+    
+    벡터 검색인데 벡터가 없으면 텍스트 검색으로 대체하고, 하이브리드 검색은 벡터가 없으면
+    hybrid_search_chunks가 텍스트 검색만 수행합니다. 알 수 없는 타입이면 None.
+    fusion/candidate_size는 하이브리드 검색에만 넘기며, None이면 hybrid_search_chunks 기본값을 씁니다.
+    
+    Returns:
+        ("text"|"vector"|"hybrid", 위치 인자, 키워드 인자) 또는 None
+    """
+    kwargs = {"size": size, "filters": filters}
+    if search_type == "vector" and query_vector is not None:
+        return "vector", (query_vector,), kwargs
+    if search_type == "hybrid":
+        if fusion is not None:
+            kwargs["fusion"] = fusion
+        if candidate_size is not None:
+            kwargs["candidate_size"] = candidate_size
+        return "hybrid", (query, query_vector), kwargs
+    if search_type in ("text", "vector"):
+        return "text", (query,), kwargs
+    return None
+
+_SEARCH_FUNCTIONS = {"text": search_chunks, "vector": vector_search_chunks, "hybrid": hybrid_search_chunks}
+_ASEARCH_FUNCTIONS = {"text": asearch_chunks, "vector": avector_search_chunks, "hybrid": ahybrid_search_chunks}
+
+def _search_output(query: str, search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "query": query,
+        "search_results": search_results,
+        "total_results": len(search_results)
+    }
+
 def rag_search(
     query: str,
     client: Optional[OpenSearch] = None,
     search_type: str = "hybrid",
-    size: int = 5
+    size: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    embeddings_client=None,
+    query_vector: Optional[List[float]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     OpenSearch를 사용한 RAG 기반 검색을 수행합니다.
@@ -28,6 +92,12 @@ def rag_search(
         client: OpenSearch 클라이언트 (None이면 새로 생성)
         search_type: 검색 타입 ("text", "vector", "hybrid")
         size: 반환할 결과 수
+        filters: 검색 범위 (문서 이름, 메타데이터, 기간 - file.search.build_search_filters 참고)
+        embeddings_client: 쿼리 임베딩용 클라이언트 (None이면 공유 클라이언트)
+        query_vector: 미리 계산한 쿼리 임베딩 (있으면 임베딩 요청을 하지 않음)
+        fusion: 하이브리드 점수 결합 방식 ("bool", "rrf", "pipeline" - hybrid_search_chunks 참고,
+            None이면 file.search.DEFAULT_HYBRID_FUSION)
+        candidate_size: rrf/pipeline에서 검색 방식별로 가져올 후보 수 (None이면 size 기준 기본값)
         
     Returns:
         검색 결과와 관련 메타데이터
@@ -35,40 +105,104 @@ def rag_search(
     if client is None:
         client = create_opensearch_client()
     
-    # 검색 수행
-    search_results = []
-    
-    if search_type == "text":
-        search_results = search_chunks(client, query, size=size)
-    elif search_type == "vector":
-        # 쿼리 임베딩 생성
-        embeddings_client = create_embeddings_client()
+    if _needs_query_embedding(search_type, query_vector):
+        embeddings_client = embeddings_client or get_shared_embeddings_client()
         if embeddings_client:
             try:
-                query_embedding = embeddings_client.embed_query(query)
-                search_results = vector_search_chunks(client, query_embedding, size=size)
+                query_vector = embed_query_cached(embeddings_client, query)
             except Exception as e:
-                print(f"벡터 검색 실패, 텍스트 검색으로 대체: {e}")
-                search_results = search_chunks(client, query, size=size)
-        else:
-            search_results = search_chunks(client, query, size=size)
-    elif search_type == "hybrid":
-        # 하이브리드 검색을 위한 쿼리 임베딩 생성
-        embeddings_client = create_embeddings_client()
-        query_vector = None
+                print(f"임베딩 생성 실패, 텍스트 검색만 사용: {e}")
+    
+    call = _search_call(search_type, query, query_vector, size, filters, fusion, candidate_size)
+    if call is None:
+        return _search_output(query, [])
+    kind, args, kwargs = call
+    return _search_output(query, _SEARCH_FUNCTIONS[kind](client, *args, **kwargs))
+
+def rag_search_batch(
+    queries: List[str],
+    client: Optional[OpenSearch] = None,
+    search_type: str = "hybrid",
+    size: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    여러 쿼리의 RAG 검색을 _msearch와 배치 임베딩으로 한 번에 수행합니다.
+    
+    Args:
+        queries: 검색 쿼리 목록
+        client: OpenSearch 클라이언트 (None이면 새로 생성)
+        search_type: 검색 타입 ("text", "vector", "hybrid")
+        size: 쿼리별 반환할 결과 수
+        filters: 모든 쿼리에 적용할 검색 범위
+        fusion: 하이브리드 점수 결합 방식 (rag_search 참고, 배치에서 "pipeline"은 RRF로 대체)
+        candidate_size: 하이브리드 후보 수 (rag_search 참고)
+        
+    Returns:
+        쿼리 순서대로 rag_search와 같은 형식의 결과 목록 (실패한 쿼리는 "error" 포함)
+    """
+    if client is None:
+        client = create_opensearch_client()
+    
+    embeddings_client = get_shared_embeddings_client() if search_type != "text" else None
+    hybrid_options = {
+        key: value for key, value in (("fusion", fusion), ("candidate_size", candidate_size)) if value is not None
+    }
+    batch_results = multi_search_chunks(
+        client,
+        [
+            {"query": query, "search_type": search_type, "size": size, "filters": filters, **hybrid_options}
+            for query in queries
+        ],
+        embeddings_client=embeddings_client
+    )
+    
+    return [
+        {
+            "query": item["query"],
+            "search_results": item["results"],
+            "total_results": len(item["results"]),
+            "error": item["error"]
+        }
+        for item in batch_results
+    ]
+
+async def arag_search(
+    query: str,
+    client=None,
+    search_type: str = "hybrid",
+    size: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    embeddings_client=None,
+    query_vector: Optional[List[float]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    rag_search의 비동기 버전입니다. 인자와 반환값은 rag_search와 같습니다.
+    
+    AsyncOpenSearch와 임베딩 클라이언트의 aembed_query를 사용하므로
+    하나의 이벤트 루프에서 여러 질문을 동시에 처리할 수 있습니다.
+    client가 None이면 현재 루프의 공유 AsyncOpenSearch 클라이언트를 사용합니다.
+    """
+    if client is None:
+        client = create_async_opensearch_client()
+    
+    if _needs_query_embedding(search_type, query_vector):
+        embeddings_client = embeddings_client or get_shared_embeddings_client()
         if embeddings_client:
             try:
-                query_vector = embeddings_client.embed_query(query)
+                query_vector = await aembed_query_cached(embeddings_client, query)
             except Exception as e:
                 print(f"임베딩 생성 실패, 텍스트 검색만 사용: {e}")
-        
-        search_results = hybrid_search_chunks(client, query, query_vector, size=size)
     
-    return {
-        "query": query,
-        "search_results": search_results,
-        "total_results": len(search_results)
-    }
+    call = _search_call(search_type, query, query_vector, size, filters, fusion, candidate_size)
+    if call is None:
+        return _search_output(query, [])
+    kind, args, kwargs = call
+    return _search_output(query, await _ASEARCH_FUNCTIONS[kind](client, *args, **kwargs))
 
 def get_context_from_results(results: List[Dict[str, Any]], max_context_length: int = 50000) -> str:
     """
@@ -87,6 +221,11 @@ def get_context_from_results(results: List[Dict[str, Any]], max_context_length:
     for result in results:
         content = result.get("content", "")
         source = f"[출처: {result.get('document_name', 'unknown')}]"
+        # 구조화 청크는 본문에 페이지 표시가 없으므로 저장된 페이지 범위를 출처에 표시
+        if result.get("start_page") is not None:
+            end_page = result.get("end_page")
+            pages = result["start_page"] if end_page in (None, result["start_page"]) else f"{result['start_page']}-{end_page}"
+            source = f"[출처: {result.get('document_name', 'unknown')}, 페이지 {pages}]"
         
         # 단일 청크가 max_context_length를 초과하는 경우 잘라서 포함
         if len(content) > max_context_length:
@@ -107,12 +246,31 @@ def get_context_from_results(results: List[Dict[str, Any]], max_context_length:
     
     return "\n\n".join(context_parts)
 
+def _query_output(question: str, rag_result: Dict[str, Any], max_context_length: int) -> Dict[str, Any]:
+    """검색 결과로 rag_query 반환값(질문, 컨텍스트, 검색 메타데이터)을 만듭니다."""
+    return {
+        "question": question,
+        "context": get_context_from_results(
+            rag_result["search_results"],
+            max_context_length=max_context_length
+        ),
+        "search_metadata": {
+            "total_results": rag_result["total_results"]
+        },
+        "search_results": rag_result["search_results"]
+    }
+
 def rag_query(
     question: str,
     client: Optional[OpenSearch] = None,
     search_type: str = "hybrid",
     context_size: int = 5,
-    max_context_length: int = 50000
+    max_context_length: int = 50000,
+    filters: Optional[Dict[str, Any]] = None,
+    embeddings_client=None,
+    query_vector: Optional[List[float]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
 ) -> Dict[str, Any]:
     """
     RAG를 사용한 질의응답을 수행합니다.
@@ -123,32 +281,144 @@ def rag_query(
         search_type: 검색 타입
         context_size: 컨텍스트로 사용할 검색 결과 수
         max_context_length: 최대 컨텍스트 길이
+        filters: 검색 범위 (file.search.build_search_filters 참고)
+        embeddings_client: 쿼리 임베딩용 클라이언트 (None이면 공유 클라이언트)
+        query_vector: 미리 계산한 쿼리 임베딩 (rag_search 참고)
+        fusion: 하이브리드 점수 결합 방식 (rag_search 참고)
+        candidate_size: 하이브리드 후보 수 (rag_search 참고)
         
     Returns:
         질문, 컨텍스트, 검색 메타데이터를 포함한 딕셔너리
     """
-    # RAG 검색 수행
     rag_result = rag_search(
         query=question,
         client=client,
         search_type=search_type,
-        size=context_size
+        size=context_size,
+        filters=filters,
+        embeddings_client=embeddings_client,
+        query_vector=query_vector,
+        fusion=fusion,
+        candidate_size=candidate_size
     )
+    return _query_output(question, rag_result, max_context_length)
+
+async def arag_query(
+    question: str,
+    client=None,
+    search_type: str = "hybrid",
+    context_size: int = 5,
+    max_context_length: int = 50000,
+    filters: Optional[Dict[str, Any]] = None,
+    embeddings_client=None,
+    query_vector: Optional[List[float]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """rag_query의 비동기 버전입니다. 인자와 반환값은 rag_query와 같습니다."""
+    rag_result = await arag_search(
+        query=question,
+        client=client,
+        search_type=search_type,
+        size=context_size,
+        filters=filters,
+        embeddings_client=embeddings_client,
+        query_vector=query_vector,
+        fusion=fusion,
+        candidate_size=candidate_size
+    )
+    return _query_output(question, rag_result, max_context_length)
+
+def rag_query_batch(
+    questions: List[str],
+    client: Optional[OpenSearch] = None,
+    search_type: str = "hybrid",
+    context_size: int = 5,
+    max_context_length: int = 50000,
+    filters: Optional[Dict[str, Any]] = None,
+    fusion: Optional[str] = None,
+    candidate_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    여러 질문의 컨텍스트를 한 번의 배치 검색으로 준비합니다 (체크리스트/평가용).
+    fusion/candidate_size는 rag_search_batch와 같습니다.
     
-    # 컨텍스트 생성
-    context = get_context_from_results(
-        rag_result["search_results"],
-        max_context_length=max_context_length
+    Returns:
+        질문 순서대로 rag_query와 같은 형식의 결과 목록
+    """
+    rag_results = rag_search_batch(
+        queries=questions,
+        client=client,
+        search_type=search_type,
+        size=context_size,
+        filters=filters,
+        fusion=fusion,
+        candidate_size=candidate_size
     )
     
-    return {
-        "question": question,
-        "context": context,
-        "search_metadata": {
-            "total_results": rag_result["total_results"]
-        },
-        "search_results": rag_result["search_results"]
-    }
+    return [
+        {
+            "question": rag_result["query"],
+            "context": get_context_from_results(
+                rag_result["search_results"],
+                max_context_length=max_context_length
+            ),
+            "search_metadata": {
+                "total_results": rag_result["total_results"],
+                "error": rag_result["error"]
+            },
+            "search_results": rag_result["search_results"]
+        }
+        for rag_result in rag_results
+    ]
+
+# 클라이언트 생성과 검색 결과에 영향을 주는 환경변수 (client_config_fingerprint 참고)
+_CLIENT_CONFIG_ENV = (
+    "AZURE_OPENAI_ENDPOINT",
+    "AZURE_OPENAI_API_KEY",
+    "AZURE_OPENAI_API_VERSION",
+    "AZURE_OPENAI_DEPLOYMENT",
+    "AZURE_OPENAI_EMBEDDING_DEPLOYMENT",
+    "OPENSEARCH_HOST",
+    "OPENSEARCH_PORT",
+    "OPENSEARCH_HOSTS",
+    "OPENSEARCH_USERNAME",
+    "OPENSEARCH_USE_SSL",
+    "OPENSEARCH_PASSWORD"
+)
+
+def client_config_fingerprint() -> str:
+    """
+    LLM/임베딩/OpenSearch 클라이언트 설정의 지문을 반환합니다.
+    
+    설정이 바뀌면 값이 바뀌므로 클라이언트나 검색 결과를 캐시할 때 키로 사용합니다.
+    API 키 등 민감한 값은 해시로만 들어갑니다.
+    """
+    values = "\n".join(f"{name}={os.getenv(name, '')}" for name in _CLIENT_CONFIG_ENV)
+    return hashlib.sha256(values.encode("utf-8")).hexdigest()[:16]
+
+_embeddings_client_lock = threading.Lock()
+_shared_embeddings_client = None
+_shared_embeddings_fingerprint: Optional[str] = None
+
+def get_shared_embeddings_client():
+    """
+    프로세스 전체에서 공유하는 쿼리 임베딩 클라이언트를 반환합니다 (스레드 안전).
+    
+    설정 지문(client_config_fingerprint)이 바뀌면 새로 만듭니다. 생성에 실패하면 None이며
+    다음 호출에서 다시 시도합니다.
+    """
+    global _shared_embeddings_client, _shared_embeddings_fingerprint
+    
+    fingerprint = client_config_fingerprint()
+    if _shared_embeddings_client is not None and _shared_embeddings_fingerprint == fingerprint:
+        return _shared_embeddings_client
+    
+    with _embeddings_client_lock:
+        if _shared_embeddings_client is None or _shared_embeddings_fingerprint != fingerprint:
+            _shared_embeddings_client = create_embeddings_client()
+            _shared_embeddings_fingerprint = fingerprint
+        return _shared_embeddings_client
 
 def create_llm_client():
     """Azure OpenAI LLM 클라이언트를 생성합니다."""
@@ -165,27 +435,9 @@ def create_llm_client():
         print(f"⚠️ LLM 클라이언트 생성 실패: {e}")
         return None
 
-def generate_answer_with_llm(question: str, context: str, llm_client=None) -> str:
-    """
-    컨텍스트를 바탕으로 LLM을 사용해 질문에 대한 답변을 생성합니다.
-    
-    Args:
-        question: 질문
-        context: 검색된 컨텍스트
-        llm_client: LLM 클라이언트 (None이면 새로 생성)
-        
-    Returns:
-        생성된 답변
-    """
-    if not context:
-        return "관련된 정보를 찾을 수 없어 답변을 생성할 수 없습니다."
-    
-    if llm_client is None:
-        llm_client = create_llm_client()
-        if llm_client is None:
-            return "LLM 서비스에 연결할 수 없어 답변을 생성할 수 없습니다."
-    
-    prompt = f"""Please provide an answer to the question based on the following context.
+def _build_answer_prompt(question: str, context: str) -> str:
+    """답변 생성용 프롬프트를 만듭니다."""
+    return f"""Please provide an answer to the question based on the following context.
 
 Context:
 {context}
@@ -208,6 +460,31 @@ Guidelines:
 
 Answer:"""
 
+def generate_answer_with_llm(question: str, context: str, llm_client=None) -> str:
+    """
+    컨텍스트를 바탕으로 LLM을 사용해 질문에 대한 답변을 생성합니다.
+    
+    답변이 모두 만들어진 뒤 한 번에 반환합니다 (배치/평가용).
+    화면에 바로 보여줄 때는 stream_answer_with_llm을 사용하세요.
+    
+    Args:
+        question: 질문
+        context: 검색된 컨텍스트
+        llm_client: LLM 클라이언트 (None이면 새로 생성)
+        
+    Returns:
+        생성된 답변
+    """
+    if not context:
+        return "관련된 정보를 찾을 수 없어 답변을 생성할 수 없습니다."
+    
+    if llm_client is None:
+        llm_client = create_llm_client()
+        if llm_client is None:
+            return "LLM 서비스에 연결할 수 없어 답변을 생성할 수 없습니다."
+    
+    prompt = _build_answer_prompt(question, context)
+
     try:
         response = llm_client.invoke(prompt)
         return response.content.strip()
@@ -215,6 +492,126 @@ Answer:"""
         print(f"⚠️ 답변 생성 중 오류: {e}")
         return f"답변 생성 중 오류가 발생했습니다: {str(e)}"
 
+async def agenerate_answer_with_llm(question: str, context: str, llm_client=None) -> str:
+    """generate_answer_with_llm의 비동기 버전입니다 (llm_client.ainvoke 사용)."""
+    if not context:
+        return "관련된 정보를 찾을 수 없어 답변을 생성할 수 없습니다."
+    
+    if llm_client is None:
+        llm_client = create_llm_client()
+        if llm_client is None:
+            return "LLM 서비스에 연결할 수 없어 답변을 생성할 수 없습니다."
+    
+    try:
+        response = await llm_client.ainvoke(_build_answer_prompt(question, context))
+        return response.content.strip()
+    except Exception as e:
+        print(f"⚠️ 답변 생성 중 오류: {e}")
+        return f"답변 생성 중 오류가 발생했습니다: {str(e)}"
+
+def _chunk_text(chunk) -> str:
+    """스트리밍 조각(AIMessageChunk 또는 문자열)의 텍스트를 꺼냅니다."""
+    content = getattr(chunk, "content", chunk)
+    return content if isinstance(content, str) else ""
+
+def _record_stream_stats(stats: Dict[str, Any], started: float, first_token_at: Optional[float], pieces: int, chars: int):
+    stats["first_token_seconds"] = round(first_token_at - started, 3) if first_token_at is not None else None
+    stats["total_seconds"] = round(time.perf_counter() - started, 3)
+    stats["chunks"] = pieces
+    stats["chars"] = chars
+    first_token = f"{stats['first_token_seconds']:.2f}초" if first_token_at is not None else "-"
+    print(f"⏱️ 답변 스트리밍: 첫 토큰 {first_token} / 전체 {stats['total_seconds']:.2f}초 ({pieces}개 조각, {chars}자)")
+
+def stream_answer_with_llm(
+    question: str,
+    context: str,
+    llm_client=None,
+    stats: Optional[Dict[str, Any]] = None
+) -> Iterator[str]:
+    """
+    generate_answer_with_llm의 스트리밍 버전입니다 (llm_client.stream 사용).
+    
+    답변 조각을 도착하는 대로 yield하며, 끝나면 첫 토큰까지의 시간과 전체 시간을 로그로 남깁니다.
+    오류도 예외 대신 마지막 조각으로 전달하므로 화면에 그대로 이어 쓸 수 있습니다.
+    
+    Args:
+        question: 질문
+        context: 검색된 컨텍스트
+        llm_client: LLM 클라이언트 (None이면 새로 생성)
+        stats: 넘기면 {"first_token_seconds", "total_seconds", "chunks", "chars"}를 채움
+        
+    Yields:
+        답변 텍스트 조각
+    """
+    stats = stats if stats is not None else {}
+    if not context:
+        yield "관련된 정보를 찾을 수 없어 답변을 생성할 수 없습니다."
+        return
+    
+    if llm_client is None:
+        llm_client = create_llm_client()
+        if llm_client is None:
+            yield "LLM 서비스에 연결할 수 없어 답변을 생성할 수 없습니다."
+            return
+    
+    started = time.perf_counter()
+    first_token_at = None
+    pieces = 0
+    chars = 0
+    try:
+        for chunk in llm_client.stream(_build_answer_prompt(question, context)):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            pieces += 1
+            chars += len(text)
+            yield text
+    except Exception as e:
+        print(f"⚠️ 답변 생성 중 오류: {e}")
+        yield f"\n\n답변 생성 중 오류가 발생했습니다: {str(e)}"
+    finally:
+        _record_stream_stats(stats, started, first_token_at, pieces, chars)
+
+async def astream_answer_with_llm(
+    question: str,
+    context: str,
+    llm_client=None,
+    stats: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """stream_answer_with_llm의 비동기 버전입니다 (llm_client.astream 사용)."""
+    stats = stats if stats is not None else {}
+    if not context:
+        yield "관련된 정보를 찾을 수 없어 답변을 생성할 수 없습니다."
+        return
+    
+    if llm_client is None:
+        llm_client = create_llm_client()
+        if llm_client is None:
+            yield "LLM 서비스에 연결할 수 없어 답변을 생성할 수 없습니다."
+            return
+    
+    started = time.perf_counter()
+    first_token_at = None
+    pieces = 0
+    chars = 0
+    try:
+        async for chunk in llm_client.astream(_build_answer_prompt(question, context)):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            pieces += 1
+            chars += len(text)
+            yield text
+    except Exception as e:
+        print(f"⚠️ 답변 생성 중 오류: {e}")
+        yield f"\n\n답변 생성 중 오류가 발생했습니다: {str(e)}"
+    finally:
+        _record_stream_stats(stats, started, first_token_at, pieces, chars)
+
 # 테스트 함수
 def main():
     """RAG 시스템 테스트 함수"""
@@ -233,12 +630,13 @@ def main():
         "Proposal Requirements"
     ]
     
-    for question in sample_questions:
+    # 모든 질문의 검색을 한 번에 수행
+    results = rag_query_batch(sample_questions, client)
+    
+    for question, result in zip(sample_questions, results):
         print(f"\n질문: {question}")
         print("-" * 80)
         
-        result = rag_query(question, client)
-        
         if result['context']:
             # LLM을 사용해 답변 생성
             answer = generate_answer_with_llm(question, result['context'], llm_client)
@@ -0,0 +1,164 @@
+import copy
+import fnmatch
+import itertools
+
+from opensearchpy.exceptions import NotFoundError
+
+
+def _not_found(name):
+    return NotFoundError(404, "index_not_found_exception", {"index": name})
+
+
+class FakeIndices:
+    def __init__(self, cluster):
+        self._cluster = cluster
+
+    def exists(self, index):
+        return index in self._cluster.indices_data or bool(self._cluster.aliases.get(index))
+
+    def exists_alias(self, name):
+        return bool(self._cluster.aliases.get(name))
+
+    def get_alias(self, name):
+        targets = self._cluster.aliases.get(name)
+        if not targets:
+            raise _not_found(name)
+        return {index: {"aliases": {name: {}}} for index in targets}
+
+    def get_mapping(self, index):
+        return {name: {"mappings": copy.deepcopy(self._cluster.indices_data[name]["mappings"])}
+                for name in self._cluster.resolve(index)}
+
+    def create(self, index, body):
+        self._cluster.create(index, body)
+
+    def put_mapping(self, index, body):
+        for name in self._cluster.resolve(index):
+            mappings = self._cluster.indices_data[name]["mappings"]
+            if "_meta" in body:
+                mappings["_meta"] = copy.deepcopy(body["_meta"])
+            mappings.setdefault("properties", {}).update(copy.deepcopy(body.get("properties", {})))
+
+    def put_settings(self, index, body):
+        for name in self._cluster.resolve(index):
+            settings = self._cluster.indices_data[name]["settings"]
+            for key, value in body.items():
+                if value is None:
+                    settings.pop(key, None)
+                else:
+                    settings[key] = value
+
+    def clone(self, index, target, body=None, **kwargs):
+        source, = self._cluster.resolve(index)
+        if target in self._cluster.indices_data:
+            raise ValueError(f"{target} already exists")
+        data = self._cluster.indices_data[source]
+        self._cluster.create(target, {"mappings": data["mappings"], "settings": data["settings"]})
+        self.put_settings(target, (body or {}).get("settings", {}))
+        self._cluster.indices_data[target]["docs"] = copy.deepcopy(data["docs"])
+
+    def refresh(self, index):
+        self._cluster.resolve(index)
+
+    def delete(self, index):
+        for name in self._cluster.resolve(index):
+            del self._cluster.indices_data[name]
+            for targets in self._cluster.aliases.values():
+                targets.discard(name)
+
+    def update_aliases(self, body):
+        # 실제 클러스터처럼 모든 액션을 검증한 뒤 한 번에 적용
+        for action in body["actions"]:
+            (kind, spec), = action.items()
+            if spec["index"] not in self._cluster.indices_data:
+                raise _not_found(spec["index"])
+        for action in body["actions"]:
+            (kind, spec), = action.items()
+            if kind == "add":
+                self._cluster.aliases.setdefault(spec["alias"], set()).add(spec["index"])
+            elif kind == "remove":
+                self._cluster.aliases.get(spec["alias"], set()).discard(spec["index"])
+            elif kind == "remove_index":
+                self.delete(spec["index"])
+        self._cluster.alias_updates.append(body["actions"])
+
+
+class FakeCat:
+    def __init__(self, cluster):
+        self._cluster = cluster
+
+    def indices(self, index, format, h):
+        return [
+            {"index": name, "docs.count": str(len(data["docs"])), "creation.date": str(data["created"])}
+            for name, data in self._cluster.indices_data.items()
+            if fnmatch.fnmatch(name, index)
+        ]
+
+
+class FakeTransport:
+    def perform_request(self, method, url, **kwargs):
+        return {}
+
+
+class FakeOpenSearch:
+    """
+    alias, 매핑, 설정, 문서, reindex/clone만 흉내 내는 메모리 클러스터 (index_alias/양자화 재구축 테스트용).
+
+    search/count는 exists 조건만 보고 모든 문서를 반환합니다.
+    """
+
+    def __init__(self):
+        self.indices_data = {}
+        self.aliases = {}
+        self.alias_updates = []
+        self._clock = itertools.count(1_700_000_000_000)
+        self.indices = FakeIndices(self)
+        self.cat = FakeCat(self)
+        self.transport = FakeTransport()
+
+    def create(self, index, body):
+        self.indices_data[index] = {
+            "mappings": copy.deepcopy(body.get("mappings", {})),
+            "settings": copy.deepcopy(body.get("settings", {})),
+            "docs": {},
+            "created": next(self._clock)
+        }
+        for alias in body.get("aliases", {}):
+            self.aliases.setdefault(alias, set()).add(index)
+
+    def resolve(self, name):
+        if name in self.indices_data:
+            return [name]
+        targets = sorted(self.aliases.get(name) or [])
+        if not targets:
+            raise _not_found(name)
+        return targets
+
+    def add_docs(self, index, docs):
+        target = self.resolve(index)[0]
+        for doc_id, source in docs.items():
+            self.indices_data[target]["docs"][doc_id] = copy.deepcopy(source)
+
+    def reindex(self, body, **kwargs):
+        created = 0
+        for source_index in self.resolve(body["source"]["index"]):
+            for doc_id, source in self.indices_data[source_index]["docs"].items():
+                self.indices_data[body["dest"]["index"]]["docs"][doc_id] = copy.deepcopy(source)
+                created += 1
+        return {"created": created, "updated": 0, "failures": []}
+
+    def _matching(self, index, body):
+        query = body.get("query", {})
+        field = (query.get("exists") or query.get("function_score", {}).get("query", {}).get("exists") or {}).get("field")
+        for name in self.resolve(index):
+            for doc_id, source in self.indices_data[name]["docs"].items():
+                if field is None or source.get(field) is not None:
+                    yield doc_id, source
+
+    def search(self, index, body):
+        hits = [{"_id": doc_id, "_source": copy.deepcopy(source)} for doc_id, source in self._matching(index, body)]
+        return {"hits": {"hits": hits[:body.get("size", 10)], "total": {"value": len(hits)}}}
+
+    def count(self, index, body):
+        return {"count": sum(1 for _ in self._matching(index, body))}
+
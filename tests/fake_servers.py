@@ -0,0 +1,54 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeServer:
+    """
+    테스트용 로컬 HTTP 서버.
+
+    handler(method, path, headers, body) -> (status, headers, body bytes)를 받아
+    별도 스레드에서 응답하고, 받은 요청을 requests 목록에 기록합니다.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self._lock = threading.Lock()
+        outer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                with outer._lock:
+                    outer.requests.append({"method": self.command, "path": self.path, "headers": dict(self.headers), "body": body})
+                status, headers, payload = outer.handler(self.command, self.path, self.headers, body)
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = _handle
+            do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def json_response(status, data, headers=None):
+    return status, {"Content-Type": "application/json", **(headers or {})}, json.dumps(data).encode("utf-8")
@@ -0,0 +1,42 @@
+import os
+import time
+
+import pytest
+
+from file.blob_store import BlobStore, load_result_embeddings, slim_result
+
+
+def age(store, ref, seconds):
+    stamp = time.time() - seconds
+    os.utime(store._path(ref), (stamp, stamp))
+
+
+def test_evict_keeps_recently_used_entries(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=10, min_age_seconds=3600)
+    old = store.put(b"a" * 8)
+    recent = store.put(b"b" * 8)
+    age(store, old, 7200)
+    age(store, recent, 60)
+
+    assert store.evict() == 1
+    assert store.get(recent) == b"b" * 8
+    with pytest.raises(FileNotFoundError):
+        store.get(old)
+
+
+def test_evict_may_exceed_limit_while_entries_are_pinned(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=10, min_age_seconds=3600)
+    refs = [store.put(bytes([i]) * 8) for i in range(3)]
+
+    assert store.evict() == 0
+    assert all(store.get(ref) for ref in refs)
+
+
+def test_evicted_embeddings_raise_file_not_found(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=0)
+    slim = slim_result({"embeddings": [[0.5, 1.5], None]}, store)
+    assert load_result_embeddings(slim, store) == [[0.5, 1.5], None]
+
+    store.evict()
+    with pytest.raises(FileNotFoundError):
+        load_result_embeddings(slim, store)
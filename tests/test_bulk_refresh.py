@@ -0,0 +1,56 @@
+import threading
+
+from file.search import _bulk_refresh_interval
+
+
+class FakeIndices:
+    def __init__(self):
+        self.refresh_interval = "1s"
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def put_settings(self, index, body):
+        with self._lock:
+            self.refresh_interval = body["index"]["refresh_interval"]
+            self.calls.append(self.refresh_interval)
+
+
+class FakeClient:
+    def __init__(self):
+        self.indices = FakeIndices()
+
+
+def test_overlapping_bulk_loads_restore_profile_interval():
+    client = FakeClient()
+    first = _bulk_refresh_interval(client, "chunks", "-1", "1s")
+    second = _bulk_refresh_interval(client, "chunks", "-1", "1s")
+
+    first.__enter__()
+    second.__enter__()
+    assert client.indices.refresh_interval == "-1"
+
+    # 먼저 시작한 저장이 먼저 끝나도 다른 저장이 진행 중이면 복원하지 않음
+    first.__exit__(None, None, None)
+    assert client.indices.refresh_interval == "-1"
+
+    second.__exit__(None, None, None)
+    assert client.indices.refresh_interval == "1s"
+    assert client.indices.calls == ["-1", "1s"]
+
+
+def test_concurrent_bulk_loads_never_leave_refresh_disabled():
+    client = FakeClient()
+    barrier = threading.Barrier(8)
+
+    def save():
+        barrier.wait()
+        with _bulk_refresh_interval(client, "chunks", "-1", "1s"):
+            pass
+
+    threads = [threading.Thread(target=save) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert client.indices.refresh_interval == "1s"
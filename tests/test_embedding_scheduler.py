@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+
+import pytest
+
+from file.embedding_scheduler import EmbeddingScheduler, make_http_embed_fn, pack_token_batches, count_tokens
+from tests.fake_servers import FakeServer, json_response
+
+
+class FakeEmbeddingApi:
+    """
+    Azure 임베딩 API 흉내: 입력마다 [글자 수, 입력 위치] 벡터를 돌려줍니다.
+
+    - throttle_first: 처음 n개 요청은 429 + Retry-After로 거절
+    - "BAD"가 들어간 입력이 있으면 배치 전체를 400으로 거절
+    """
+
+    def __init__(self, throttle_first=0, retry_after="0.2"):
+        self.throttle_first = throttle_first
+        self.retry_after = retry_after
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, headers, body):
+        assert path.startswith("/openai/deployments/embed/embeddings?api-version=")
+        assert headers["api-key"] == "test-key"
+        texts = json.loads(body)["input"]
+        with self._lock:
+            self.batches.append(texts)
+            if self.throttle_first > 0:
+                self.throttle_first -= 1
+                return json_response(429, {"error": {"code": "429"}}, {"Retry-After": self.retry_after})
+        if any("BAD" in text for text in texts):
+            return json_response(400, {"error": {"code": "invalid_input"}})
+        # 순서를 섞어 보내도 index로 정렬하는지 확인
+        data = [{"index": i, "embedding": [float(len(text)), float(i)]} for i, text in enumerate(texts)]
+        return json_response(200, {"data": list(reversed(data))})
+
+
+def _scheduler(url, **overrides):
+    options = {
+        "tokens_per_minute": 10 ** 9,
+        "requests_per_minute": 10 ** 6,
+        "max_batch_tokens": 8000,
+        "max_batch_size": 64,
+        "max_workers": 1,
+        "max_retries": 3,
+        "backoff": 30.0
+    }
+    options.update(overrides)
+    embed_fn = make_http_embed_fn(endpoint=url, deployment="embed", api_key="test-key", api_version="2024-02-01")
+    return EmbeddingScheduler(embed_fn, **options)
+
+
+def test_batches_respect_token_budget():
+    texts = [("word " * n).strip() for n in (30, 5, 80, 12, 40, 3, 60, 25)]
+    budget = 60
+    expected = pack_token_batches([count_tokens(text) for text in texts], budget, 3)
+
+    api = FakeEmbeddingApi()
+    with FakeServer(api) as server:
+        outcome = _scheduler(server.url, max_batch_tokens=budget, max_batch_size=3).embed(texts)
+
+    assert api.batches == [[texts[i] for i in batch] for batch in expected]
+    for batch in api.batches:
+        assert len(batch) <= 3
+        assert len(batch) == 1 or sum(count_tokens(text) for text in batch) <= budget
+    assert outcome["embeddings"] == [[float(len(text)), float(batch.index(text))] for text in texts for batch in api.batches if text in batch]
+    assert outcome["failures"] == []
+    assert outcome["requests"] == len(expected)
+
+
+def test_429_is_retried_after_retry_after_header():
+    texts = ["alpha", "beta", "gamma"]
+    api = FakeEmbeddingApi(throttle_first=2, retry_after="0.2")
+    with FakeServer(api) as server:
+        started = time.monotonic()
+        outcome = _scheduler(server.url).embed(texts)
+        elapsed = time.monotonic() - started
+
+    assert outcome["retries"] == 2
+    assert outcome["requests"] == 3
+    assert outcome["failures"] == []
+    assert outcome["embeddings"] == [[5.0, 0.0], [4.0, 1.0], [5.0, 2.0]]
+    # backoff(30초)가 아니라 Retry-After(0.2초)만큼 기다림
+    assert 0.4 <= elapsed < 5
+
+
+def test_bad_input_is_isolated_by_bisection():
+    texts = [f"chunk {i}" for i in range(8)]
+    texts[5] = "BAD chunk"
+    api = FakeEmbeddingApi()
+    with FakeServer(api) as server:
+        outcome = _scheduler(server.url).embed(texts)
+
+    assert [failure["index"] for failure in outcome["failures"]] == [5]
+    assert outcome["failures"][0]["status"] == 400
+    assert outcome["embeddings"][5] is None
+    assert all(outcome["embeddings"][i] is not None for i in range(8) if i != 5)
+    # 8 → 4+4 → (4) + 2+2 → 1+1: 좋은 절반은 다시 나누지 않음
+    assert outcome["requests"] == 7
+    assert outcome["retries"] == 0
+
+
+def test_partial_results_keep_per_index_failures():
+    texts = [f"chunk {i}" for i in range(10)]
+    texts[1] = "BAD first"
+    texts[8] = "BAD second"
+    api = FakeEmbeddingApi()
+    with FakeServer(api) as server:
+        outcome = _scheduler(server.url, max_batch_size=4, max_workers=3).embed(texts)
+
+    assert [failure["index"] for failure in outcome["failures"]] == [1, 8]
+    assert all(failure["status"] == 400 for failure in outcome["failures"])
+    for i, vector in enumerate(outcome["embeddings"]):
+        if i in (1, 8):
+            assert vector is None
+        else:
+            assert vector is not None and vector[0] == float(len(texts[i]))
+
+
+def test_server_errors_exhaust_retries_and_report_status():
+    attempts = []
+
+    def always_503(method, path, headers, body):
+        attempts.append(body)
+        return json_response(503, {"error": "unavailable"}, {"Retry-After": "0"})
+
+    with FakeServer(always_503) as server:
+        outcome = _scheduler(server.url, max_retries=2).embed(["a", "b"])
+
+    # 재시도할 수 있는 오류는 나누지 않고 재시도 후 배치 전체를 실패로 표시
+    assert len(attempts) == 3
+    assert [(failure["index"], failure["status"]) for failure in outcome["failures"]] == [(0, 503), (1, 503)]
+    assert outcome["embeddings"] == [None, None]
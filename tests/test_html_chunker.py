@@ -0,0 +1,86 @@
+import random
+
+import pytest
+
+pytest.importorskip("bs4")
+
+from file.html_chunker import chunk_html, extract_chunks_legacy, verify_compat
+
+FIXTURES = {
+    "nested_p": (
+        "<h1>1.1 GENERAL</h1><p>outer <p>inner</p> tail</p>"
+        "<div><p>a<p>b<p>c</div><h2>1.2 SCOPE</h2><p><span>x</span><b> y </b></p>"
+    ),
+    "footer_wraps_p": (
+        "<h1>2.1 Valves</h1><p>Gate valve body</p><footer><p>12</p></footer>"
+        "<p>Next page text</p><footer><p>Page</p><p>13</p></footer>"
+        "<h2>2.2 Handwheels</h2><p>plastic</p><footer>14</footer>"
+    ),
+    "entities": (
+        "<h1>3.1 &lt;Materials&gt;</h1><p>A &amp; B&nbsp;&nbsp;C &#8211; D &#x2014; E</p>"
+        "<p>&copy; 2024 &unknown; &amp</p><footer>&#49;&#50;</footer><h2>3.2&nbsp;Tests</h2><p>&quot;q&quot;</p>"
+        "<p>&#0;&#xD800;&#128;&#x41g; &AMP; &notit; &#xZZ;</p>"
+    ),
+    "default_and_dynamic_headers": (
+        "<h1>1.0 GENERAL</h1><p>general text</p><h2>1.1 Purpose</h2><p>purpose</p>"
+        "<h1>2.0 SCOPE OF SUPPLY</h1><p>7</p><h3>3.0 Design</h3><p>3.0 inline</p>"
+        "<h2>7.3.5 TESTING</h2><p>test</p><p>4.0</p><footer>8</footer><h1>5.0 END</h1>"
+    ),
+    "cdata": "<h1>3.0 X</h1><h3>4.0</h3><p><![CDATA[x]]>y</p><p>a<![CDATA[ b ]]><![if IE]>c</p>",
+    "comments_scripts_void": (
+        "<h1>6.1 Misc</h1><p>a<!-- hidden -->b<br>c<img src='x'>d</p>"
+        "<p><script>var x = '<p>';</script>e<style>p{}</style></p><p>f</span>g</p>"
+    ),
+    "text_before_first_header": "<p>preamble</p><footer>1</footer><h1>9.1 First</h1><p>body</p>",
+}
+
+
+@pytest.mark.parametrize("name", sorted(FIXTURES))
+@pytest.mark.parametrize("use_dynamic_headers", [True, False])
+def test_compat_matches_legacy(name, use_dynamic_headers):
+    html = FIXTURES[name]
+    expected = extract_chunks_legacy(html, use_dynamic_headers)
+    assert chunk_html(html, use_dynamic_headers, compat=True)["chunks"] == expected
+
+
+def test_cdata_is_kept_like_beautifulsoup():
+    html = "<h1>3.0 X</h1><h3>4.0</h3><p><![CDATA[x]]>y</p>"
+    assert extract_chunks_legacy(html) == ["3.0 X", "4.0\nxy"]
+    assert chunk_html(html)["chunks"] == ["3.0 X", "4.0\nxy"]
+
+
+def test_default_headers_differ_from_dynamic_headers():
+    html = FIXTURES["default_and_dynamic_headers"]
+    dynamic = chunk_html(html, use_dynamic_headers=True)["chunks"]
+    default = chunk_html(html, use_dynamic_headers=False)["chunks"]
+    assert dynamic != default
+    assert [chunk.split("\n")[0] for chunk in default] == ["1.0 GENERAL", "2.0 SCOPE OF SUPPLY", "3.0 Design", "3.0 inline", "4.0", "5.0 END"]
+
+
+def test_compat_false_drops_page_markers_but_keeps_spans():
+    html = FIXTURES["footer_wraps_p"]
+    result = chunk_html(html, compat=False)
+    assert all("[페이지" not in chunk for chunk in result["chunks"])
+    assert result["page_spans"] == [{"start_page": 12, "end_page": 13}, {"start_page": 14, "end_page": 14}]
+
+
+def _random_html(rng):
+    tags = ["h1", "h2", "h3", "p", "footer", "div", "span", "b"]
+    texts = ["1.1 Intro", "2.0 SCOPE OF SUPPLY", "3.0", "7.3.5 TESTING", "body", " a &amp; b ", "12", "3", "",
+             "<![CDATA[c]]>", "<!-- x -->", "<br>", "&lt;x&gt;", "4.0 End"]
+    parts = []
+    for _ in range(rng.randint(1, 30)):
+        tag = rng.choice(tags)
+        inner = rng.choice(texts)
+        if rng.random() < 0.3:
+            inner += f"<{rng.choice(tags)}>{rng.choice(texts)}</{rng.choice(tags)}>"
+        parts.append(f"<{tag}>{inner}" + (f"</{tag}>" if rng.random() < 0.85 else ""))
+    return "".join(parts)
+
+
+def test_random_documents_match_legacy():
+    rng = random.Random(20240601)
+    for _ in range(300):
+        html = _random_html(rng)
+        report = verify_compat(html)
+        assert report["identical"], html
@@ -0,0 +1,58 @@
+import pytest
+
+from file.index_alias import cleanup_index_generations, get_alias_targets, rebuild_index, switch_index_alias
+from file.index_schema import build_index_body, get_index_profile
+from tests.fake_opensearch import FakeOpenSearch
+
+
+ALIAS = "chunks"
+
+
+def legacy_cluster():
+    """alias 도입 전처럼 alias 이름 그대로 만든 인덱스가 있는 클러스터"""
+    client = FakeOpenSearch()
+    client.create(ALIAS, build_index_body(get_index_profile("default")))
+    client.add_docs(ALIAS, {"a": {"content": "legacy", "embedding": [0.1, 0.2]}})
+    return client
+
+
+def test_first_alias_switch_keeps_legacy_index_as_generation():
+    client = legacy_cluster()
+
+    result = rebuild_index(client, ALIAS, build_index_body(get_index_profile("default")))
+
+    assert result["index"] == f"{ALIAS}-v1"
+    assert result["previous"] == [f"{ALIAS}-v0"]
+    assert result["deleted"] == []
+    assert get_alias_targets(client, ALIAS) == [f"{ALIAS}-v1"]
+    legacy = client.indices_data[f"{ALIAS}-v0"]
+    assert legacy["docs"] == {"a": {"content": "legacy", "embedding": [0.1, 0.2]}}
+    assert legacy["mappings"]["properties"]["embedding"]["type"] == "knn_vector"
+    assert "index.blocks.write" not in legacy["settings"]
+
+
+def test_legacy_generation_follows_retention_policy():
+    client = legacy_cluster()
+    body = build_index_body(get_index_profile("default"))
+    rebuild_index(client, ALIAS, body)
+
+    result = rebuild_index(client, ALIAS, body)
+
+    assert result["deleted"] == [f"{ALIAS}-v0"]
+    assert sorted(client.indices_data) == [f"{ALIAS}-v1", f"{ALIAS}-v2"]
+    assert cleanup_index_generations(client, ALIAS) == []
+
+
+def test_failed_switch_unblocks_legacy_index(monkeypatch):
+    client = legacy_cluster()
+    client.create(f"{ALIAS}-v1", build_index_body(get_index_profile("default")))
+
+    def fail(body):
+        raise RuntimeError("cluster unavailable")
+
+    monkeypatch.setattr(client.indices, "update_aliases", fail)
+    with pytest.raises(RuntimeError):
+        switch_index_alias(client, ALIAS, f"{ALIAS}-v1")
+
+    assert f"{ALIAS}-v0" not in client.indices_data
+    assert "index.blocks.write" not in client.indices_data[ALIAS]["settings"]
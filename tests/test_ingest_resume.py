@@ -0,0 +1,122 @@
+import pytest
+
+from file import blob_store, ingest
+
+
+HTML = "<h1>1.0 GENERAL</h1><p>general text</p><footer>1</footer><h2>1.1 Purpose</h2><p>purpose</p><footer>2</footer>"
+
+
+@pytest.fixture
+def pipeline_env(tmp_path, monkeypatch):
+    """외부 호출(Upstage, 임베딩, OpenSearch)을 호출 횟수를 세는 가짜로 바꾼 적재 환경."""
+    monkeypatch.setattr(blob_store, "_shared_store", blob_store.BlobStore(str(tmp_path / "blobs")))
+    calls = {"parse": 0, "embed": 0, "index": 0, "fail": set()}
+
+    def fake_parse(path, **kwargs):
+        calls["parse"] += 1
+        return {"content": {"html": HTML}, "usage": {"pages": 2}}
+
+    def fake_embed(texts):
+        calls["embed"] += 1
+        if "embed" in calls["fail"]:
+            raise RuntimeError("embedding api down")
+        embeddings = [[float(len(text))] for text in texts]
+        failures = []
+        if "embed-partial" in calls["fail"]:
+            embeddings[-1] = None
+            failures.append({"chunk_id": len(texts) - 1, "status": 429, "error": "rate limited"})
+        return embeddings, {"hits": 0, "misses": len(texts), "failures": failures}
+
+    def fake_save(records, client, document_name, embeddings=None, **kwargs):
+        calls["index"] += 1
+        if "index" in calls["fail"]:
+            raise RuntimeError("opensearch down")
+        assert len(embeddings) == len(records)
+        return [f"{document_name}_{i}" for i in range(len(records))]
+
+    monkeypatch.setattr(ingest, "process_document_with_upstage", fake_parse)
+    monkeypatch.setattr(ingest, "generate_embeddings_with_cache", fake_embed)
+    monkeypatch.setattr(ingest, "save_chunks_to_opensearch", fake_save)
+    monkeypatch.setattr(ingest, "create_opensearch_client", lambda: object())
+    monkeypatch.setattr(ingest, "refresh_index", lambda client, index_name: None)
+
+    document = tmp_path / "spec.pdf"
+    document.write_bytes(b"%PDF-1.4 fake")
+
+    def run():
+        checkpoint = ingest.IngestCheckpoint(str(tmp_path / "checkpoint.json"))
+        return ingest.IngestPipeline(checkpoint=checkpoint).run(ingest.discover_documents(str(tmp_path)))
+
+    return calls, run, document
+
+
+def test_resumes_after_chunk_stage(pipeline_env):
+    calls, run, document = pipeline_env
+    calls["fail"].add("embed")
+    assert run()["checkpoint"]["failed"] == 1
+
+    calls["fail"].clear()
+    report = run()
+    assert report["resumed"] == 1
+    assert report["checkpoint"]["done"] == 1
+    assert calls == {"parse": 1, "embed": 2, "index": 1, "fail": set()}
+
+
+def test_resumes_after_embed_stage(pipeline_env):
+    calls, run, document = pipeline_env
+    calls["fail"].add("index")
+    run()
+
+    calls["fail"].clear()
+    report = run()
+    assert report["resumed"] == 1
+    assert report["checkpoint"]["done"] == 1
+    assert calls == {"parse": 1, "embed": 1, "index": 2, "fail": set()}
+
+    # 완료된 문서는 다시 실행해도 건너뜀
+    assert run()["skipped"] == 1
+    assert calls["index"] == 2
+
+
+def test_partial_embeddings_are_not_marked_done(pipeline_env, tmp_path):
+    calls, run, document = pipeline_env
+    calls["fail"].add("embed-partial")
+    report = run()
+    assert report["checkpoint"] == {"done": 0, "failed": 1, "running": 0}
+
+    state = ingest.IngestCheckpoint(str(tmp_path / "checkpoint.json")).get(str(document))
+    assert state["stage"] == "chunk"
+    assert "임베딩 실패" in state["error"]
+
+    # 다시 실행하면 파싱 없이 embed부터 다시 하고 완료로 기록
+    calls["fail"].clear()
+    report = run()
+    assert report["resumed"] == 1
+    assert report["checkpoint"]["done"] == 1
+    assert calls == {"parse": 1, "embed": 2, "index": 2, "fail": set()}
+
+
+def test_falls_back_to_parse_when_outputs_are_gone(pipeline_env, tmp_path):
+    calls, run, document = pipeline_env
+    calls["fail"].add("index")
+    run()
+
+    for path in (tmp_path / "blobs").rglob("*"):
+        if path.is_file():
+            path.unlink()
+    calls["fail"].clear()
+    report = run()
+    assert report["resumed"] == 0
+    assert report["checkpoint"]["done"] == 1
+    assert calls["parse"] == 2
+
+
+def test_changed_file_starts_from_parse(pipeline_env):
+    calls, run, document = pipeline_env
+    calls["fail"].add("index")
+    run()
+
+    document.write_bytes(b"%PDF-1.4 changed")
+    calls["fail"].clear()
+    assert run()["resumed"] == 0
+    assert calls["parse"] == 2
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+
+from file import jobs
+
+
+HTML = "<h1>1.0 GENERAL</h1><p>general text</p><footer>1</footer>"
+
+
+def claim(store, options=None):
+    store.submit(b"%PDF-1.4 fake", "spec.pdf", options or {"index": True})
+    return store.claim_next("test-worker")
+
+
+def test_adds_heartbeat_column_to_existing_db(tmp_path):
+    conn = sqlite3.connect(tmp_path / "jobs.sqlite3")
+    conn.executescript(jobs._SCHEMA.replace(",\n    heartbeat_at REAL", ""))
+    conn.close()
+
+    store = jobs.JobStore(str(tmp_path))
+    job = claim(store)
+    assert store.get(job["id"])["heartbeat_at"] is not None
+
+
+def test_requeues_only_jobs_with_stale_heartbeat(tmp_path):
+    store = jobs.JobStore(str(tmp_path))
+    alive = claim(store)
+    dead = claim(store)
+    # 둘 다 오래전에 시작했지만 alive만 heartbeat가 최근
+    long_ago = time.time() - 3600
+    store._conn.execute("UPDATE jobs SET started_at = ?, updated_at = ?, heartbeat_at = ?", (long_ago,) * 3)
+    store.heartbeat(alive["id"])
+
+    assert store.requeue_stale(300) == 1
+    assert store.get(alive["id"])["status"] == "running"
+    assert store.get(dead["id"])["status"] == "queued"
+
+
+def test_heartbeat_is_kept_fresh_during_a_long_stage(tmp_path, monkeypatch):
+    store = jobs.JobStore(str(tmp_path))
+    job = claim(store, {"index": False})
+    seen = {}
+
+    def slow_parse(path, **kwargs):
+        claimed = store.get(job["id"])["heartbeat_at"]
+        time.sleep(0.3)
+        seen["advanced"] = store.get(job["id"])["heartbeat_at"] > claimed
+        return {"content": {"html": HTML}}
+
+    monkeypatch.setattr(jobs, "process_document_with_upstage", slow_parse)
+    monkeypatch.setattr(jobs, "embed_result_chunks", lambda result: {**result, "embeddings": [[1.0]], "embeddings_count": 1})
+    jobs.run_job(store, job, heartbeat_seconds=0.05)
+
+    assert seen["advanced"]
+    assert store.get(job["id"])["status"] == "done"
+
+
+def test_job_fails_without_indexing_when_no_embeddings(tmp_path, monkeypatch):
+    store = jobs.JobStore(str(tmp_path))
+    job = claim(store)
+    indexed = []
+
+    monkeypatch.setattr(jobs, "process_document_with_upstage", lambda path, **kwargs: {"content": {"html": HTML}})
+    monkeypatch.setattr(
+        jobs, "embed_result_chunks",
+        lambda result: {**result, "embeddings": [], "embeddings_count": 0, "embeddings_error": "임베딩 생성 실패"}
+    )
+    monkeypatch.setattr(jobs, "save_chunks_to_opensearch", lambda *args, **kwargs: indexed.append(args))
+    jobs.run_job(store, job)
+
+    finished = store.get(job["id"])
+    assert not indexed
+    assert finished["status"] == "failed"
+    assert finished["error"] == "embed: 임베딩 생성 실패"
+    assert finished["progress"]["embed"]["status"] == "failed"
+    assert finished["input_path"]  # 다시 시도할 수 있도록 입력 파일 유지
+    assert store.retry(job["id"])
+
+
+def test_retried_job_keeps_the_session_api_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("UPSTAGE_API_KEY", raising=False)
+    queue = jobs.JobQueue(jobs.JobStore(str(tmp_path)), workers=0)
+    job_id = queue.submit(b"%PDF-1.4 fake", "spec.pdf", {"index": False}, api_key="session-key")
+    keys = []
+
+    def parse(path, api_key=None, **kwargs):
+        keys.append(api_key)
+        if len(keys) == 1:
+            raise RuntimeError("upstage 503")
+        return {"content": {"html": HTML}}
+
+    monkeypatch.setattr(jobs, "process_document_with_upstage", parse)
+    monkeypatch.setattr(jobs, "embed_result_chunks", lambda result: {**result, "embeddings": [[1.0]], "embeddings_count": 1})
+
+    jobs.run_job(queue.store, queue.store.claim_next("w"))
+    assert jobs.job_api_key(job_id) == "session-key"
+
+    assert queue.retry(job_id)
+    jobs.run_job(queue.store, queue.store.claim_next("w"))
+    assert keys == ["session-key", "session-key"]
+    assert queue.store.get(job_id)["status"] == "done"
+    # 성공한 작업의 키는 지움
+    assert jobs.job_api_key(job_id) is None
+
+
+def test_retry_can_supply_a_new_api_key(tmp_path, monkeypatch):
+    monkeypatch.delenv("UPSTAGE_API_KEY", raising=False)
+    queue = jobs.JobQueue(jobs.JobStore(str(tmp_path)), workers=0)
+    job_id = queue.store.submit(b"%PDF-1.4 fake", "spec.pdf", {})
+    queue.store.finish(job_id, error="parse: 401")
+    assert jobs.job_api_key(job_id) is None
+
+    assert queue.retry(job_id, api_key="new-key")
+    assert jobs.job_api_key(job_id) == "new-key"
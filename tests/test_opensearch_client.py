@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from file import opensearch_client
+
+
+class FakeClient:
+    def __init__(self, config):
+        self.config = config
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_clients(monkeypatch):
+    monkeypatch.setattr(opensearch_client, "build_opensearch_client", FakeClient)
+    monkeypatch.setenv("OPENSEARCH_HOST", "node-a")
+    opensearch_client.close_opensearch_client()
+    yield
+    opensearch_client.close_opensearch_client()
+
+
+def test_replaced_client_is_closed_after_grace_period(fake_clients, monkeypatch):
+    monkeypatch.setenv("OPENSEARCH_CLIENT_CLOSE_GRACE", "0.2")
+    old = opensearch_client.get_opensearch_client()
+
+    monkeypatch.setenv("OPENSEARCH_HOST", "node-b")
+    new = opensearch_client.get_opensearch_client()
+
+    # 새 호출자는 새 클라이언트를 받고, 이전 클라이언트를 들고 있던 쪽은 잠시 계속 쓸 수 있음
+    assert new is not old
+    assert opensearch_client.get_opensearch_client() is new
+    assert not old.closed
+
+    deadline = time.time() + 5
+    while not old.closed and time.time() < deadline:
+        time.sleep(0.05)
+    assert old.closed
+    assert not new.closed
+
+
+def test_close_releases_retired_clients_immediately(fake_clients, monkeypatch):
+    monkeypatch.setenv("OPENSEARCH_CLIENT_CLOSE_GRACE", "3600")
+    old = opensearch_client.get_opensearch_client()
+    monkeypatch.setenv("OPENSEARCH_HOST", "node-b")
+    new = opensearch_client.get_opensearch_client()
+
+    opensearch_client.close_opensearch_client()
+
+    assert old.closed and new.closed
+    assert opensearch_client._retired_clients == []
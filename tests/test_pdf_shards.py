@@ -0,0 +1,136 @@
+import io
+import threading
+import time
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from file.html_chunker import chunk_html
+from file.pdf_shards import merge_shard_results
+from file.upstage import parse_document_in_shards
+from tests.fake_servers import FakeServer, json_response
+
+PAGE_COUNT = 7
+
+
+def _write_pdf(path):
+    """페이지마다 너비를 달리해(100 + 쪽번호) 가짜 서버가 원본 쪽번호를 알 수 있게 합니다."""
+    writer = pypdf.PdfWriter()
+    for page in range(1, PAGE_COUNT + 1):
+        writer.add_blank_page(width=100 + page, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+class FakeUpstage:
+    """
+    Upstage document-parse 흉내.
+
+    업로드된 구간 PDF의 페이지마다 제목/본문/쪽번호(footer) 요소를 돌려줍니다.
+    page와 id는 실제 API처럼 구간 기준(1, 0부터)이고 footer에는 인쇄된 원본 쪽번호가 들어갑니다.
+    fail_once_at 쪽으로 시작하는 구간은 첫 요청을 503으로 거절하고,
+    앞쪽 구간일수록 늦게 응답해 완료 순서가 페이지 순서와 달라지게 합니다.
+    """
+
+    def __init__(self, fail_once_at):
+        self.fail_once_at = set(fail_once_at)
+        self.attempts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, method, path, headers, body):
+        assert headers["Authorization"] == "Bearer test-key"
+        pdf = body[body.index(b"%PDF-"):body.rindex(b"%%EOF") + 5]
+        pages = [int(page.mediabox.width) - 100 for page in pypdf.PdfReader(io.BytesIO(pdf)).pages]
+        first = pages[0]
+        with self._lock:
+            self.attempts[first] = self.attempts.get(first, 0) + 1
+            if first in self.fail_once_at:
+                self.fail_once_at.discard(first)
+                return json_response(503, {"error": "busy"})
+
+        time.sleep(0.05 * (PAGE_COUNT - first))
+        elements = []
+        html_parts = []
+        for local_page, printed_page in enumerate(pages, start=1):
+            parts = [
+                ("heading1", f"<h1 id='{len(elements)}'>{printed_page}.1 Section {printed_page}</h1>"),
+                ("paragraph", f"<p id='{len(elements) + 1}'>Body of page {printed_page}</p>"),
+                ("footer", f"<footer id='{len(elements) + 2}'>{printed_page}</footer>")
+            ]
+            for category, html in parts:
+                elements.append({"id": len(elements), "page": local_page, "category": category, "content": {"html": html}})
+                html_parts.append(html)
+        return json_response(200, {
+            "api": "2.0",
+            "content": {"html": "".join(html_parts), "text": "", "markdown": ""},
+            "elements": elements,
+            "usage": {"pages": len(pages)}
+        })
+
+
+def test_shards_are_merged_in_page_order_with_offsets(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "spec.pdf"
+    _write_pdf(pdf_path)
+    api = FakeUpstage(fail_once_at=[3])
+
+    with FakeServer(api) as server:
+        monkeypatch.setenv("UPSTAGE_API_URL", server.url)
+        result = parse_document_in_shards(str(pdf_path), "test-key", pages_per_shard=2, max_workers=4, max_retries=2)
+
+    # 구간별 재시도: 실패한 3-4쪽 구간만 다시 요청
+    assert api.attempts == {1: 1, 3: 2, 5: 1, 7: 1}
+    assert [(shard["start_page"], shard["end_page"], shard["attempts"]) for shard in result["parse_shards"]] == [
+        (1, 2, 1), (3, 4, 2), (5, 6, 1), (7, 7, 1)
+    ]
+
+    # 완료 순서와 관계없이 페이지 순서로 합치고, page/id는 원본 문서 기준으로 바꿈
+    elements = result["elements"]
+    assert [element["id"] for element in elements] == list(range(PAGE_COUNT * 3))
+    assert [element["page"] for element in elements] == [page for page in range(1, PAGE_COUNT + 1) for _ in range(3)]
+    footers = [element for element in elements if element["category"] == "footer"]
+    assert [element["content"]["html"] for element in footers] == [
+        f"<footer id='{page * 3 - 1}'>{page}</footer>" for page in range(1, PAGE_COUNT + 1)
+    ]
+    assert result["usage"]["pages"] == PAGE_COUNT
+
+    # content.html의 id 속성도 같은 번호로 맞춤
+    html = result["content"]["html"]
+    for element in elements:
+        assert element["content"]["html"] in html
+
+    # 인쇄된 쪽번호는 원본 기준이므로 청크 페이지 범위가 그대로 맞음
+    records = chunk_html(html)["records"]
+    assert [(record.start_page, record.end_page) for record in records] == [
+        (page, page) for page in range(1, PAGE_COUNT + 1)
+    ]
+
+
+def test_failed_shard_reports_its_page_range(tmp_path, monkeypatch):
+    pdf_path = tmp_path / "spec.pdf"
+    _write_pdf(pdf_path)
+
+    def reject_middle(method, path, headers, body):
+        pdf = body[body.index(b"%PDF-"):body.rindex(b"%%EOF") + 5]
+        first = int(pypdf.PdfReader(io.BytesIO(pdf)).pages[0].mediabox.width) - 100
+        if first == 4:
+            return json_response(400, {"error": "bad page"})
+        return FakeUpstage(fail_once_at=[])(method, path, headers, body)
+
+    with FakeServer(reject_middle) as server:
+        monkeypatch.setenv("UPSTAGE_API_URL", server.url)
+        with pytest.raises(Exception, match="4-6페이지"):
+            parse_document_in_shards(str(pdf_path), "test-key", pages_per_shard=3, max_retries=2)
+
+
+def test_merge_keeps_usage_and_renumbers_html_ids():
+    shard = {
+        "api": "2.0",
+        "content": {"html": "<p id='0'>a</p><footer id='1'>9</footer>"},
+        "elements": [{"id": 0, "page": 1}, {"id": 1, "page": 1}],
+        "usage": {"pages": 1}
+    }
+    merged = merge_shard_results([shard, shard], [9, 10])
+    assert merged["content"]["html"] == "<p id='0'>a</p><footer id='1'>9</footer>\n<p id='2'>a</p><footer id='3'>9</footer>"
+    assert [(element["id"], element["page"]) for element in merged["elements"]] == [(0, 9), (1, 9), (2, 10), (3, 10)]
+    assert merged["usage"] == {"pages": 2}
@@ -0,0 +1,74 @@
+import pytest
+
+from file.index_schema import build_index_body, get_index_profile
+from file.quantization import fit_int8_calibration
+from file.search import (
+    _quantize_embeddings_for_index,
+    calibrate_index_quantization,
+    get_index_quantization,
+    rebuild_chunk_index
+)
+from tests.fake_opensearch import FakeOpenSearch
+
+
+ALIAS = "chunks"
+VECTORS = [[0.5, -0.25, 0.1], [0.05, 0.9, -0.3], [-0.7, 0.2, 0.4]]
+
+
+def live_index(profile, docs=None, calibration=None):
+    client = FakeOpenSearch()
+    body = build_index_body(get_index_profile(profile))
+    if calibration:
+        body["mappings"]["_meta"]["quantization"] = calibration
+    client.create(f"{ALIAS}-v1", {**body, "aliases": {ALIAS: {"is_write_index": True}}})
+    client.add_docs(ALIAS, docs or {})
+    return client
+
+
+def test_reindex_rebuild_keeps_live_int8_scale():
+    calibration = fit_int8_calibration(VECTORS)
+    client = live_index("int8", {"a": {"embedding": [12, -5, 3]}}, calibration)
+
+    result = rebuild_chunk_index(client, ALIAS, profile="int8")
+
+    assert result["copied"] == 1
+    assert get_index_quantization(client, ALIAS, use_cache=False) == calibration
+
+
+def test_reindex_refuses_vector_encoding_change():
+    client = live_index("default", {"a": {"embedding": VECTORS[0]}})
+
+    with pytest.raises(ValueError, match="reindex"):
+        rebuild_chunk_index(client, ALIAS, profile="int8")
+    assert sorted(client.indices_data) == [f"{ALIAS}-v1"]
+
+
+def test_reembed_rebuild_fits_scale_from_live_corpus():
+    client = live_index("default", {str(i): {"embedding": vector} for i, vector in enumerate(VECTORS)})
+
+    rebuild_chunk_index(client, ALIAS, profile="int8", reindex_from_live=False)
+
+    calibration = client.indices_data[f"{ALIAS}-v2"]["mappings"]["_meta"]["quantization"]
+    assert calibration["scale"] == fit_int8_calibration(VECTORS)["scale"]
+    assert calibration["samples"] == len(VECTORS)
+
+
+def test_scale_is_fit_once_and_never_refit():
+    client = live_index("int8")
+
+    _quantize_embeddings_for_index(client, ALIAS, VECTORS)
+    first = get_index_quantization(client, ALIAS, use_cache=False)
+    assert first["samples"] == len(VECTORS)
+
+    # 값 범위가 전혀 다른 배치를 저장해도 스케일은 그대로
+    _quantize_embeddings_for_index(client, ALIAS, [[9.0, -9.0, 9.0]])
+    assert get_index_quantization(client, ALIAS, use_cache=False) == first
+    with pytest.raises(ValueError, match="이미"):
+        calibrate_index_quantization(client, ALIAS, VECTORS)
+
+
+def test_refuses_to_calibrate_index_with_unscaled_vectors():
+    client = live_index("int8", {"a": {"embedding": [12, -5, 3]}})
+
+    with pytest.raises(ValueError, match="다시 임베딩"):
+        _quantize_embeddings_for_index(client, ALIAS, VECTORS)
@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("langchain_openai")
+
+from rag import rag
+
+
+def test_rag_query_forwards_fusion_to_hybrid_search(monkeypatch):
+    calls = []
+
+    def fake_hybrid(client, query, query_vector, **kwargs):
+        calls.append(kwargs)
+        return [{"content": "x", "document_name": "doc"}]
+
+    monkeypatch.setitem(rag._SEARCH_FUNCTIONS, "hybrid", fake_hybrid)
+    rag.rag_query("q", client=object(), query_vector=[0.1], fusion="rrf", candidate_size=40)
+    rag.rag_query("q", client=object(), query_vector=[0.1])
+
+    assert calls[0] == {"size": 5, "filters": None, "fusion": "rrf", "candidate_size": 40}
+    # 넘기지 않으면 hybrid_search_chunks 기본값(bool) 사용
+    assert "fusion" not in calls[1] and "candidate_size" not in calls[1]
+
+
+def test_batch_forwards_fusion_in_every_spec(monkeypatch):
+    seen = []
+
+    def fake_multi(client, searches, embeddings_client=None):
+        seen.extend(searches)
+        return [{"query": search["query"], "results": [], "error": None} for search in searches]
+
+    monkeypatch.setattr(rag, "multi_search_chunks", fake_multi)
+    monkeypatch.setattr(rag, "get_shared_embeddings_client", lambda: None)
+    rag.rag_query_batch(["a", "b"], client=object(), fusion="rrf", candidate_size=30)
+
+    assert [(spec["fusion"], spec["candidate_size"]) for spec in seen] == [("rrf", 30), ("rrf", 30)]
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import pytest
+
+from file import search
+from file.index_schema import build_index_body, get_index_profile
+
+
+def _hits(*ids):
+    return {"hits": {"hits": [{"_id": doc_id, "_score": 1.0, "_source": {"content": doc_id}} for doc_id in ids]}}
+
+
+class _Recorder:
+    meta = {}
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def respond(self, method, kwargs):
+        self.calls.append((method, kwargs))
+        if method == "msearch":
+            return {"responses": [_hits("a", "b"), _hits("b", "c")]}
+        if method == "get_mapping":
+            return {"chunks-v1": {"mappings": {"_meta": self.meta}}}
+        return _hits("a")
+
+
+class FakeClient(_Recorder):
+    def __init__(self, calls):
+        super().__init__(calls)
+        outer = self
+        self.indices = type("Indices", (), {"get_mapping": lambda _, **kw: outer.respond("get_mapping", kw)})()
+        self.search_pipeline = type("Pipelines", (), {"put": lambda _, **kw: outer.respond("pipeline", kw)})()
+
+    def search(self, **kwargs):
+        return self.respond("search", kwargs)
+
+    def msearch(self, **kwargs):
+        return self.respond("msearch", kwargs)
+
+
+class FakeAsyncClient(_Recorder):
+    def __init__(self, calls):
+        super().__init__(calls)
+        outer = self
+
+        class Indices:
+            async def get_mapping(self, **kwargs):
+                return outer.respond("get_mapping", kwargs)
+
+        class Pipelines:
+            async def put(self, **kwargs):
+                return outer.respond("pipeline", kwargs)
+
+        self.indices = Indices()
+        self.search_pipeline = Pipelines()
+
+    async def search(self, **kwargs):
+        return self.respond("search", kwargs)
+
+    async def msearch(self, **kwargs):
+        return self.respond("msearch", kwargs)
+
+
+@pytest.fixture(autouse=True)
+def _no_caches(monkeypatch):
+    monkeypatch.setenv("SEARCH_CACHE_ENABLED", "false")
+    search._INDEX_META_CACHE.clear()
+    search._CREATED_PIPELINES.clear()
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "pipeline", "bool"])
+def test_async_hybrid_search_sends_the_same_requests(fusion):
+    filters = {"document_name": ["spec.pdf"]}
+    sync_calls, async_calls = [], []
+
+    sync_results = search.hybrid_search_chunks(
+        FakeClient(sync_calls), "valve", [0.1, 0.2], size=3, fusion=fusion, filters=filters
+    )
+    search._INDEX_META_CACHE.clear()
+    search._CREATED_PIPELINES.clear()
+    async_results = asyncio.run(search.ahybrid_search_chunks(
+        FakeAsyncClient(async_calls), "valve", [0.1, 0.2], size=3, fusion=fusion, filters=filters
+    ))
+
+    assert sync_calls == async_calls
+    assert sync_results == async_results
+    if fusion == "pipeline":
+        assert [method for method, _ in sync_calls].count("pipeline") == 1
+
+
+def test_async_text_and_vector_search_send_the_same_requests():
+    sync_calls, async_calls = [], []
+    search.search_chunks(FakeClient(sync_calls), "valve", size=2)
+    search.vector_search_chunks(FakeClient(sync_calls), [0.3, 0.4], size=2)
+    search._INDEX_META_CACHE.clear()
+
+    async def run():
+        client = FakeAsyncClient(async_calls)
+        await search.asearch_chunks(client, "valve", size=2)
+        await search.avector_search_chunks(client, [0.3, 0.4], size=2)
+
+    asyncio.run(run())
+    assert sync_calls == async_calls
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "pipeline", "bool"])
+def test_lucene_ef_search_is_sent_as_knn_method_parameters(monkeypatch, fusion):
+    meta = build_index_body(get_index_profile("high-recall"))["mappings"]["_meta"]
+    monkeypatch.setattr(_Recorder, "meta", meta)
+    sync_calls, async_calls = [], []
+
+    search.hybrid_search_chunks(FakeClient(sync_calls), "valve", [0.1, 0.2], size=3, fusion=fusion)
+    search._INDEX_META_CACHE.clear()
+    search._CREATED_PIPELINES.clear()
+    asyncio.run(search.ahybrid_search_chunks(FakeAsyncClient(async_calls), "valve", [0.1, 0.2], size=3, fusion=fusion))
+
+    assert sync_calls == async_calls
+    sent = json.dumps([kwargs for method, kwargs in sync_calls if method in ("search", "msearch")])
+    assert '"method_parameters": {"ef_search": 256}' in sent
+
+
+def test_ef_search_goes_to_settings_for_faiss_and_meta_for_lucene():
+    faiss = build_index_body(get_index_profile("low-latency"))
+    lucene = build_index_body(get_index_profile("high-recall"))
+    default = build_index_body(get_index_profile("default"))
+
+    assert faiss["settings"]["index.knn.algo_param.ef_search"] == 64
+    assert "method_parameters" not in faiss["mappings"]["_meta"]
+    assert lucene["mappings"]["_meta"]["method_parameters"] == {"ef_search": 256}
+    assert "index.knn.algo_param.ef_search" not in lucene["settings"]
+    # 기본 프로필은 기존처럼 엔진 기본값을 사용
+    assert "method_parameters" not in default["mappings"]["_meta"]
@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from file import search_cache
+from file.search_cache import cached_search, get_index_generation, bump_index_generation, search_result_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def _generation_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("INDEX_GENERATION_FILE", str(tmp_path / "index_generation"))
+    monkeypatch.setenv("SEARCH_CACHE_ENABLED", "true")
+    search_cache._generation_file_state = None
+    search_result_cache.clear()
+
+
+def _bump_in_other_process():
+    subprocess.run(
+        [sys.executable, "-c", "from file.search_cache import bump_index_generation; bump_index_generation()"],
+        cwd=ROOT,
+        env=os.environ.copy(),
+        check=True
+    )
+
+
+def test_generation_changes_on_every_bump():
+    first = bump_index_generation()
+    second = bump_index_generation()
+    assert second > first
+    assert get_index_generation() == second
+
+
+def test_bump_in_other_process_is_visible():
+    before = get_index_generation()
+    _bump_in_other_process()
+    after = get_index_generation()
+    assert after != before
+    _bump_in_other_process()
+    assert get_index_generation() == after + 1
+
+
+def test_cached_search_is_invalidated_by_other_process():
+    calls = []
+
+    @cached_search("text")
+    def fake_search(client, query, size=10):
+        calls.append(query)
+        return [{"id": str(len(calls))}]
+
+    assert fake_search(None, "valve") == [{"id": "1"}]
+    assert fake_search(None, "valve") == [{"id": "1"}]
+    assert len(calls) == 1
+
+    _bump_in_other_process()
+    assert fake_search(None, "valve") == [{"id": "2"}]
+    assert len(calls) == 2
@@ -0,0 +1,24 @@
+from file import upstage
+
+
+HTML = (
+    "<h1>1.0 GENERAL</h1><p>general text</p><footer>1</footer>"
+    "<h2>1.1 Purpose</h2><p>purpose</p><footer>2</footer>"
+)
+
+
+def test_embeds_the_returned_chunks(monkeypatch):
+    embedded = []
+
+    def fake_embed(texts):
+        embedded.extend(texts)
+        return [[float(i)] for i in range(len(texts))], {"hits": 0, "misses": len(texts), "failures": []}
+
+    monkeypatch.setattr(upstage, "generate_embeddings_with_cache", fake_embed)
+    result = upstage.postprocess_upstage_result({"content": {"html": HTML}})
+
+    assert embedded == result["chunks"]
+    assert result["chunks"] == [record["text"] for record in result["chunk_records"]]
+    assert all("[페이지" not in chunk for chunk in result["chunks"])
+    assert [record["end_page"] for record in result["chunk_records"]] == [1, 2]
+    assert result["embeddings_count"] == len(result["chunks"]) == result["chunks_count"]